@@ -0,0 +1,113 @@
+"""Benchmark led_ble.color against the colorsys round trips it replaces.
+
+Checks that every color in the 0-255 rgb cube produces identical results
+and reports the per-call time of each implementation::
+
+    python benchmarks/bench_color.py [--levels 0,1,64,128,255] [--quick]
+
+``--quick`` checks every 5th value per channel instead of the full cube.
+Exits non-zero if any result differs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import colorsys
+import itertools
+import random
+import sys
+import timeit
+from collections.abc import Callable, Iterable
+
+from led_ble.color import rgb_brightness, rgb_unscaled, scale_rgb
+
+
+def colorsys_brightness(r: int, g: int, b: int) -> int:
+    _, _, v = colorsys.rgb_to_hsv(r / 255, g / 255, b / 255)
+    return int(v * 255)
+
+
+def colorsys_unscaled(r: int, g: int, b: int) -> tuple[int, int, int]:
+    hsv = colorsys.rgb_to_hsv(r / 255.0, g / 255.0, b / 255.0)
+    r_p, g_p, b_p = colorsys.hsv_to_rgb(hsv[0], hsv[1], 1)
+    return round(r_p * 255), round(g_p * 255), round(b_p * 255)
+
+
+def colorsys_scale(rgb: tuple[int, int, int], level: int) -> tuple[int, int, int]:
+    hsv = colorsys.rgb_to_hsv(*rgb)
+    r, g, b = colorsys.hsv_to_rgb(hsv[0], hsv[1], level)
+    return int(r), int(g), int(b)
+
+
+def _cube(step: int) -> Iterable[tuple[int, int, int]]:
+    channel = range(0, 256, step)
+    return itertools.product(channel, channel, channel)
+
+
+def check_equality(step: int, levels: list[int]) -> int:
+    """Return the number of colors whose results differ."""
+    mismatches = 0
+    for rgb in _cube(step):
+        r, g, b = rgb
+        if rgb_brightness(r, g, b) != colorsys_brightness(r, g, b):
+            mismatches += 1
+            print(f"brightness mismatch for {rgb}", file=sys.stderr)
+        if rgb_unscaled(r, g, b) != colorsys_unscaled(r, g, b):
+            mismatches += 1
+            print(f"unscaled mismatch for {rgb}", file=sys.stderr)
+        for level in levels:
+            if scale_rgb(rgb, level) != colorsys_scale(rgb, level):
+                mismatches += 1
+                print(f"scale mismatch for {rgb} at {level}", file=sys.stderr)
+    return mismatches
+
+
+def _time(func: Callable[[], object], number: int) -> float:
+    """Return the best per-call time in nanoseconds."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e9
+
+
+def benchmark(number: int) -> None:
+    samples = [
+        (random.randrange(256), random.randrange(256), random.randrange(256))
+        for _ in range(1000)
+    ]
+    cases: list[tuple[str, Callable[[], object], Callable[[], object]]] = [
+        (
+            "brightness",
+            lambda: [colorsys_brightness(*rgb) for rgb in samples],
+            lambda: [rgb_brightness(*rgb) for rgb in samples],
+        ),
+        (
+            "rgb_unscaled",
+            lambda: [colorsys_unscaled(*rgb) for rgb in samples],
+            lambda: [rgb_unscaled(*rgb) for rgb in samples],
+        ),
+        (
+            "scale",
+            lambda: [colorsys_scale(rgb, 128) for rgb in samples],
+            lambda: [scale_rgb(rgb, 128) for rgb in samples],
+        ),
+    ]
+    print(f"{'function':<14}{'colorsys ns':>14}{'led_ble ns':>14}{'speedup':>10}")
+    for name, reference, optimized in cases:
+        before = _time(reference, number) / len(samples)
+        after = _time(optimized, number) / len(samples)
+        print(f"{name:<14}{before:>14.1f}{after:>14.1f}{before / after:>9.1f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--levels", default="0,1,64,128,200,255")
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(",")]
+    mismatches = check_equality(5 if args.quick else 1, levels)
+    print(f"equality: {'ok' if not mismatches else f'{mismatches} mismatches'}")
+    benchmark(args.number)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
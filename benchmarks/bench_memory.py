@@ -0,0 +1,88 @@
+"""Measure the memory an LEDBLE device holds, with tracemalloc.
+
+Creates a fleet of devices and reports the bytes allocated per device,
+right after construction (idle) and after each has connected to an
+emulated controller, resolved its protocol and disconnected again
+(polled). Also reports the bytes per LEDBLEState::
+
+    python benchmarks/bench_memory.py [--devices 2000] [--top 10]
+
+``--top`` lists the source lines allocating the most per idle device.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import sys
+import tracemalloc
+
+from led_ble import LEDBLE
+from led_ble.emulator import ControllerEmulator
+from led_ble.models import LEDBLEState
+
+
+def _allocated() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+async def bench_devices(count: int, top: int) -> tuple[float, float]:
+    """Return the bytes per idle and per polled device."""
+    emulator = ControllerEmulator()
+    ble_devices = emulator.add_fleet(count + 1)
+    # Poll one device first so the protocol modules and caches it loads
+    # are not counted.
+    warmup = LEDBLE(ble_devices.pop())
+    with emulator.patch():
+        await warmup.update()
+    await warmup.stop()
+    gc.collect()
+    tracemalloc.start(10)
+    before = _allocated()
+    snapshot = tracemalloc.take_snapshot()
+    devices = [LEDBLE(ble_device) for ble_device in ble_devices]
+    idle = (_allocated() - before) / count
+    if top:
+        stats = tracemalloc.take_snapshot().compare_to(snapshot, "lineno")
+        for stat in stats[:top]:
+            print(f"{stat.size_diff / count:>10.1f} B  {stat.traceback}")
+    with emulator.patch():
+        await asyncio.gather(*(device.update() for device in devices))
+    await asyncio.gather(*(device.stop() for device in devices))
+    # Let the disconnect callbacks run.
+    await asyncio.sleep(0)
+    polled = (_allocated() - before) / count
+    tracemalloc.stop()
+    return idle, polled
+
+
+def bench_states(count: int) -> float:
+    """Return the bytes per LEDBLEState."""
+    tracemalloc.start()
+    before = _allocated()
+    states = [
+        LEDBLEState(True, (index & 0xFF, 2, 3), 4, 0x04, 0x61, 0x61, 0x10, 1)
+        for index in range(count)
+    ]
+    size = (_allocated() - before) / len(states)
+    tracemalloc.stop()
+    return size
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=2000)
+    parser.add_argument("--top", type=int, default=0)
+    args = parser.parse_args()
+    idle, polled = asyncio.run(bench_devices(args.devices, args.top))
+    state = bench_states(args.devices)
+    print(f"{'idle device':<16}{idle:>10.0f} B")
+    print(f"{'polled device':<16}{polled:>10.0f} B")
+    print(f"{'state':<16}{state:>10.0f} B")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
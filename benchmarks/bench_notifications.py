@@ -0,0 +1,135 @@
+"""Benchmark LEDBLE._notification_handler against the field-by-field parser.
+
+Feeds status and power frames to the handler of a device with one
+registered callback and reports the per-notification time and the number
+of callbacks fired::
+
+    python benchmarks/bench_notifications.py [--number 20000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+import timeit
+from dataclasses import replace
+from typing import cast
+
+from bleak.backends.device import BLEDevice
+
+from led_ble.led_ble import LEDBLE
+from led_ble.model_db import get_model
+from led_ble.models import LEDBLEState
+
+_LOGGER = logging.getLogger("led_ble.led_ble")
+
+
+class FakeBLEDevice:
+    address = "AA:BB:CC:DD:EE:FF"
+    name = "LEDnet"
+    details = None
+
+
+class LegacyLEDBLE(LEDBLE):
+    """LEDBLE with the notification handler it used to have."""
+
+    def _notification_handler(self, _sender: int, data: bytearray) -> None:
+        _LOGGER.debug("%s: Notification received: %s", self.name, data.hex())
+
+        if len(data) == 4 and data[0] == 0xCC:
+            on = data[1] == 0x23
+            self._state = replace(self._state, power=on)
+            return
+        if len(data) < 11:
+            return
+        model_num = data[1]
+        on = data[2] == 0x23
+        preset_pattern = data[3]
+        mode = data[4]
+        speed = data[5]
+        r = data[6]
+        g = data[7]
+        b = data[8]
+        w = data[9]
+        version = data[10]
+        self._state = LEDBLEState(
+            on, (r, g, b), w, model_num, preset_pattern, mode, speed, version
+        )
+
+        _LOGGER.debug(
+            "%s: Notification received; RSSI: %s: %s %s",
+            self.name,
+            self.rssi,
+            data.hex(),
+            self._state,
+        )
+
+        if not self._resolve_protocol_event.is_set():
+            self._resolve_protocol_event.set()
+            self._model_data = get_model(model_num)
+            self._set_protocol(self._model_data.protocol_for_version_num(version))
+        self._fire_callbacks()
+
+
+STATUS = bytearray([0x81, 0xE3, 0x23, 0x25, 0x61, 0x10, 10, 20, 30, 40, 5])
+STATUS_OTHER = bytearray([0x81, 0xE3, 0x23, 0x25, 0x61, 0x10, 11, 20, 30, 40, 5])
+POWER = bytearray([0xCC, 0x23, 0x00, 0x00])
+
+CASES = {
+    "repeated status": [STATUS],
+    "changing status": [STATUS, STATUS_OTHER],
+    "repeated power": [POWER],
+}
+
+
+def _bench(
+    cls: type[LEDBLE], frames: list[bytearray], number: int
+) -> tuple[float, float]:
+    """Return nanoseconds per notification and callbacks fired per call."""
+
+    async def _construct() -> LEDBLE:
+        return cls(cast(BLEDevice, FakeBLEDevice()))
+
+    led = asyncio.run(_construct())
+    fired = [0]
+
+    def _callback(_state: LEDBLEState) -> None:
+        fired[0] += 1
+
+    led.register_callback(_callback)
+    handler = led._notification_handler
+    batch = frames * (100 // len(frames))
+
+    def _run() -> None:
+        for frame in batch:
+            handler(0, frame)
+
+    handler(0, STATUS)
+    fired[0] = 0
+    best = min(timeit.repeat(_run, number=number // len(batch), repeat=5))
+    calls = (number // len(batch)) * len(batch)
+    return best / calls * 1e9, round(fired[0] / (calls * 5), 2)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+    print(
+        f"{'frames':<18}{'legacy ns':>12}{'led_ble ns':>12}{'speedup':>10}"
+        f"{'legacy cb':>11}{'led_ble cb':>12}"
+    )
+    for name, frames in CASES.items():
+        before, before_fired = _bench(LegacyLEDBLE, frames, args.number)
+        after, after_fired = _bench(LEDBLE, frames, args.number)
+        print(
+            f"{name:<18}{before:>12.1f}{after:>12.1f}{before / after:>9.1f}x"
+            f"{before_fired:>11}{after_fired:>12}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""Benchmark LEDBLE end to end against a fake GATT client.
+
+Every device talks to ``fake_gatt.FakeBluetooth``, which simulates the
+connect, write and notification latency of a real controller and can
+inject failures, so the numbers show the library's own overhead on top
+of a known radio. Measures:
+
+* ``commands_per_second``: sequential set_rgb calls on one connected device
+* ``group_fanout_seconds``: one set_rgb on a group of connected devices
+* ``cold_start_seconds``: update() on a new device, connect included
+* ``notifications_per_second``: status notifications through the handler
+
+Commands that fail after the library's own retries, or take longer than
+``DEVICE_TIMEOUT``, are counted as errors next to each result rather than
+aborting the run.
+
+Results are written as JSON; pass a previous run to ``--compare`` to
+report the change per benchmark and exit non-zero on a regression::
+
+    python benchmarks/bench_suite.py --output results.json
+    python benchmarks/bench_suite.py --compare results.json [--threshold 0.1]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Callable, Coroutine
+from dataclasses import asdict
+from typing import Any, cast
+
+from bleak.backends.device import BLEDevice
+from fake_gatt import STATUS_FRAME, FakeBluetooth, FakeGATTConfig
+
+from led_ble import LEDBLE, LEDBLEGroup, __version__
+
+# Seconds one device operation may take before it counts as an error.
+DEVICE_TIMEOUT = 30.0
+
+
+class FakeBLEDevice:
+    def __init__(self, address: str) -> None:
+        self.address = address
+        self.name = "LEDnet"
+        self.details = None
+
+
+def _device(index: int) -> BLEDevice:
+    return cast(
+        BLEDevice, FakeBLEDevice(f"AA:BB:CC:DD:{index // 256:02X}:{index % 256:02X}")
+    )
+
+
+async def _connected(count: int) -> tuple[list[LEDBLE], int]:
+    """Return count devices, connected and with their protocol resolved.
+
+    Also returns how many of them failed to connect.
+    """
+    devices = [LEDBLE(_device(index)) for index in range(count)]
+    results = await asyncio.gather(
+        *(asyncio.wait_for(device.update(), DEVICE_TIMEOUT) for device in devices),
+        return_exceptions=True,
+    )
+    return devices, sum(isinstance(result, Exception) for result in results)
+
+
+async def _stop(devices: list[LEDBLE]) -> None:
+    await asyncio.gather(
+        *(asyncio.wait_for(device.stop(), DEVICE_TIMEOUT) for device in devices),
+        return_exceptions=True,
+    )
+
+
+async def bench_commands(commands: int) -> tuple[float, int]:
+    """Return set_rgb calls per second on one connected device."""
+    (device,), errors = await _connected(1)
+    try:
+        started = time.perf_counter()
+        for index in range(commands):
+            try:
+                await asyncio.wait_for(
+                    device.set_rgb((index % 256, 0, 0), 255), DEVICE_TIMEOUT
+                )
+            except Exception:  # noqa: BLE001
+                errors += 1
+        return commands / (time.perf_counter() - started), errors
+    finally:
+        await _stop([device])
+
+
+async def bench_fanout(devices: int, rounds: int) -> tuple[float, int]:
+    """Return the mean seconds for one set_rgb on a group of devices."""
+    members, errors = await _connected(devices)
+    group = LEDBLEGroup(members)
+    try:
+        started = time.perf_counter()
+        for index in range(rounds):
+            try:
+                result = await asyncio.wait_for(
+                    group.set_rgb((index % 256, 0, 0), 255), DEVICE_TIMEOUT
+                )
+            except TimeoutError:
+                errors += len(members)
+            else:
+                errors += len(result.failed)
+        return (time.perf_counter() - started) / rounds, errors
+    finally:
+        await _stop(members)
+
+
+async def bench_cold_start(rounds: int) -> tuple[float, int]:
+    """Return the mean seconds for update() on a new device."""
+    total = 0.0
+    errors = 0
+    for index in range(rounds):
+        device = LEDBLE(_device(index))
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(device.update(), DEVICE_TIMEOUT)
+        except Exception:  # noqa: BLE001
+            errors += 1
+        total += time.perf_counter() - started
+        await _stop([device])
+    return total / rounds, errors
+
+
+async def bench_notifications(notifications: int) -> tuple[float, int]:
+    """Return status notifications handled per second, half of them changes."""
+    device = LEDBLE(_device(0))
+    device.register_callback(lambda _state: None)
+    other = bytearray(STATUS_FRAME)
+    other[6] ^= 1
+    frames = [bytearray(STATUS_FRAME), other]
+    handler = device._notification_handler
+    started = time.perf_counter()
+    for index in range(notifications):
+        handler(0, frames[index & 1])
+    return notifications / (time.perf_counter() - started), 0
+
+
+def _measure(
+    name: str,
+    unit: str,
+    higher_is_better: bool,
+    run: Callable[[], Coroutine[Any, Any, tuple[float, int]]],
+    repeat: int,
+) -> dict[str, Any]:
+    """Run a benchmark repeat times and keep the best sample."""
+    samples: list[float] = []
+    errors = 0
+    for _ in range(repeat):
+        value, failed = asyncio.run(run())
+        samples.append(value)
+        errors += failed
+    best = max(samples) if higher_is_better else min(samples)
+    print(f"{name:<26}{best:>14.4f} {unit:<6}{errors:>6} errors", file=sys.stderr)
+    return {
+        "value": best,
+        "median": statistics.median(samples),
+        "samples": samples,
+        "unit": unit,
+        "higher_is_better": higher_is_better,
+        "errors": errors,
+    }
+
+
+def run(args: argparse.Namespace, config: FakeGATTConfig) -> dict[str, Any]:
+    """Run every benchmark and return the results document."""
+    bluetooth = FakeBluetooth(config)
+    with bluetooth.patch():
+        results = {
+            "commands_per_second": _measure(
+                "commands_per_second",
+                "ops/s",
+                True,
+                lambda: bench_commands(args.commands),
+                args.repeat,
+            ),
+            "group_fanout_seconds": _measure(
+                "group_fanout_seconds",
+                "s",
+                False,
+                lambda: bench_fanout(args.devices, args.rounds),
+                args.repeat,
+            ),
+            "cold_start_seconds": _measure(
+                "cold_start_seconds",
+                "s",
+                False,
+                lambda: bench_cold_start(args.rounds),
+                args.repeat,
+            ),
+            "notifications_per_second": _measure(
+                "notifications_per_second",
+                "ops/s",
+                True,
+                lambda: bench_notifications(args.notifications),
+                args.repeat,
+            ),
+        }
+    return {
+        "led_ble_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": asdict(config),
+        "parameters": {
+            "commands": args.commands,
+            "devices": args.devices,
+            "rounds": args.rounds,
+            "notifications": args.notifications,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], threshold: float
+) -> list[str]:
+    """Print the change per benchmark and return the ones that regressed."""
+    regressions = []
+    for name, result in current["results"].items():
+        if (before := baseline["results"].get(name)) is None:
+            continue
+        change = result["value"] / before["value"] - 1
+        worse = -change if result["higher_is_better"] else change
+        flag = "  REGRESSION" if worse > threshold else ""
+        print(f"{name:<26}{change:>+10.1%}{flag}", file=sys.stderr)
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Write the results to this file")
+    parser.add_argument("--compare", help="Compare against a previous results file")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--notifications", type=int, default=100000)
+    parser.add_argument("--connect-latency", type=float, default=0.05)
+    parser.add_argument("--write-latency", type=float, default=0.005)
+    parser.add_argument("--notify-delay", type=float, default=0.01)
+    parser.add_argument("--connect-failure-rate", type=float, default=0.0)
+    parser.add_argument("--write-failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    config = FakeGATTConfig(
+        connect_latency=args.connect_latency,
+        write_latency=args.write_latency,
+        notify_delay=args.notify_delay,
+        connect_failure_rate=args.connect_failure_rate,
+        write_failure_rate=args.write_failure_rate,
+        seed=args.seed,
+    )
+    document = run(args, config)
+    text = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if compare(baseline, document, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""A fake GATT client with simulated latency for the benchmarks.
+
+``FakeBluetooth`` builds on ``led_ble.emulator`` and adds the timing of a
+radio: connects take ``connect_latency`` seconds, writes take
+``write_latency`` seconds, a state query is answered ``notify_delay``
+seconds later, and connects and writes fail at the configured rates.
+Any address connects, to an emulated controller of the default model::
+
+    bluetooth = FakeBluetooth(FakeGATTConfig(write_latency=0.005))
+    with bluetooth.patch():
+        await led.turn_on()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from bleak.backends.device import BLEDevice
+from bleak.exc import BleakError
+
+from led_ble.emulator import (
+    ControllerEmulator,
+    EmulatedController,
+    EmulatedGATTClient,
+)
+
+# A status frame as the emulated controllers first report it.
+STATUS_FRAME = EmulatedController("00:00:00:00:00:00").status_frame()
+
+
+@dataclass(frozen=True)
+class FakeGATTConfig:
+    connect_latency: float = 0.05  # Seconds to connect and load the services
+    write_latency: float = 0.005  # Seconds per GATT write
+    notify_delay: float = 0.01  # Seconds from a state query to its notification
+    connect_failure_rate: float = 0.0  # Fraction of connects that raise
+    write_failure_rate: float = 0.0  # Fraction of writes that raise
+    seed: int = 0  # Seed of the failure injection
+
+
+class FakeGATTClient(EmulatedGATTClient):
+    """An emulated client with the latency and failures of a radio."""
+
+    def __init__(
+        self,
+        bluetooth: FakeBluetooth,
+        controller: EmulatedController,
+        disconnected_callback: Callable[[Any], None] | None,
+    ) -> None:
+        super().__init__(controller, disconnected_callback)
+        self._bluetooth = bluetooth
+
+    async def write_gatt_char(self, _char: Any, data: bytes, response: bool) -> None:
+        config = self._bluetooth.config
+        if not self.is_connected:
+            raise BleakError("Not connected")
+        await asyncio.sleep(config.write_latency)
+        if self._bluetooth.fails(config.write_failure_rate):
+            raise BleakError("Injected write failure")
+        frame = self.controller.handle_write(bytes(data))
+        if frame is not None and self._notify_callback is not None:
+            asyncio.get_running_loop().call_later(
+                config.notify_delay, self._notify_callback, 0, bytearray(frame)
+            )
+
+
+class FakeBluetooth(ControllerEmulator):
+    """Hand out fake clients in place of ``establish_connection``."""
+
+    def __init__(self, config: FakeGATTConfig | None = None) -> None:
+        super().__init__()
+        self.config = config or FakeGATTConfig()
+        self._random = random.Random(self.config.seed)
+
+    def fails(self, rate: float) -> bool:
+        """Return if an operation failing at rate should fail now."""
+        return bool(rate) and self._random.random() < rate
+
+    async def establish_connection(
+        self,
+        _client_class: type,
+        device: BLEDevice,
+        _name: str,
+        disconnected_callback: Callable[[Any], None] | None = None,
+        **_kwargs: Any,
+    ) -> FakeGATTClient:
+        await asyncio.sleep(self.config.connect_latency)
+        if self.fails(self.config.connect_failure_rate):
+            raise BleakError("Injected connect failure")
+        if (controller := self.controllers.get(device.address)) is None:
+            self.add(device.address)
+            controller = self.controllers[device.address]
+        if controller.client is not None:
+            await controller.client.disconnect()
+        self.connects += 1
+        client = FakeGATTClient(self, controller, disconnected_callback)
+        controller.client = client
+        return client
@@ -5,13 +5,83 @@ __version__ = "1.1.12"
 
 from bleak_retry_connector import get_device
 
-from .exceptions import CharacteristicMissingError
+from .advertisement import (
+    decode_embedded_status_frame,
+    register_advertisement_decoder,
+)
+from .command_cache import command_cache_info
+from .device_cache import (
+    CachedDevice,
+    DeviceCache,
+    JsonDeviceCache,
+    MemoryDeviceCache,
+    characteristic_cache_info,
+)
+from .disconnect_policy import (
+    AdaptiveDisconnectPolicy,
+    DisconnectPolicy,
+    FixedDisconnectPolicy,
+)
+from .exceptions import (
+    CharacteristicMissingError,
+    CircuitOpenError,
+    ConfirmationError,
+)
+from .group import GroupResult, LEDBLEGroup
 from .led_ble import BLEAK_EXCEPTIONS, LEDBLE, LEDBLEState
+from .metrics import (
+    HistogramSnapshot,
+    MetricsSnapshot,
+    add_metrics_sink,
+    metrics_snapshot,
+)
+from .model_db import LEDBLEModel, MinVersionProtocol, load_models, register_model
+from .models import ConnectionStats, PollStats, StreamStats
+from .poller import FleetPoller
+from .retry import (
+    CircuitBreaker,
+    CircuitState,
+    ExponentialBackoffPolicy,
+    RetryPolicy,
+)
+from .scheduler import ConnectionScheduler
 
 __all__ = [
+    "AdaptiveDisconnectPolicy",
     "BLEAK_EXCEPTIONS",
+    "CachedDevice",
     "CharacteristicMissingError",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "CircuitState",
+    "ConfirmationError",
+    "ConnectionScheduler",
+    "ConnectionStats",
+    "DeviceCache",
+    "DisconnectPolicy",
+    "ExponentialBackoffPolicy",
+    "FixedDisconnectPolicy",
+    "FleetPoller",
+    "GroupResult",
+    "HistogramSnapshot",
+    "JsonDeviceCache",
     "LEDBLE",
+    "LEDBLEGroup",
+    "LEDBLEModel",
     "LEDBLEState",
+    "MemoryDeviceCache",
+    "MetricsSnapshot",
+    "MinVersionProtocol",
+    "PollStats",
+    "RetryPolicy",
+    "StreamStats",
+    "add_metrics_sink",
+    "characteristic_cache_info",
+    "command_cache_info",
+    "decode_embedded_status_frame",
     "get_device",
+    "load_models",
+    "metrics_snapshot",
+    "register_advertisement_decoder",
+    "register_model",
 ]
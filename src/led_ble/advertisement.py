@@ -0,0 +1,55 @@
+"""Read device state from advertisement manufacturer data."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+
+from .model_db import is_known_model
+from .models import LEDBLEState
+from .notification import (
+    POWER_OFF,
+    POWER_ON,
+    STATUS_FRAME_HEADER,
+    STATUS_FRAME_LENGTH,
+    status_frame_state,
+    unpack_status_fields,
+)
+
+AdvertisementDecoder = Callable[[bytes], "LEDBLEState | None"]
+
+_DECODERS: dict[int, AdvertisementDecoder] = {}
+
+
+def decode_embedded_status_frame(payload: bytes) -> LEDBLEState | None:
+    """Return the state of a status frame carried inside the payload.
+
+    No advertisement layout is documented, so this is not applied unless
+    registered for a manufacturer id with register_advertisement_decoder.
+    Only a frame for a known model with a valid power byte is accepted, so
+    stray 0x81 bytes elsewhere in the payload are not mistaken for one.
+    """
+    start = payload.find(STATUS_FRAME_HEADER)
+    while start != -1 and len(payload) - start >= STATUS_FRAME_LENGTH:
+        fields = unpack_status_fields(payload, start)
+        if fields[1] in (POWER_ON, POWER_OFF) and is_known_model(fields[0]):
+            return status_frame_state(fields)
+        start = payload.find(STATUS_FRAME_HEADER, start + 1)
+    return None
+
+
+def register_advertisement_decoder(
+    manufacturer_id: int, decoder: AdvertisementDecoder
+) -> None:
+    """Decode the payload of a manufacturer id with decoder.
+
+    Payloads of manufacturer ids without a decoder are ignored.
+    """
+    _DECODERS[manufacturer_id] = decoder
+
+
+def decode_advertisement(manufacturer_data: Mapping[int, bytes]) -> LEDBLEState | None:
+    """Return the state advertised in the manufacturer data, if any."""
+    for manufacturer_id, payload in manufacturer_data.items():
+        if (decoder := _DECODERS.get(manufacturer_id)) and (state := decoder(payload)):
+            return state
+    return None
@@ -0,0 +1,87 @@
+"""Brightness math for rgb levels.
+
+The properties and setters used to round trip every read through
+``colorsys``. Mathematically that round trip just rescales each channel by
+``target / max(r, g, b)``, so these functions compute it with integer
+division instead. The float round trip only disagrees with exact arithmetic
+when the exact result lands on a rounding boundary (a .5 tie for ``round``,
+a whole number for ``int``); anywhere else the float error is far smaller
+than the distance to the boundary. Those boundary cases fall back to the
+original ``colorsys`` computation so results stay identical.
+"""
+
+from __future__ import annotations
+
+import colorsys
+
+
+def _colorsys_unscaled(r: int, g: int, b: int) -> tuple[int, int, int]:
+    hsv = colorsys.rgb_to_hsv(r / 255.0, g / 255.0, b / 255.0)
+    r_p, g_p, b_p = colorsys.hsv_to_rgb(hsv[0], hsv[1], 1)
+    return round(r_p * 255), round(g_p * 255), round(b_p * 255)
+
+
+def _colorsys_scale(rgb: tuple[int, int, int], level: int) -> tuple[int, int, int]:
+    hsv = colorsys.rgb_to_hsv(*rgb)
+    r, g, b = colorsys.hsv_to_rgb(hsv[0], hsv[1], level)
+    return int(r), int(g), int(b)
+
+
+def rgb_brightness(r: int, g: int, b: int) -> int:
+    """Return the 0-255 value channel of an rgb color."""
+    # int(max / 255 * 255) == max for every 0-255 channel value.
+    return max(r, g, b)
+
+
+# Row ``maxc`` holds the unscaled value of every channel for colors whose
+# maximum channel is ``maxc``, or -1 where the exact result is a .5 tie.
+# Rows are built the first time a maximum is seen.
+_UNSCALE_ROWS: list[tuple[int, ...] | None] = [None] * 256
+
+
+def _unscale_row(maxc: int) -> tuple[int, ...]:
+    row = []
+    for channel in range(256):
+        quotient, remainder = divmod(channel * 255 * 2, maxc * 2)
+        if remainder == maxc:
+            row.append(-1)
+        else:
+            row.append(quotient + (remainder > maxc))
+    _UNSCALE_ROWS[maxc] = result = tuple(row)
+    return result
+
+
+def rgb_unscaled(r: int, g: int, b: int) -> tuple[int, int, int]:
+    """Return the rgb color scaled up to full value."""
+    maxc = max(r, g, b)
+    if maxc == min(r, g, b):
+        return 255, 255, 255
+    row = _UNSCALE_ROWS[maxc] or _unscale_row(maxc)
+    r_u = row[r]
+    g_u = row[g]
+    b_u = row[b]
+    if r_u < 0 or g_u < 0 or b_u < 0:
+        return _colorsys_unscaled(r, g, b)
+    return r_u, g_u, b_u
+
+
+def scale_rgb(rgb: tuple[int, int, int], level: int) -> tuple[int, int, int]:
+    """Return the rgb color with its value channel set to ``level``."""
+    r, g, b = rgb
+    maxc = max(r, g, b)
+    if maxc == min(r, g, b) or type(level) is not int:
+        return _colorsys_scale(rgb, level)
+    r_s = level * r
+    g_s = level * g
+    b_s = level * b
+    # A whole-number result may truncate either way in floating point,
+    # except for a zero channel (always 0) and a unique maximum channel
+    # (always exactly ``level``).
+    if not (r_s % maxc and g_s % maxc and b_s % maxc):
+        max_count = (r == maxc) + (g == maxc) + (b == maxc)
+        for channel, scaled in ((r, r_s), (g, g_s), (b, b_s)):
+            if scaled % maxc or channel == 0:
+                continue
+            if channel != maxc or max_count > 1:
+                return _colorsys_scale(rgb, level)
+    return r_s // maxc, g_s // maxc, b_s // maxc
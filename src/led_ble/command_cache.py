@@ -0,0 +1,170 @@
+"""Caches of encoded protocol commands shared across devices."""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from flux_led.base_device import PROTOCOL_TYPES
+    from flux_led.const import LevelWriteMode
+
+# Distinct frames kept per protocol class for each command kind.
+DEFAULT_COMMAND_CACHE_SIZE = 512
+
+
+class CommandCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class CommandCache:
+    """Bounded LRU cache of the commands one protocol class encodes.
+
+    Encoded commands are stored as immutable ``bytes`` so a cached frame can
+    be handed to any number of devices speaking the same protocol. Only
+    protocols that encode the same command to the same bytes every time
+    may be cached; see ``get_command_cache``.
+    """
+
+    def __init__(
+        self, protocol: PROTOCOL_TYPES, maxsize: int = DEFAULT_COMMAND_CACHE_SIZE
+    ) -> None:
+        """Init the cache for the protocol."""
+        self._protocol = protocol
+        self._maxsize = maxsize
+        self._levels_change = lru_cache(maxsize=maxsize)(self._encode_levels_change)
+        self._preset_pattern = lru_cache(maxsize=maxsize)(self._encode_preset_pattern)
+        self._state_change = lru_cache(maxsize=2)(self._encode_state_change)
+
+    def _encode_levels_change(
+        self,
+        persist: bool,
+        red: int | None,
+        green: int | None,
+        blue: int | None,
+        warm_white: int | None,
+        cool_white: int | None,
+        write_mode: LevelWriteMode,
+    ) -> tuple[bytes, ...]:
+        return tuple(
+            bytes(command)
+            for command in self._protocol.construct_levels_change(
+                persist, red, green, blue, warm_white, cool_white, write_mode
+            )
+        )
+
+    def _encode_preset_pattern(
+        self, pattern: int, speed: int, brightness: int
+    ) -> bytes:
+        return bytes(
+            self._protocol.construct_preset_pattern(pattern, speed, brightness)
+        )
+
+    def _encode_state_change(self, turn_on: bool) -> bytes:
+        return bytes(self._protocol.construct_state_change(turn_on))
+
+    def construct_levels_change(
+        self,
+        persist: bool,
+        red: int | None,
+        green: int | None,
+        blue: int | None,
+        warm_white: int | None,
+        cool_white: int | None,
+        write_mode: LevelWriteMode,
+    ) -> list[bytes]:
+        """Return the commands for a levels change."""
+        return list(
+            self._levels_change(
+                persist, red, green, blue, warm_white, cool_white, write_mode
+            )
+        )
+
+    def construct_preset_pattern(
+        self, pattern: int, speed: int, brightness: int
+    ) -> bytes:
+        """Return the command for a preset pattern."""
+        return self._preset_pattern(pattern, speed, brightness)
+
+    def construct_state_change(self, turn_on: bool) -> bytes:
+        """Return the command for a power change."""
+        return self._state_change(turn_on)
+
+    def cache_info(self) -> CommandCacheInfo:
+        """Return hit/miss statistics across all command kinds."""
+        infos = [
+            self._levels_change.cache_info(),
+            self._preset_pattern.cache_info(),
+            self._state_change.cache_info(),
+        ]
+        return CommandCacheInfo(
+            sum(info.hits for info in infos),
+            sum(info.misses for info in infos),
+            sum(info.maxsize or 0 for info in infos),
+            sum(info.currsize for info in infos),
+        )
+
+    def cache_clear(self) -> None:
+        """Drop every cached command and reset the statistics."""
+        self._levels_change.cache_clear()
+        self._preset_pattern.cache_clear()
+        self._state_change.cache_clear()
+
+
+# The shared cache of each protocol class, or None when it cannot be cached.
+_COMMAND_CACHES: dict[type, CommandCache | None] = {}
+
+
+def _encodes_statelessly(protocol_cls: type[PROTOCOL_TYPES]) -> bool:
+    """Return whether a protocol encodes repeated commands to the same bytes.
+
+    Wrapped protocols number every message with a counter kept on the
+    protocol instance; replaying a cached frame would resend a stale one.
+    """
+    from flux_led.const import LevelWriteMode
+
+    protocol = protocol_cls()
+
+    def _encode() -> list[bytes]:
+        return [
+            bytes(protocol.construct_state_change(True)),
+            bytes(protocol.construct_preset_pattern(0x25, 50, 100)),
+            *(
+                bytes(command)
+                for command in protocol.construct_levels_change(
+                    False, 1, 2, 3, 4, 5, LevelWriteMode.ALL
+                )
+            ),
+        ]
+
+    return _encode() == _encode()
+
+
+def get_command_cache(protocol_cls: type[PROTOCOL_TYPES]) -> CommandCache | None:
+    """Return the shared command cache for a protocol class.
+
+    Returns None for protocols whose commands depend on the state of the
+    protocol instance; those are encoded by each device's own instance.
+    """
+    if protocol_cls not in _COMMAND_CACHES:
+        _COMMAND_CACHES[protocol_cls] = (
+            CommandCache(protocol_cls()) if _encodes_statelessly(protocol_cls) else None
+        )
+    return _COMMAND_CACHES[protocol_cls]
+
+
+def command_cache_info() -> dict[str, CommandCacheInfo]:
+    """Return cache statistics keyed by protocol name."""
+    return {
+        cache._protocol.name: cache.cache_info()
+        for cache in _COMMAND_CACHES.values()
+        if cache is not None
+    }
+
+
+def clear_command_caches() -> None:
+    """Drop every shared command cache."""
+    _COMMAND_CACHES.clear()
@@ -0,0 +1,160 @@
+"""Remember what was learned about devices across restarts."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import NamedTuple, Protocol
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds changes are collected before the JSON cache file is saved.
+SAVE_DELAY = 1.0
+
+
+@dataclass(frozen=True)
+class CachedDevice:
+    model_num: int  # The model number aka byte 1 of the state notification
+    version_num: int  # The firmware version aka byte 10
+    protocol: str  # The flux_led protocol name resolved for the model/version
+    read_uuid: str | None = None  # The notify characteristic that was found
+    write_uuid: str | None = None  # The write characteristic that was found
+    refresh_services: bool = False  # Cached services lacked the characteristics
+
+
+class CharacteristicCacheInfo(NamedTuple):
+    hits: int  # Connections that found the remembered characteristic pair
+    misses: int  # Connections that had to scan the possible characteristics
+    refreshes: int  # Connections that had to re-discover services to find them
+
+
+_characteristic_stats = [0, 0, 0]
+
+
+def record_characteristic_lookup(hit: bool) -> None:
+    """Count a characteristic lookup as a hit or a miss."""
+    _characteristic_stats[0 if hit else 1] += 1
+
+
+def record_services_refresh() -> None:
+    """Count a connection that had to re-discover services."""
+    _characteristic_stats[2] += 1
+
+
+def characteristic_cache_info() -> CharacteristicCacheInfo:
+    """Return how often remembered characteristics were used."""
+    return CharacteristicCacheInfo(*_characteristic_stats)
+
+
+def clear_characteristic_cache_info() -> None:
+    """Reset the characteristic lookup statistics."""
+    _characteristic_stats[:] = [0, 0, 0]
+
+
+class DeviceCache(Protocol):
+    """Storage for ``CachedDevice`` entries keyed by address.
+
+    A device with an entry sends commands with the remembered protocol
+    without waiting for the state query handshake, and tries the remembered
+    characteristics first when it connects.
+    """
+
+    def get(self, address: str) -> CachedDevice | None:
+        """Return the entry for the address, if any."""
+
+    def set(self, address: str, device: CachedDevice) -> None:
+        """Store the entry for the address."""
+
+
+class MemoryDeviceCache:
+    """A ``DeviceCache`` that lives as long as the process."""
+
+    def __init__(self) -> None:
+        """Init the cache."""
+        self._devices: dict[str, CachedDevice] = {}
+
+    def get(self, address: str) -> CachedDevice | None:
+        """Return the entry for the address, if any."""
+        return self._devices.get(address.upper())
+
+    def set(self, address: str, device: CachedDevice) -> None:
+        """Store the entry for the address."""
+        self._devices[address.upper()] = device
+
+
+class JsonDeviceCache(MemoryDeviceCache):
+    """A ``DeviceCache`` persisted to a JSON file.
+
+    The file is read once when the cache is created and rewritten only when
+    an entry changes, which happens once per device in the normal case.
+    Changes made on an event loop are collected for ``save_delay`` seconds
+    and written in the loop's executor; call ``async_save`` to write them
+    out before shutting down.
+    """
+
+    def __init__(
+        self, path: str | os.PathLike[str], save_delay: float = SAVE_DELAY
+    ) -> None:
+        """Init the cache, loading the file if it exists."""
+        super().__init__()
+        self._path = Path(path)
+        self._save_delay = save_delay
+        self._save_timer: asyncio.TimerHandle | None = None
+        self._saving: asyncio.Future[None] | None = None
+        try:
+            data = json.loads(self._path.read_text())
+            for address, entry in data.items():
+                self._devices[address.upper()] = CachedDevice(**entry)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError, AttributeError) as ex:
+            _LOGGER.warning("Ignoring unreadable device cache %s: %s", self._path, ex)
+
+    def set(self, address: str, device: CachedDevice) -> None:
+        """Store the entry for the address and save the file if it changed."""
+        if self.get(address) == device:
+            return
+        super().set(address, device)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(self._dump())
+            return
+        if self._save_timer is None:
+            self._save_timer = loop.call_later(self._save_delay, self._save, loop)
+
+    async def async_save(self) -> None:
+        """Write out the changes that are waiting to be saved."""
+        if self._saving is not None:
+            await self._saving
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save(asyncio.get_running_loop())
+            assert self._saving is not None  # nosec
+            await self._saving
+
+    def _save(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Write the file in the executor, after any write still running."""
+        if self._saving is not None and not self._saving.done():
+            self._save_timer = loop.call_later(self._save_delay, self._save, loop)
+            return
+        self._save_timer = None
+        self._saving = loop.run_in_executor(None, self._write, self._dump())
+
+    def _dump(self) -> str:
+        """Return the entries as JSON."""
+        data = {address: asdict(entry) for address, entry in self._devices.items()}
+        return json.dumps(data, indent=2, sort_keys=True)
+
+    def _write(self, text: str) -> None:
+        """Replace the file with text."""
+        tmp_path = self._path.with_name(f"{self._path.name}.tmp")
+        try:
+            tmp_path.write_text(text)
+            os.replace(tmp_path, self._path)
+        except OSError as ex:
+            _LOGGER.warning("Failed to save device cache %s: %s", self._path, ex)
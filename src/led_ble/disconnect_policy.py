@@ -0,0 +1,107 @@
+"""Decide how long an idle connection is kept open."""
+
+from __future__ import annotations
+
+from typing import Protocol
+
+# Seconds an idle connection is kept open when nothing better is known.
+DISCONNECT_DELAY = 120
+
+# The adaptive policy never lets go sooner than this after a command.
+DEFAULT_MIN_IDLE = 10.0
+# An idle connection is kept for this many typical gaps between commands.
+DEFAULT_IDLE_MULTIPLIER = 3.0
+# Weight of the newest gap in the running estimate.
+DEFAULT_SMOOTHING = 0.3
+# Commands closer together than this are one burst (a transition, a
+# slider drag) and do not count as a gap.
+BURST_GAP = 1.0
+
+
+class DisconnectPolicy(Protocol):
+    """Chooses the idle timeout of one device's connection."""
+
+    def record_use(self, now: float) -> None:
+        """Record that a command used the connection at ``now``."""
+
+    def idle_timeout(self) -> float:
+        """Return the seconds to keep the connection open after the last use."""
+
+
+class FixedDisconnectPolicy:
+    """Always keep an idle connection open for the same time."""
+
+    def __init__(self, delay: float = DISCONNECT_DELAY) -> None:
+        """Init the policy."""
+        self._delay = delay
+
+    def record_use(self, now: float) -> None:
+        """Record that a command used the connection at ``now``."""
+
+    def idle_timeout(self) -> float:
+        """Return the seconds to keep the connection open after the last use."""
+        return self._delay
+
+
+class AdaptiveDisconnectPolicy:
+    """Keep a connection open about as long as the device is likely to need it.
+
+    The gap between bursts of commands is tracked as an exponentially
+    weighted average. A device commanded every few seconds stays connected
+    for a few of those gaps; a device whose commands arrive further apart
+    than ``max_idle`` would be disconnected before the next one anyway, so
+    it lets go after ``min_idle``. Until a gap has been seen ``max_idle``
+    is used.
+    """
+
+    __slots__ = (
+        "_gap",
+        "_last_use",
+        "_max_idle",
+        "_min_idle",
+        "_multiplier",
+        "_smoothing",
+    )
+
+    def __init__(
+        self,
+        min_idle: float = DEFAULT_MIN_IDLE,
+        max_idle: float = DISCONNECT_DELAY,
+        multiplier: float = DEFAULT_IDLE_MULTIPLIER,
+        smoothing: float = DEFAULT_SMOOTHING,
+    ) -> None:
+        """Init the policy."""
+        if not 0 < min_idle <= max_idle:
+            raise ValueError("min_idle must be positive and at most max_idle")
+        if not 0 < smoothing <= 1:
+            raise ValueError("smoothing must be in (0, 1]")
+        self._min_idle = min_idle
+        self._max_idle = max_idle
+        self._multiplier = multiplier
+        self._smoothing = smoothing
+        self._last_use: float | None = None
+        self._gap: float | None = None
+
+    @property
+    def gap(self) -> float | None:
+        """Return the estimated seconds between bursts of commands."""
+        return self._gap
+
+    def record_use(self, now: float) -> None:
+        """Record that a command used the connection at ``now``."""
+        last_use = self._last_use
+        self._last_use = now
+        if last_use is None or (gap := now - last_use) < BURST_GAP:
+            return
+        if self._gap is None:
+            self._gap = gap
+        else:
+            self._gap += self._smoothing * (gap - self._gap)
+
+    def idle_timeout(self) -> float:
+        """Return the seconds to keep the connection open after the last use."""
+        if self._gap is None:
+            return self._max_idle
+        if self._gap > self._max_idle:
+            return self._min_idle
+        return min(self._max_idle, max(self._min_idle, self._gap * self._multiplier))
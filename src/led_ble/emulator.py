@@ -0,0 +1,288 @@
+"""Emulate LEDnet/Triones controllers in process for load testing.
+
+``ControllerEmulator.establish_connection`` stands in for
+``bleak_retry_connector.establish_connection`` and connects to emulated
+controllers instead of radios, so everything from
+``_resolve_characteristics`` on runs unmodified::
+
+    emulator = ControllerEmulator()
+    devices = emulator.add_fleet(1000)
+    with emulator.patch():
+        leds = [LEDBLE(device) for device in devices]
+        await asyncio.gather(*(led.update() for led in leds))
+
+Each controller decodes the commands written to it, applies power, levels
+and preset pattern changes to its own state and answers state queries
+with a status notification, as the devices speaking the original LEDENET
+protocol do.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+from unittest.mock import patch
+
+from bleak.backends.device import BLEDevice
+from bleak.exc import BleakError
+
+from .const import (
+    POSSIBLE_READ_CHARACTERISTIC_UUIDS,
+    POSSIBLE_WRITE_CHARACTERISTIC_UUIDS,
+    STATE_COMMAND,
+)
+from .model_db import DEFAULT_MODEL, MODEL_MAP, MODELS
+from .models import LEDBLEState
+from .notification import POWER_OFF, POWER_ON, STATUS_FRAME_HEADER
+
+# Command headers of the original LEDENET protocol.
+POWER_COMMAND_HEADER = 0xCC
+LEVELS_COMMAND_HEADER = 0x56
+PRESET_COMMAND_HEADER = 0xBB
+DREAM_PRESET_COMMAND_HEADER = 0x9E
+# The preset pattern a controller reports while showing a static color.
+STATIC_PATTERN = 0x61
+# The preset pattern a dream controller reports while showing a static color.
+DREAM_STATIC_PATTERN = 0x01
+# The model number of the dream controllers.
+DREAM_MODEL = 0x10
+# The write modes of a levels command, as flux_led's LevelWriteMode.
+WRITE_MODE_COLORS = 0xF0
+WRITE_MODE_WHITES = 0x0F
+
+DEFAULT_VERSION = 1
+
+
+class EmulatedController:
+    """The state of one emulated controller and the commands it accepts."""
+
+    def __init__(
+        self,
+        address: str,
+        model_num: int = DEFAULT_MODEL,
+        version_num: int = DEFAULT_VERSION,
+        name: str | None = None,
+    ) -> None:
+        """Init the controller, powered on and showing white."""
+        if model_num not in MODEL_MAP:
+            raise ValueError(f"Unknown model: 0x{model_num:02X}")
+        self.address = address
+        self.name = name or MODEL_MAP[model_num].models[0].split(":")[0]
+        self.model_num = model_num
+        self.version_num = version_num
+        self.power = True
+        self.preset_pattern = DREAM_STATIC_PATTERN if self.dream else STATIC_PATTERN
+        self.mode = 0x61
+        self.speed = 0x10
+        self.rgb = (255, 255, 255)
+        self.w = 0
+        self.commands = 0  # Commands received, including state queries
+        self.client: EmulatedGATTClient | None = None
+
+    @property
+    def dream(self) -> bool:
+        """Return if the controller is a dream controller."""
+        return self.model_num == DREAM_MODEL
+
+    @property
+    def state(self) -> LEDBLEState:
+        """Return the state as LEDBLE decodes it from a status frame."""
+        return LEDBLEState(
+            self.power,
+            self.rgb,
+            self.w,
+            self.model_num,
+            self.preset_pattern,
+            self.mode,
+            self.speed,
+            self.version_num,
+        )
+
+    def status_frame(self) -> bytes:
+        """Return the 11 byte status frame answering a state query."""
+        return bytes(
+            [
+                STATUS_FRAME_HEADER,
+                self.model_num,
+                POWER_ON if self.power else POWER_OFF,
+                self.preset_pattern,
+                self.mode,
+                self.speed,
+                *self.rgb,
+                self.w,
+                self.version_num,
+            ]
+        )
+
+    def handle_write(self, data: bytes) -> bytes | None:
+        """Apply a command and return the notification it triggers, if any.
+
+        Commands the controller does not understand are ignored, as the
+        devices do.
+        """
+        self.commands += 1
+        if data == STATE_COMMAND:
+            return self.status_frame()
+        header = data[0] if data else None
+        if header == POWER_COMMAND_HEADER and len(data) == 3:
+            self.power = data[1] == POWER_ON
+        elif header == LEVELS_COMMAND_HEADER and len(data) == 7:
+            self._apply_levels(data[1], data[2], data[3], data[4], data[5])
+        elif header == PRESET_COMMAND_HEADER and len(data) == 4:
+            self.preset_pattern = data[1]
+            self.speed = data[2]
+        elif header == DREAM_PRESET_COMMAND_HEADER and len(data) == 7:
+            self.preset_pattern = 0
+            self.mode = data[2]
+            self.speed = data[3]
+        return None
+
+    def _apply_levels(self, r: int, g: int, b: int, w: int, write_mode: int) -> None:
+        if write_mode == WRITE_MODE_COLORS:
+            self.rgb = (r, g, b)
+            self.w = 0
+        elif write_mode == WRITE_MODE_WHITES:
+            self.rgb = (0, 0, 0)
+            self.w = w
+        else:
+            self.rgb = (r, g, b)
+            self.w = w
+        self.preset_pattern = DREAM_STATIC_PATTERN if self.dream else STATIC_PATTERN
+
+
+class EmulatedCharacteristic:
+    """Stand-in for ``BleakGATTCharacteristic``."""
+
+    def __init__(self, uuid: str) -> None:
+        """Init the characteristic."""
+        self.uuid = uuid
+
+
+class EmulatedServices:
+    """Stand-in for the ``BleakGATTServiceCollection`` of a controller."""
+
+    def __init__(self, read_uuid: str, write_uuid: str) -> None:
+        """Init the services."""
+        self._chars = {
+            read_uuid: EmulatedCharacteristic(read_uuid),
+            write_uuid: EmulatedCharacteristic(write_uuid),
+        }
+
+    def get_characteristic(self, uuid: str) -> EmulatedCharacteristic | None:
+        """Return the characteristic with the uuid."""
+        return self._chars.get(uuid)
+
+
+class EmulatedGATTClient:
+    """Stand-in for a ``BleakClientWithServiceCache`` connected to a controller.
+
+    Notifications are delivered from the event loop after the write that
+    triggered them returns, as they arrive from the radio.
+    """
+
+    def __init__(
+        self,
+        controller: EmulatedController,
+        disconnected_callback: Callable[[Any], None] | None = None,
+        read_uuid: str = POSSIBLE_READ_CHARACTERISTIC_UUIDS[0],
+        write_uuid: str = POSSIBLE_WRITE_CHARACTERISTIC_UUIDS[0],
+    ) -> None:
+        """Init the client."""
+        self.controller = controller
+        self.services = EmulatedServices(read_uuid, write_uuid)
+        self.is_connected = True
+        self._disconnected_callback = disconnected_callback
+        self._notify_callback: Callable[[int, bytearray], None] | None = None
+
+    async def start_notify(
+        self, _char: Any, callback: Callable[[int, bytearray], None]
+    ) -> None:
+        """Subscribe to the notifications of the controller."""
+        self._notify_callback = callback
+
+    async def stop_notify(self, _char: Any) -> None:
+        """Unsubscribe from the notifications of the controller."""
+        self._notify_callback = None
+
+    async def write_gatt_char(self, _char: Any, data: bytes, response: bool) -> None:
+        """Write a command to the controller."""
+        if not self.is_connected:
+            raise BleakError(f"{self.controller.address}: Not connected")
+        frame = self.controller.handle_write(bytes(data))
+        if frame is not None and self._notify_callback is not None:
+            asyncio.get_running_loop().call_soon(
+                self._notify_callback, 0, bytearray(frame)
+            )
+
+    async def clear_cache(self) -> bool:
+        """Clear the services cache."""
+        return True
+
+    async def disconnect(self) -> bool:
+        """Disconnect from the controller."""
+        if self.is_connected:
+            self.is_connected = False
+            self._notify_callback = None
+            if self.controller.client is self:
+                self.controller.client = None
+            if self._disconnected_callback is not None:
+                self._disconnected_callback(self)
+        return True
+
+
+class ControllerEmulator:
+    """Connect to emulated controllers in place of ``establish_connection``."""
+
+    def __init__(self) -> None:
+        """Init the emulator."""
+        self.controllers: dict[str, EmulatedController] = {}
+        self.connects = 0
+
+    def add(
+        self,
+        address: str,
+        model_num: int = DEFAULT_MODEL,
+        version_num: int = DEFAULT_VERSION,
+        name: str | None = None,
+    ) -> BLEDevice:
+        """Add a controller and return the device to pass to LEDBLE."""
+        controller = EmulatedController(address, model_num, version_num, name)
+        self.controllers[address] = controller
+        return BLEDevice(address, controller.name, None)
+
+    def add_fleet(self, count: int) -> list[BLEDevice]:
+        """Add count controllers, cycling through the known models."""
+        return [
+            self.add(
+                f"EE:00:00:{index >> 16 & 0xFF:02X}:{index >> 8 & 0xFF:02X}:"
+                f"{index & 0xFF:02X}",
+                MODELS[index % len(MODELS)].model_num,
+            )
+            for index in range(count)
+        ]
+
+    async def establish_connection(
+        self,
+        _client_class: type,
+        device: BLEDevice,
+        _name: str,
+        disconnected_callback: Callable[[Any], None] | None = None,
+        **_kwargs: Any,
+    ) -> EmulatedGATTClient:
+        """Connect to the controller with the address of the device."""
+        if (controller := self.controllers.get(device.address)) is None:
+            raise BleakError(f"{device.address}: No emulated controller")
+        if controller.client is not None:
+            await controller.client.disconnect()
+        self.connects += 1
+        client = EmulatedGATTClient(controller, disconnected_callback)
+        controller.client = client
+        return client
+
+    @contextmanager
+    def patch(self) -> Iterator[ControllerEmulator]:
+        """Route LEDBLE connections to the emulated controllers."""
+        with patch("led_ble.led_ble.establish_connection", self.establish_connection):
+            yield self
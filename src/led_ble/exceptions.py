@@ -1,2 +1,13 @@
+from bleak.exc import BleakError
+
+
 class CharacteristicMissingError(Exception):
     """Raised when a characteristic is missing."""
+
+
+class ConfirmationError(Exception):
+    """Raised when a device does not report the state a confirmed write set."""
+
+
+class CircuitOpenError(BleakError):
+    """Raised when a device failed too often to be tried again yet."""
@@ -0,0 +1,159 @@
+"""Control many LEDBLE devices as one light."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable, Coroutine, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from .led_ble import LEDBLE
+
+_LOGGER = logging.getLogger(__name__)
+
+# Devices commanded at once; each one holds a connection attempt or write
+# in flight, so this also bounds load on the Bluetooth adapter(s).
+DEFAULT_GROUP_CONCURRENCY = 10
+
+
+@dataclass(frozen=True)
+class GroupResult:
+    errors: dict[str, Exception | None]  # The error per device address, if any
+
+    @property
+    def succeeded(self) -> list[str]:
+        """Return the addresses of the devices that applied the command."""
+        return [address for address, error in self.errors.items() if error is None]
+
+    @property
+    def failed(self) -> dict[str, Exception]:
+        """Return the errors of the devices that did not apply the command."""
+        return {
+            address: error
+            for address, error in self.errors.items()
+            if error is not None
+        }
+
+    @property
+    def ok(self) -> bool:
+        """Return if every device applied the command."""
+        return not self.failed
+
+
+class LEDBLEGroup:
+    """Fan commands out to many devices concurrently.
+
+    Each call runs the same ``LEDBLE`` method on every device with at most
+    ``max_concurrency`` in flight and returns a ``GroupResult``; one device
+    failing does not stop the others. Devices speaking the same protocol
+    share the encoded command through the protocol's command cache.
+    """
+
+    def __init__(
+        self,
+        devices: Iterable[LEDBLE],
+        max_concurrency: int = DEFAULT_GROUP_CONCURRENCY,
+    ) -> None:
+        """Init the group."""
+        if max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency must be at least 1, got {max_concurrency}"
+            )
+        self._devices = list(devices)
+        self._max_concurrency = max_concurrency
+
+    @property
+    def devices(self) -> list[LEDBLE]:
+        """Return the devices in the group."""
+        return self._devices
+
+    async def _run(
+        self, name: str, call: Callable[[LEDBLE], Coroutine[Any, Any, None]]
+    ) -> GroupResult:
+        """Run call on every device, collecting per-device errors."""
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def _run_one(device: LEDBLE) -> Exception | None:
+            async with semaphore:
+                try:
+                    await call(device)
+                except Exception as ex:
+                    _LOGGER.debug(
+                        "%s: Group %s failed: %s", device.name, name, ex, exc_info=True
+                    )
+                    return ex
+            return None
+
+        errors = await asyncio.gather(*(_run_one(device) for device in self._devices))
+        result = GroupResult(
+            {device.address: error for device, error in zip(self._devices, errors)}
+        )
+        if not result.ok:
+            _LOGGER.debug(
+                "Group %s failed on %s of %s devices",
+                name,
+                len(result.failed),
+                len(self._devices),
+            )
+        return result
+
+    async def update(self) -> GroupResult:
+        """Update every device."""
+        return await self._run("update", lambda device: device.update())
+
+    async def turn_on(self) -> GroupResult:
+        """Turn on every device."""
+        return await self._run("turn_on", lambda device: device.turn_on())
+
+    async def turn_off(self) -> GroupResult:
+        """Turn off every device."""
+        return await self._run("turn_off", lambda device: device.turn_off())
+
+    async def set_brightness(self, brightness: int) -> GroupResult:
+        """Set the brightness of every device."""
+        return await self._run(
+            "set_brightness", lambda device: device.set_brightness(brightness)
+        )
+
+    async def set_rgb(
+        self, rgb: tuple[int, int, int], brightness: int | None = None
+    ) -> GroupResult:
+        """Set rgb on every device."""
+        return await self._run(
+            "set_rgb", lambda device: device.set_rgb(rgb, brightness)
+        )
+
+    async def set_rgbw(
+        self, rgbw: tuple[int, int, int, int], brightness: int | None = None
+    ) -> GroupResult:
+        """Set rgbw on every device."""
+        return await self._run(
+            "set_rgbw", lambda device: device.set_rgbw(rgbw, brightness)
+        )
+
+    async def set_white(self, brightness: int) -> GroupResult:
+        """Set white on every device."""
+        return await self._run("set_white", lambda device: device.set_white(brightness))
+
+    async def async_set_preset_pattern(
+        self, effect: int, speed: int, brightness: int = 100
+    ) -> GroupResult:
+        """Set a preset pattern on every device."""
+        return await self._run(
+            "async_set_preset_pattern",
+            lambda device: device.async_set_preset_pattern(effect, speed, brightness),
+        )
+
+    async def async_set_effect(
+        self, effect: str, speed: int, brightness: int = 100
+    ) -> GroupResult:
+        """Set an effect on every device."""
+        return await self._run(
+            "async_set_effect",
+            lambda device: device.async_set_effect(effect, speed, brightness),
+        )
+
+    async def stop(self) -> GroupResult:
+        """Stop every device."""
+        return await self._run("stop", lambda device: device.stop())
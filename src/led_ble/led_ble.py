@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import asyncio
-import colorsys
 import logging
-from collections.abc import Callable, Coroutine
-from dataclasses import replace
-from typing import Any, TypeVar
+from bisect import bisect_right
+from collections.abc import AsyncIterator, Callable, Coroutine, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from functools import cache
+from typing import TYPE_CHECKING, Any, TypeVar
 
 from bleak.backends.device import BLEDevice
 from bleak.backends.scanner import AdvertisementData
@@ -17,69 +19,371 @@ from bleak_retry_connector import (
     BleakError,
     BleakNotFoundError,
     establish_connection,
-    retry_bluetooth_connection_error,
 )
-from flux_led.base_device import PROTOCOL_NAME_TO_CLS, PROTOCOL_TYPES
-from flux_led.const import LevelWriteMode
-from flux_led.pattern import EFFECT_ID_NAME, EFFECT_LIST, PresetPattern
-from flux_led.utils import rgbw_brightness
 
 from led_ble.model_db import LEDBLEModel
 
+from .advertisement import decode_advertisement
+from .color import rgb_brightness, rgb_unscaled, scale_rgb
+from .command_cache import CommandCache, get_command_cache
 from .const import (
     POSSIBLE_READ_CHARACTERISTIC_UUIDS,
     POSSIBLE_WRITE_CHARACTERISTIC_UUIDS,
     STATE_COMMAND,
 )
-from .exceptions import CharacteristicMissingError
-from .model_db import get_model
-from .models import LEDBLEState
+from .device_cache import (
+    CachedDevice,
+    DeviceCache,
+    record_characteristic_lookup,
+    record_services_refresh,
+)
+from .disconnect_policy import (
+    DISCONNECT_DELAY,
+    AdaptiveDisconnectPolicy,
+    DisconnectPolicy,
+)
+from .exceptions import (
+    CharacteristicMissingError,
+    CircuitOpenError,
+    ConfirmationError,
+)
+from .metrics import (
+    COMMAND_RETRIES,
+    COMMANDS,
+    CONFIRM_FAILURES,
+    CONFIRM_LATENCY,
+    CONNECT_ATTEMPTS,
+    CONNECT_TIME,
+    GLOBAL_METRICS,
+    LOCK_WAIT,
+    PROTOCOL_RESOLVE_TIME,
+    UPDATE_ROUND_TRIP,
+    WRITE_LATENCY,
+    Metrics,
+    MetricsSnapshot,
+)
+from .model_db import get_model, get_model_for_name, protocol_cls
+from .models import ConnectionStats, LEDBLEState, StreamStats
+from .notification import (
+    POWER_FRAME_HEADER,
+    POWER_FRAME_LENGTH,
+    POWER_ON,
+    STATUS_FRAME_LENGTH,
+    status_frame_state,
+    unpack_status_fields,
+)
+from .retry import (
+    CircuitBreaker,
+    ExponentialBackoffPolicy,
+    RetryPolicy,
+)
+from .scheduler import PRIORITY_COMMAND, PRIORITY_IDLE, ConnectionScheduler
+from .subscription import StateCallback, Subscription
+from .transition import interpolate_levels, transition_steps
 from .util import asyncio_timeout
 
+if TYPE_CHECKING:
+    # Importing any part of flux_led loads all of it, so the protocol
+    # classes, effect tables and helpers below are imported where they are
+    # first used: once a protocol is resolved or an effect is requested.
+    from flux_led.base_device import PROTOCOL_TYPES
+    from flux_led.const import LevelWriteMode
+
 BLEAK_BACKOFF_TIME = 0.25
 
 WrapFuncType = TypeVar("WrapFuncType", bound=Callable[..., Any])
 
-DISCONNECT_DELAY = 120
-
 RETRY_BACKOFF_EXCEPTIONS = (BleakDBusError,)
 
+# Errors a command is retried on; timeouts are left out so a timeout set
+# by the caller is not multiplied by the attempts.
+RETRY_EXCEPTIONS = tuple(
+    exception
+    for exception in BLEAK_EXCEPTIONS
+    if not issubclass(exception, asyncio.TimeoutError)
+)
+
 _LOGGER = logging.getLogger(__name__)
 
-DEFAULT_ATTEMPTS = 3
+# Number of write-without-response operations allowed in flight at once
+# per connection; 1 writes each command only after the previous one returns.
+DEFAULT_WRITE_WINDOW = 1
+
+# Seconds before warm mode tries again after failing to pre-connect.
+WARM_RETRY_INTERVAL = 30
+
+# Seconds a confirmed write waits for the device to report the new state.
+CONFIRM_TIMEOUT = 5.0
+
+# Immutable starting values shared by every device.
+_INITIAL_STATE = LEDBLEState()
+_INITIAL_CONNECTION_STATS = ConnectionStats()
+# The default retry policy keeps no state, so devices share one.
+_DEFAULT_RETRY_POLICY = ExponentialBackoffPolicy()
+# The protocol event of devices resolved before anything waited for it;
+# it is set once and never cleared.
+_RESOLVED_EVENT = asyncio.Event()
+_RESOLVED_EVENT.set()
+
+
+@cache
+def _dream_effects() -> dict[str, int]:
+    """Return the pattern of each dream effect, keyed by effect name."""
+    return {f"Effect {i + 1}": i for i in range(0, 255)}
+
 
-DREAM_EFFECTS = {f"Effect {i + 1}": i for i in range(0, 255)}
-DREAM_EFFECT_LIST = list(DREAM_EFFECTS)
+@cache
+def _dream_effect_list() -> list[str]:
+    """Return the names of the dream effects."""
+    return list(_dream_effects())
+
+
+def __getattr__(name: str) -> Any:
+    """Build ``DREAM_EFFECTS`` and ``DREAM_EFFECT_LIST`` on first access."""
+    if name == "DREAM_EFFECTS":
+        return _dream_effects()
+    if name == "DREAM_EFFECT_LIST":
+        return _dream_effect_list()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@dataclass
+class _PendingLevels:
+    """A levels frame queued behind the in-flight write.
+
+    While coalescing, later levels changes overwrite ``commands`` so only the
+    newest frame is written once the operation lock frees up.
+    """
+
+    commands: list[bytes]
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+    error: BaseException | None = None
+
+
+@dataclass
+class _ConfirmWaiter:
+    """A confirmed write waiting for the device to report its state."""
+
+    expected: dict[str, Any]
+    future: asyncio.Future[None]
+    requeried: bool = False
 
 
 class LEDBLE:
+    # Fleets keep thousands of devices alive, so attributes live in slots.
+    __slots__ = (
+        "__weakref__",
+        "_advertisement_data",
+        "_ble_device",
+        "_callbacks",
+        "_char_uuids",
+        "_circuit_breaker",
+        "_client",
+        "_coalesce_levels",
+        "_command_attempts",
+        "_command_cache",
+        "_confirm_answered",
+        "_confirm_pending",
+        "_confirm_querying",
+        "_confirm_sent",
+        "_connection_holds",
+        "_connection_scheduler",
+        "_connection_stats",
+        "_device_cache",
+        "_disconnect_policy",
+        "_disconnect_timer",
+        "_expected_disconnect",
+        "_idle_timeout",
+        "_lazy_background_tasks",
+        "_lazy_connect_lock",
+        "_lazy_operation_lock",
+        "_lazy_resolve_protocol_event",
+        "_metrics",
+        "_model_data",
+        "_pending_levels",
+        "_preselect_by_name",
+        "_protocol",
+        "_protocol_unverified",
+        "_read_char",
+        "_refresh_services",
+        "_retry_policy",
+        "_state",
+        "_state_reported_at",
+        "_status_fields",
+        "_status_state",
+        "_update_sent_at",
+        "_verify_task",
+        "_warm",
+        "_warm_retry_at",
+        "_warm_unused",
+        "_warming",
+        "_write_char",
+        "_write_window",
+        "loop",
+    )
+
     def __init__(
-        self, ble_device: BLEDevice, advertisement_data: AdvertisementData | None = None
+        self,
+        ble_device: BLEDevice,
+        advertisement_data: AdvertisementData | None = None,
+        *,
+        coalesce_levels: bool = False,
+        write_window: int = DEFAULT_WRITE_WINDOW,
+        connection_scheduler: ConnectionScheduler | None = None,
+        device_cache: DeviceCache | None = None,
+        disconnect_policy: DisconnectPolicy | None = None,
+        warm: bool = False,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        preselect_by_name: bool = False,
     ) -> None:
-        """Init the LEDBLE."""
+        """Init the LEDBLE.
+
+        coalesce_levels: let a levels change replace the one queued behind a write.
+        write_window: writes of a batch handed to the stack before one completes.
+        connection_scheduler: share adapter connection slots with other devices.
+        device_cache: remember the protocol and characteristics of the device.
+        disconnect_policy: decide how long an idle connection is kept open.
+        warm: connect ahead of a command when the disconnected device advertises.
+        retry_policy: decide whether and when a failed command is retried.
+        circuit_breaker: fail commands fast while the device keeps failing.
+        preselect_by_name: use the protocol of the model the name identifies.
+        """
+        if write_window < 1:
+            raise ValueError(f"write_window must be at least 1, got {write_window}")
+        if warm and connection_scheduler is None:
+            raise ValueError("warm mode needs a connection_scheduler")
         self._ble_device = ble_device
         self._advertisement_data = advertisement_data
-        self._operation_lock = asyncio.Lock()
-        self._state = LEDBLEState()
-        self._connect_lock: asyncio.Lock = asyncio.Lock()
+        # The locks, the protocol event and the task set are created on
+        # first use; most devices in a large fleet sit idle.
+        self._lazy_operation_lock: asyncio.Lock | None = None
+        self._state = _INITIAL_STATE
+        # The last status frame fields and the state they left, to skip repeats.
+        self._status_fields: tuple[int, ...] = ()
+        self._status_state: LEDBLEState | None = None
+        self._lazy_connect_lock: asyncio.Lock | None = None
         self._read_char: BleakGATTCharacteristic | None = None
         self._write_char: BleakGATTCharacteristic | None = None
         self._disconnect_timer: asyncio.TimerHandle | None = None
-        self._background_tasks: set[asyncio.Task[Any]] = set()
+        # Operations holding the connection open; the idle timer stays
+        # off while any is in progress.
+        self._connection_holds = 0
+        self._lazy_background_tasks: set[asyncio.Task[Any]] | None = None
         self._client: BleakClientWithServiceCache | None = None
         self._expected_disconnect = False
         self.loop = asyncio.get_running_loop()
-        self._callbacks: list[Callable[[LEDBLEState], None]] = []
+        self._callbacks: list[Subscription] = []
         self._model_data: LEDBLEModel | None = None
         self._protocol: PROTOCOL_TYPES | None = None
-        self._resolve_protocol_event = asyncio.Event()
+        self._command_cache: CommandCache | None = None
+        self._lazy_resolve_protocol_event: asyncio.Event | None = None
+        self._coalesce_levels = coalesce_levels
+        self._pending_levels: _PendingLevels | None = None
+        self._write_window = write_window
+        self._connection_scheduler = connection_scheduler
+        self._device_cache = device_cache
+        self._protocol_unverified = False
+        self._verify_task: asyncio.Task[None] | None = None
+        self._char_uuids: tuple[str, str] | None = None
+        self._refresh_services = False
+        self._disconnect_policy: DisconnectPolicy = (
+            disconnect_policy or AdaptiveDisconnectPolicy()
+        )
+        self._idle_timeout: float = DISCONNECT_DELAY
+        self._connection_stats = _INITIAL_CONNECTION_STATS
+        self._metrics = Metrics(ble_device.address, GLOBAL_METRICS)
+        self._update_sent_at: float | None = None
+        # When the device last reported its full state, in loop time.
+        self._state_reported_at: float | None = None
+        self._command_attempts = 0
+        # Confirmed writes waiting for the next state query, the ones its
+        # notification answers, and whether a query task is running.
+        self._confirm_pending: list[_ConfirmWaiter] = []
+        self._confirm_sent: list[_ConfirmWaiter] = []
+        self._confirm_answered: asyncio.Future[None] | None = None
+        self._confirm_querying = False
+        self._warm = warm
+        self._warming = False
+        self._warm_unused = False
+        self._warm_retry_at = 0.0
+        self._retry_policy: RetryPolicy = retry_policy or _DEFAULT_RETRY_POLICY
+        self._circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._preselect_by_name = preselect_by_name
+        if device_cache and (cached := device_cache.get(ble_device.address)):
+            self._load_cached_protocol(cached)
+        elif preselect_by_name:
+            self._preselect_protocol()
 
     def set_ble_device_and_advertisement_data(
         self, ble_device: BLEDevice, advertisement_data: AdvertisementData
     ) -> None:
-        """Set the ble device."""
+        """Set the ble device.
+
+        State advertised in the manufacturer data is taken over while the
+        device is not connected, without connecting to it.
+        """
         self._ble_device = ble_device
         self._advertisement_data = advertisement_data
+        self._circuit_breaker.device_seen()
+        if self._protocol is None and self._preselect_by_name:
+            self._preselect_protocol()
+        if (
+            advertisement_data
+            and advertisement_data.manufacturer_data
+            and not (self._client and self._client.is_connected)
+            and (state := decode_advertisement(advertisement_data.manufacturer_data))
+        ):
+            self._apply_advertised_state(state)
+        if self._warm:
+            self._maybe_warm_connect()
+
+    def _apply_advertised_state(self, state: LEDBLEState) -> None:
+        """Take over the state a device advertised."""
+        if self._model_data is None or self._model_data.model_num != state.model_num:
+            self._model_data = get_model(state.model_num)
+        self._state_reported_at = self.loop.time()
+        if state == self._state:
+            return
+        _LOGGER.debug("%s: Advertised state: %s", self.name, state)
+        self._state = state
+        self._fire_callbacks()
+
+    @property
+    def _operation_lock(self) -> asyncio.Lock:
+        """Return the lock held while commands are written."""
+        if (lock := self._lazy_operation_lock) is None:
+            lock = self._lazy_operation_lock = asyncio.Lock()
+        return lock
+
+    @property
+    def _connect_lock(self) -> asyncio.Lock:
+        """Return the lock held while connecting."""
+        if (lock := self._lazy_connect_lock) is None:
+            lock = self._lazy_connect_lock = asyncio.Lock()
+        return lock
+
+    @property
+    def _resolve_protocol_event(self) -> asyncio.Event:
+        """Return the event set once the protocol is known."""
+        if (event := self._lazy_resolve_protocol_event) is None:
+            event = self._lazy_resolve_protocol_event = asyncio.Event()
+        return event
+
+    def _set_protocol_resolved(self) -> None:
+        """Release the commands waiting for the protocol."""
+        if (event := self._lazy_resolve_protocol_event) is None:
+            # Nothing waits yet, so share an event that is already set.
+            self._lazy_resolve_protocol_event = _RESOLVED_EVENT
+        else:
+            event.set()
+
+    @property
+    def _background_tasks(self) -> set[asyncio.Task[Any]]:
+        """Return the background tasks still running."""
+        if (tasks := self._lazy_background_tasks) is None:
+            tasks = self._lazy_background_tasks = set()
+        return tasks
 
     @property
     def address(self) -> str:
@@ -91,6 +395,27 @@ class LEDBLE:
         """Return the address."""
         return self._ble_device.address
 
+    @property
+    def ble_device(self) -> BLEDevice:
+        """Return the ble device."""
+        return self._ble_device
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        """Return the circuit breaker of the device."""
+        return self._circuit_breaker
+
+    @property
+    def state_age(self) -> float | None:
+        """Return the seconds since the device last reported its full state.
+
+        Status notifications and advertised state count; None if the
+        device has not reported its state yet.
+        """
+        if self._state_reported_at is None:
+            return None
+        return self.loop.time() - self._state_reported_at
+
     @property
     def model_data(self) -> LEDBLEModel:
         """Return the model data."""
@@ -125,10 +450,8 @@ class LEDBLE:
     @property
     def rgb_unscaled(self) -> tuple[int, int, int]:
         """Return the unscaled RGB."""
-        r, g, b = self.rgb
-        hsv = colorsys.rgb_to_hsv(r / 255.0, g / 255.0, b / 255.0)
-        r_p, g_p, b_p = colorsys.hsv_to_rgb(hsv[0], hsv[1], 1)
-        return round(r_p * 255), round(g_p * 255), round(b_p * 255)
+        r, g, b = self._state.rgb
+        return rgb_unscaled(r, g, b)
 
     @property
     def on(self) -> bool:
@@ -139,9 +462,8 @@ class LEDBLE:
         """Return current brightness 0-255."""
         if self.w:
             return self.w
-        r, g, b = self.rgb
-        _, _, v = colorsys.rgb_to_hsv(r / 255, g / 255, b / 255)
-        return int(v * 255)
+        r, g, b = self._state.rgb
+        return rgb_brightness(r, g, b)
 
     async def update(self) -> None:
         """Update the LEDBLE."""
@@ -150,39 +472,119 @@ class LEDBLE:
         _LOGGER.debug("%s: Updating", self.name)
         assert self._protocol is not None  # nosec
         command = self._protocol.construct_state_query()
+        self._update_sent_at = self.loop.time()
         await self._send_command([command])
 
-    async def turn_on(self) -> None:
-        """Turn on."""
+    async def turn_on(self, *, confirm: bool = False) -> None:
+        """Turn on.
+
+        With ``confirm`` set, wait until the device reports it is on;
+        the same holds for the other setters.
+        """
         _LOGGER.debug("%s: Turn on", self.name)
         assert self._protocol is not None  # nosec
-        await self._send_command(self._protocol.construct_state_change(True))
-        self._state = replace(self._state, power=True)
+        await self._send_command(self._construct_state_change(True))
+        self._state = self._with_power(True)
         self._fire_callbacks()
+        if confirm:
+            await self._confirm_state(power=True)
 
-    async def turn_off(self) -> None:
+    async def turn_off(self, *, confirm: bool = False) -> None:
         """Turn off."""
         _LOGGER.debug("%s: Turn off", self.name)
         assert self._protocol is not None  # nosec
-        await self._send_command(self._protocol.construct_state_change(False))
-        self._state = replace(self._state, power=False)
+        await self._send_command(self._construct_state_change(False))
+        self._state = self._with_power(False)
         self._fire_callbacks()
+        if confirm:
+            await self._confirm_state(power=False)
+
+    def _with_power(self, power: bool) -> LEDBLEState:
+        """Return the state with the power changed."""
+        # Positional construction costs half of dataclasses.replace().
+        state = self._state
+        return LEDBLEState(
+            power,
+            state.rgb,
+            state.w,
+            state.model_num,
+            state.preset_pattern,
+            state.mode,
+            state.speed,
+            state.version_num,
+        )
+
+    def _with_levels(self, rgb: tuple[int, int, int], w: int) -> LEDBLEState:
+        """Return the state showing static levels."""
+        state = self._state
+        return LEDBLEState(
+            state.power,
+            rgb,
+            w,
+            state.model_num,
+            1 if self.dream else state.preset_pattern,
+            state.mode,
+            state.speed,
+            state.version_num,
+        )
 
-    async def set_brightness(self, brightness: int) -> None:
+    def _construct_state_change(self, turn_on: bool) -> bytes | bytearray:
+        """Encode a power change, reusing a cached encoding when possible."""
+        if self._command_cache is not None:
+            return self._command_cache.construct_state_change(turn_on)
+        assert self._protocol is not None  # nosec
+        return self._protocol.construct_state_change(turn_on)
+
+    def _construct_levels_change(
+        self,
+        persist: bool,
+        red: int,
+        green: int,
+        blue: int,
+        warm_white: int | None,
+        cool_white: int | None,
+        write_mode: LevelWriteMode,
+    ) -> list[bytes]:
+        """Encode a levels change, reusing a cached encoding when possible."""
+        if self._command_cache is not None:
+            return self._command_cache.construct_levels_change(
+                persist, red, green, blue, warm_white, cool_white, write_mode
+            )
+        assert self._protocol is not None  # nosec
+        return [
+            bytes(command)
+            for command in self._protocol.construct_levels_change(
+                persist=persist,
+                red=red,
+                green=green,
+                blue=blue,
+                warm_white=warm_white,
+                cool_white=cool_white,
+                write_mode=write_mode,
+            )
+        ]
+
+    async def set_brightness(self, brightness: int, *, confirm: bool = False) -> None:
         """Set the brightness."""
         _LOGGER.debug("%s: Set brightness: %s", self.name, brightness)
         effect = self.effect
         if effect:
             effect_brightness = round(brightness / 255 * 100)
-            await self.async_set_effect(effect, self.speed, effect_brightness)
+            await self.async_set_effect(
+                effect, self.speed, effect_brightness, confirm=confirm
+            )
             return
         if self.w:
-            await self.set_white(brightness)
+            await self.set_white(brightness, confirm=confirm)
             return
-        await self.set_rgb(self.rgb_unscaled, brightness)
+        await self.set_rgb(self.rgb_unscaled, brightness, confirm=confirm)
 
     async def set_rgb(
-        self, rgb: tuple[int, int, int], brightness: int | None = None
+        self,
+        rgb: tuple[int, int, int],
+        brightness: int | None = None,
+        *,
+        confirm: bool = False,
     ) -> None:
         """Set rgb."""
         _LOGGER.debug("%s: Set rgb: %s brightness: %s", self.name, rgb, brightness)
@@ -193,8 +595,10 @@ class LEDBLE:
             rgb = self._calculate_brightness(rgb, brightness)
         _LOGGER.debug("%s: Set rgb after brightness: %s", self.name, rgb)
         assert self._protocol is not None  # nosec
+        from flux_led.const import LevelWriteMode
+
         r, g, b = rgb
-        command = self._protocol.construct_levels_change(
+        command = self._construct_levels_change(
             persist=True,
             red=r,
             green=g,
@@ -203,28 +607,33 @@ class LEDBLE:
             cool_white=None,
             write_mode=LevelWriteMode.COLORS,
         )
-        await self._send_command(command)
-        self._state = replace(
-            self._state,
-            rgb=rgb,
-            w=0,
-            preset_pattern=1 if self.dream else self.preset_pattern_num,
-        )
+        if not await self._send_levels_command(command):
+            return
+        self._state = self._with_levels(rgb, 0)
         self._fire_callbacks()
+        if confirm:
+            await self._confirm_state(rgb=rgb, w=0)
 
     async def set_rgbw(
-        self, rgbw: tuple[int, int, int, int], brightness: int | None = None
+        self,
+        rgbw: tuple[int, int, int, int],
+        brightness: int | None = None,
+        *,
+        confirm: bool = False,
     ) -> None:
         """Set rgbw."""
         _LOGGER.debug("%s: Set rgbw: %s brightness: %s", self.name, rgbw, brightness)
         for value in rgbw:
             if not 0 <= value <= 255:
                 raise ValueError(f"Value {value} is outside the valid range of 0-255")
+        from flux_led.const import LevelWriteMode
+        from flux_led.utils import rgbw_brightness
+
         r, g, b, w = rgbw_brightness(rgbw, brightness)
         _LOGGER.debug("%s: Set rgbw after brightness: %s", self.name, rgbw)
         assert self._protocol is not None  # nosec
 
-        command = self._protocol.construct_levels_change(
+        command = self._construct_levels_change(
             persist=True,
             red=r,
             green=g,
@@ -233,24 +642,23 @@ class LEDBLE:
             cool_white=None,
             write_mode=LevelWriteMode.ALL,
         )
-        await self._send_command(command)
+        if not await self._send_levels_command(command):
+            return
 
-        self._state = replace(
-            self._state,
-            rgb=(rgbw[0], rgbw[1], rgbw[2]),
-            w=rgbw[3],
-            preset_pattern=1 if self.dream else self.preset_pattern_num,
-        )
+        self._state = self._with_levels((rgbw[0], rgbw[1], rgbw[2]), rgbw[3])
         self._fire_callbacks()
+        if confirm:
+            await self._confirm_state(rgb=(r, g, b), w=w)
 
-    async def set_white(self, brightness: int) -> None:
+    async def set_white(self, brightness: int, *, confirm: bool = False) -> None:
         """Set rgb."""
         _LOGGER.debug("%s: Set white: %s", self.name, brightness)
         if not 0 <= brightness <= 255:
             raise ValueError(f"Value {brightness} is outside the valid range of 0-255")
         assert self._protocol is not None  # nosec
+        from flux_led.const import LevelWriteMode
 
-        command = self._protocol.construct_levels_change(
+        command = self._construct_levels_change(
             persist=True,
             red=0,
             green=0,
@@ -259,14 +667,213 @@ class LEDBLE:
             cool_white=None,
             write_mode=LevelWriteMode.WHITES,
         )
-        await self._send_command(command)
-        self._state = replace(
-            self._state,
-            rgb=(0, 0, 0),
-            w=brightness,
-            preset_pattern=1 if self.dream else self.preset_pattern_num,
-        )
+        if not await self._send_levels_command(command):
+            return
+        self._state = self._with_levels((0, 0, 0), brightness)
         self._fire_callbacks()
+        if confirm:
+            await self._confirm_state(rgb=(0, 0, 0), w=brightness)
+
+    async def async_transition(
+        self,
+        rgb: tuple[int, int, int] | None = None,
+        brightness: int | None = None,
+        *,
+        rgbw: tuple[int, int, int, int] | None = None,
+        duration: float = 1.0,
+    ) -> None:
+        """Fade from the current levels to the target over ``duration`` seconds.
+
+        With only ``brightness`` the current color (or white) is faded to the
+        new brightness. Frames are encoded before the fade starts and written
+        as fast as the link allows; frames whose slot has already passed are
+        dropped so the fade ends on time, but the target is always written.
+        The idle timer is held off until the fade ends.
+        """
+        if rgb is not None and rgbw is not None:
+            raise ValueError("Only one of rgb or rgbw may be set")
+        if rgb is None and rgbw is None:
+            if brightness is None:
+                raise ValueError("One of rgb, rgbw or brightness must be set")
+            if self.effect:
+                await self.set_brightness(brightness)
+                return
+        for value in (*(rgb or rgbw or ()), brightness or 0):
+            if not 0 <= value <= 255:
+                raise ValueError(f"Value {value} is outside the valid range of 0-255")
+        await self._ensure_connected()
+        await self._resolve_protocol()
+        assert self._protocol is not None  # nosec
+        from flux_led.const import LevelWriteMode
+        from flux_led.utils import rgbw_brightness
+
+        # Levels are (r, g, b, w) throughout; the write mode decides which
+        # channels the device applies.
+        start = (*self.rgb, self.w)
+        end: tuple[int, int, int, int]
+        if rgbw is not None:
+            write_mode = LevelWriteMode.ALL
+            end = rgbw_brightness(rgbw, brightness)
+            final_rgb, final_w = (rgbw[0], rgbw[1], rgbw[2]), rgbw[3]
+        elif rgb is None and self.w:
+            assert brightness is not None  # nosec
+            write_mode = LevelWriteMode.WHITES
+            start = (0, 0, 0, self.w)
+            end = (0, 0, 0, brightness)
+            final_rgb, final_w = (0, 0, 0), brightness
+        else:
+            write_mode = LevelWriteMode.COLORS
+            if rgb is None:
+                rgb = self.rgb_unscaled
+            if brightness is not None:
+                rgb = self._calculate_brightness(rgb, brightness)
+            start = (*self.rgb, 0)
+            end = (*rgb, 0)
+            final_rgb, final_w = rgb, 0
+
+        steps = transition_steps(duration)
+        frames = interpolate_levels(start, end, steps)
+        interval = duration / steps
+        offsets = [(step - 1) * interval for step, _ in frames]
+        last = len(frames) - 1
+        colors_only = write_mode == LevelWriteMode.COLORS
+        encoded = [
+            [
+                bytes(command)
+                for command in self._protocol.construct_levels_change(
+                    persist=index == last,
+                    red=levels[0],
+                    green=levels[1],
+                    blue=levels[2],
+                    warm_white=None if colors_only else levels[3],
+                    cool_white=None,
+                    write_mode=write_mode,
+                )
+            ]
+            for index, (_, levels) in enumerate(frames)
+        ]
+        _LOGGER.debug(
+            "%s: Transition to %s over %ss in %s frames",
+            self.name,
+            end,
+            duration,
+            len(frames),
+        )
+
+        index = 0
+        sent = -1
+        written = 0
+        loop_start = self.loop.time()
+        try:
+            with self._hold_connection():
+                while True:
+                    await self._send_command_while_connected(encoded[index])
+                    sent = index
+                    written += 1
+                    if index == last:
+                        break
+                    elapsed = self.loop.time() - loop_start
+                    # Jump to the newest frame that is already due, never
+                    # past the target.
+                    index = min(
+                        max(index + 1, bisect_right(offsets, elapsed) - 1), last
+                    )
+                    if (delay := offsets[index] - elapsed) > 0:
+                        await asyncio.sleep(delay)
+        finally:
+            if sent >= 0:
+                if sent != last:
+                    levels = frames[sent][1]
+                    final_rgb, final_w = (levels[0], levels[1], levels[2]), levels[3]
+                self._state = self._with_levels(final_rgb, final_w)
+                self._fire_callbacks()
+            _LOGGER.debug(
+                "%s: Transition wrote %s of %s frames",
+                self.name,
+                written,
+                len(frames),
+            )
+
+    async def stream_frames(
+        self, source: AsyncIterator[tuple[int, int, int]]
+    ) -> StreamStats:
+        """Stream rgb frames from ``source`` to the device.
+
+        The connection and operation lock are held for the whole stream, with
+        the idle timer off, and frames skip validation and state bookkeeping.
+        When the source produces faster than the link accepts, only the
+        newest frame is written. The state is updated once, when the stream
+        ends.
+        """
+        await self._ensure_connected()
+        await self._resolve_protocol()
+        assert self._protocol is not None  # nosec
+        from flux_led.const import LevelWriteMode
+
+        construct_levels_change = self._protocol.construct_levels_change
+        latest: tuple[int, int, int] | None = None
+        last_sent: tuple[int, int, int] | None = None
+        received = 0
+        sent = 0
+        ready = asyncio.Event()
+
+        async def _pump() -> None:
+            nonlocal latest, received
+            try:
+                async for frame in source:
+                    latest = frame
+                    received += 1
+                    ready.set()
+            finally:
+                ready.set()
+
+        _LOGGER.debug("%s: Starting frame stream", self.name)
+        waiting = self.loop.time()
+        async with self._operation_lock:
+            start = self.loop.time()
+            self._metrics.observe(LOCK_WAIT, start - waiting)
+            pump = self.loop.create_task(_pump())
+            try:
+                with self._hold_connection():
+                    while True:
+                        if latest is None:
+                            if pump.done():
+                                break
+                            await ready.wait()
+                            ready.clear()
+                            continue
+                        frame, latest = latest, None
+                        commands = construct_levels_change(
+                            persist=False,
+                            red=frame[0],
+                            green=frame[1],
+                            blue=frame[2],
+                            warm_white=None,
+                            cool_white=None,
+                            write_mode=LevelWriteMode.COLORS,
+                        )
+                        await self._send_command_locked(
+                            [bytes(command) for command in commands]
+                        )
+                        last_sent = frame
+                        sent += 1
+                    await pump
+            finally:
+                pump.cancel()
+                duration = self.loop.time() - start
+                if last_sent is not None:
+                    self._state = self._with_levels(last_sent, 0)
+                    self._fire_callbacks()
+
+        stats = StreamStats(received, sent, duration)
+        _LOGGER.debug(
+            "%s: Frame stream ended; sent %s frames at %.1f fps, dropped %s",
+            self.name,
+            stats.frames_sent,
+            stats.fps,
+            stats.frames_dropped,
+        )
+        return stats
 
     def _generate_preset_pattern(
         self, pattern: int, speed: int, brightness: int
@@ -277,16 +884,22 @@ class LEDBLE:
             brightness = int(brightness * 255 / 100)
             speed = int(speed * 255 / 100)
             return bytes([0x9E, 0x00, pattern, speed, brightness, 0x00, 0xE9])
+        from flux_led.pattern import PresetPattern
+
         PresetPattern.valid_or_raise(pattern)
         if not (1 <= brightness <= 100):
             raise ValueError("Brightness must be between 1 and 100")
         assert self._protocol is not None  # nosec
+        if self._command_cache is not None:
+            return self._command_cache.construct_preset_pattern(
+                pattern, speed, brightness
+            )
         return bytes(
             self._protocol.construct_preset_pattern(pattern, speed, brightness)
         )
 
     async def async_set_preset_pattern(
-        self, effect: int, speed: int, brightness: int = 100
+        self, effect: int, speed: int, brightness: int = 100, *, confirm: bool = False
     ) -> None:
         """Set a preset pattern on the device."""
         command = self._generate_preset_pattern(effect, speed, brightness)
@@ -296,13 +909,19 @@ class LEDBLE:
         else:
             self._state = replace(self._state, preset_pattern=effect)
         self._fire_callbacks()
+        if not confirm:
+            return
+        if self.dream:
+            await self._confirm_state(preset_pattern=0, mode=effect)
+        else:
+            await self._confirm_state(preset_pattern=effect)
 
     async def async_set_effect(
-        self, effect: str, speed: int, brightness: int = 100
+        self, effect: str, speed: int, brightness: int = 100, *, confirm: bool = False
     ) -> None:
         """Set an effect."""
         await self.async_set_preset_pattern(
-            self._effect_to_pattern(effect), speed, brightness
+            self._effect_to_pattern(effect), speed, brightness, confirm=confirm
         )
 
     async def stop(self) -> None:
@@ -313,29 +932,142 @@ class LEDBLE:
     def _calculate_brightness(
         self, rgb: tuple[int, int, int], level: int
     ) -> tuple[int, int, int]:
-        hsv = colorsys.rgb_to_hsv(*rgb)
-        r, g, b = colorsys.hsv_to_rgb(hsv[0], hsv[1], level)
-        return int(r), int(g), int(b)
+        return scale_rgb(rgb, level)
 
     def _fire_callbacks(self) -> None:
         """Fire the callbacks."""
-        for callback in self._callbacks:
-            callback(self._state)
+        state = self._state
+        for subscription in self._callbacks:
+            subscription.notify(state)
 
     def register_callback(
-        self, callback: Callable[[LEDBLEState], None]
+        self,
+        callback: StateCallback,
+        *,
+        fields: Iterable[str] | None = None,
+        interval: float = 0.0,
     ) -> Callable[[], None]:
-        """Register a callback to be called when the state changes."""
+        """Register a callback to be called when the state changes.
+
+        ``fields`` limits the callback to changes of those ``LEDBLEState``
+        fields and ``interval`` to at most one call per that many seconds,
+        delivering the newest state. The callback may be a coroutine
+        function; it then runs as a task, one at a time.
+        """
+        subscription = Subscription(
+            self.loop, callback, self._create_background_task, fields, interval
+        )
 
         def unregister_callback() -> None:
-            self._callbacks.remove(callback)
+            self._callbacks.remove(subscription)
+            subscription.cancel()
 
-        self._callbacks.append(callback)
+        self._callbacks.append(subscription)
         return unregister_callback
 
-    async def _ensure_connected(self) -> None:
-        """Ensure connection to device is established."""
-        if self._connect_lock.locked():
+    async def _confirm_state(self, **expected: Any) -> None:
+        """Wait for the device to report the state fields a write set.
+
+        Confirmations waiting at the same time share one state query and
+        are checked against the status notification that follows it. One
+        that does not match gets a second query, as the notification may
+        have answered a query sent before the write; a second mismatch or
+        no match within ``CONFIRM_TIMEOUT`` raises ``ConfirmationError``.
+        """
+        started = self.loop.time()
+        waiter = _ConfirmWaiter(expected, self.loop.create_future())
+        self._confirm_pending.append(waiter)
+        if not self._confirm_querying:
+            self._confirm_querying = True
+            self._create_background_task(self._send_confirm_queries())
+        try:
+            async with asyncio_timeout(CONFIRM_TIMEOUT):
+                await waiter.future
+        except asyncio.TimeoutError:
+            self._metrics.increment(CONFIRM_FAILURES)
+            raise ConfirmationError(
+                f"{self.name}: Device did not report {expected} within "
+                f"{CONFIRM_TIMEOUT}s"
+            ) from None
+        except ConfirmationError:
+            self._metrics.increment(CONFIRM_FAILURES)
+            raise
+        finally:
+            if waiter in self._confirm_pending:
+                self._confirm_pending.remove(waiter)
+        self._metrics.observe(CONFIRM_LATENCY, self.loop.time() - started)
+
+    async def _send_confirm_queries(self) -> None:
+        """Query the state until no confirmed write is left waiting."""
+        try:
+            while self._confirm_pending:
+                self._confirm_sent = self._confirm_pending
+                self._confirm_pending = []
+                self._confirm_answered = answered = self.loop.create_future()
+                assert self._protocol is not None  # nosec
+                await self._send_command(self._protocol.construct_state_query())
+                async with asyncio_timeout(CONFIRM_TIMEOUT):
+                    await answered
+        except (
+            *BLEAK_EXCEPTIONS,
+            CharacteristicMissingError,
+            asyncio.TimeoutError,
+        ) as ex:
+            error: Exception = ex
+            if isinstance(ex, asyncio.TimeoutError):
+                error = ConfirmationError(f"{self.name}: No status notification")
+            for waiter in (*self._confirm_sent, *self._confirm_pending):
+                if not waiter.future.done():
+                    waiter.future.set_exception(error)
+            self._confirm_sent = []
+            self._confirm_pending = []
+        finally:
+            self._confirm_answered = None
+            self._confirm_querying = False
+
+    def _check_confirmations(self, state: LEDBLEState) -> None:
+        """Settle the confirmed writes the last state query was sent for."""
+        sent, self._confirm_sent = self._confirm_sent, []
+        for waiter in sent:
+            if waiter.future.done():
+                continue
+            if all(
+                getattr(state, name) == value for name, value in waiter.expected.items()
+            ):
+                waiter.future.set_result(None)
+            elif not waiter.requeried:
+                waiter.requeried = True
+                self._confirm_pending.append(waiter)
+            else:
+                waiter.future.set_exception(
+                    ConfirmationError(
+                        f"{self.name}: Device reported {state} instead of "
+                        f"{waiter.expected}"
+                    )
+                )
+        if self._confirm_answered and not self._confirm_answered.done():
+            self._confirm_answered.set_result(None)
+
+    async def _ensure_connected(
+        self, priority: int = PRIORITY_COMMAND, *, retry: bool = False
+    ) -> None:
+        """Ensure connection to device is established.
+
+        ``priority`` orders the connection attempt against other devices
+        waiting on the connection scheduler, if one is in use. Anything but
+        ``PRIORITY_COMMAND`` opens a warm connection that no command has
+        used yet. Commands connect only while the circuit breaker allows.
+
+        ``retry`` is set when reconnecting for a retry while the operation
+        lock is held; the circuit breaker was already consulted for the
+        command, the protocol is not resolved and the caller records the
+        outcome with the circuit breaker.
+        """
+        command = priority == PRIORITY_COMMAND
+        started = self.loop.time()
+        if command:
+            self._disconnect_policy.record_use(started)
+        if self._lazy_connect_lock is not None and self._lazy_connect_lock.locked():
             _LOGGER.debug(
                 "%s: Connection already in progress, waiting for it to complete; RSSI: %s",
                 self.name,
@@ -343,46 +1075,170 @@ class LEDBLE:
             )
         if self._client and self._client.is_connected:
             self._reset_disconnect_timer()
+            if command:
+                self._record_command_use(started, False)
             return
         async with self._connect_lock:
             # Check again while holding the lock
             if self._client and self._client.is_connected:
                 self._reset_disconnect_timer()
+                if command:
+                    self._record_command_use(started, False)
                 return
-            _LOGGER.debug("%s: Connecting; RSSI: %s", self.name, self.rssi)
-            for attempt in range(2):
-                client = await establish_connection(
-                    BleakClientWithServiceCache,
-                    self._ble_device,
-                    self.name,
-                    self._disconnected,
-                    use_services_cache=True,
-                    ble_device_callback=lambda: self._ble_device,
+            if command and not retry and not self._circuit_breaker.allow(started):
+                raise CircuitOpenError(
+                    f"{self.name}: Failed {self._circuit_breaker.failures} times "
+                    "in a row; not connecting until it advertises again"
                 )
-                _LOGGER.debug("%s: Connected; RSSI: %s", self.name, self.rssi)
-                if self._resolve_characteristics(client.services):
-                    # Supported characteristics found
-                    break
-                else:
-                    if attempt == 0:
-                        # Try to handle services failing to load
-                        await client.clear_cache()
-                        await client.disconnect()
-                        continue
-                    await client.disconnect()
-                    raise CharacteristicMissingError(
-                        "Failed to find supported characteristics, device may not be supported"
+            _LOGGER.debug("%s: Connecting; RSSI: %s", self.name, self.rssi)
+            try:
+                if scheduler := self._connection_scheduler:
+                    await scheduler.acquire(
+                        self._ble_device, priority, self._evict_connection
                     )
+                    try:
+                        client = await self._establish_connection()
+                    except BaseException:
+                        scheduler.release(self._address)
+                        raise
+                    finally:
+                        scheduler.attempt_done(self._address)
+                else:
+                    client = await self._establish_connection()
+            except (*BLEAK_EXCEPTIONS, CharacteristicMissingError):
+                if command and not retry:
+                    self._circuit_breaker.record_failure(self.loop.time())
+                raise
 
             self._client = client
+            stats = self._connection_stats
+            self._connection_stats = replace(
+                stats,
+                connects=stats.connects + 1,
+                reconnects=stats.reconnects + bool(stats.connects),
+                warm_connects=stats.warm_connects + (not command),
+            )
+            self._warm_unused = not command
             self._reset_disconnect_timer()
 
             _LOGGER.debug(
                 "%s: Subscribe to notifications; RSSI: %s", self.name, self.rssi
             )
             await client.start_notify(self._read_char, self._notification_handler)
-            if not self._protocol:
-                await self._resolve_protocol()
+            if self._protocol_unverified:
+                self._verify_task = self._create_background_task(
+                    self._verify_cached_protocol()
+                )
+        # Resolve outside the connect lock; a failed state query disconnects
+        # and reconnects, which take the lock again.
+        if not self._protocol and not retry:
+            await self._resolve_protocol()
+        if command:
+            self._record_command_use(started, True)
+
+    def _record_command_use(self, started: float, connected: bool) -> None:
+        """Record how long a command waited for the connection."""
+        if self._connection_scheduler:
+            self._connection_scheduler.touch(self._address)
+        waited = self.loop.time() - started
+        stats = self._connection_stats
+        if connected:
+            self._connection_stats = replace(
+                stats,
+                cold_starts=stats.cold_starts + 1,
+                cold_start_time=stats.cold_start_time + waited,
+            )
+        elif self._warm_unused:
+            self._connection_stats = replace(
+                stats,
+                warm_hits=stats.warm_hits + 1,
+                warm_hit_time=stats.warm_hit_time + waited,
+            )
+        self._warm_unused = False
+
+    def _maybe_warm_connect(self) -> None:
+        """Start connecting ahead of the next command if a slot is free."""
+        if (
+            self._warming
+            or (
+                self._lazy_connect_lock is not None and self._lazy_connect_lock.locked()
+            )
+            or (self._client and self._client.is_connected)
+            or self.loop.time() < self._warm_retry_at
+        ):
+            return
+        assert self._connection_scheduler is not None  # nosec
+        if not self._connection_scheduler.warm_available(self._ble_device):
+            return
+        self._warming = True
+        self._create_background_task(self._warm_connect())
+
+    async def _warm_connect(self) -> None:
+        """Connect ahead of the next command."""
+        _LOGGER.debug("%s: Warming connection; RSSI: %s", self.name, self.rssi)
+        try:
+            await self._ensure_connected(PRIORITY_IDLE)
+        except (*BLEAK_EXCEPTIONS, CharacteristicMissingError) as ex:
+            self._warm_retry_at = self.loop.time() + WARM_RETRY_INTERVAL
+            _LOGGER.debug("%s: Failed to warm connection: %s", self.name, ex)
+        finally:
+            self._warming = False
+
+    async def _establish_connection(self) -> BleakClientWithServiceCache:
+        """Connect and resolve the characteristics, retrying once.
+
+        Devices known to need a services refresh skip the cached services
+        on the first attempt instead of connecting twice.
+        """
+        started = self.loop.time()
+        cached = self._device_cache.get(self._address) if self._device_cache else None
+        refresh = self._refresh_services or bool(cached and cached.refresh_services)
+        for attempt in range(2):
+            self._metrics.increment(CONNECT_ATTEMPTS)
+            client = await establish_connection(
+                BleakClientWithServiceCache,
+                self._ble_device,
+                self.name,
+                self._disconnected,
+                use_services_cache=not refresh,
+                ble_device_callback=lambda: self._ble_device,
+            )
+            _LOGGER.debug("%s: Connected; RSSI: %s", self.name, self.rssi)
+            if self._resolve_characteristics(client.services):
+                # Supported characteristics found
+                break
+            else:
+                if attempt == 0:
+                    # Try to handle services failing to load
+                    await client.clear_cache()
+                    await client.disconnect()
+                    refresh = True
+                    record_services_refresh()
+                    continue
+                await client.disconnect()
+                raise CharacteristicMissingError(
+                    "Failed to find supported characteristics, device may not be supported"
+                )
+        self._refresh_services = refresh
+        self._metrics.observe(CONNECT_TIME, self.loop.time() - started)
+        if self._device_cache and cached:
+            self._device_cache.set(
+                self._address,
+                self._cached_device(
+                    cached.model_num, cached.version_num, cached.protocol
+                ),
+            )
+        return client
+
+    @property
+    def metrics(self) -> MetricsSnapshot:
+        """Return the counters and histograms recorded for the device."""
+        return self._metrics.snapshot()
+
+    @property
+    def connection_stats(self) -> ConnectionStats:
+        """Return how often the device was connected and disconnected."""
+        return self._connection_stats
 
     @property
     def model_num(self) -> int:
@@ -412,16 +1268,20 @@ class LEDBLE:
     def _effect_to_pattern(self, effect: str) -> int:
         """Convert an effect to a pattern code."""
         if self.dream:
-            if effect not in DREAM_EFFECTS:
+            if effect not in (effects := _dream_effects()):
                 raise ValueError(f"Effect {effect} is not valid")
-            return DREAM_EFFECTS[effect]
+            return effects[effect]
+        from flux_led.pattern import PresetPattern
+
         return PresetPattern.str_to_val(effect)
 
     @property
     def effect_list(self) -> list[str]:
         """Return the list of available effects."""
         if self.dream:
-            return DREAM_EFFECT_LIST
+            return _dream_effect_list()
+        from flux_led.pattern import EFFECT_LIST
+
         return EFFECT_LIST
 
     @property
@@ -443,58 +1303,188 @@ class LEDBLE:
     @property
     def _named_effect(self) -> str | None:
         """Returns the named effect."""
+        from flux_led.pattern import EFFECT_ID_NAME
+
         return EFFECT_ID_NAME.get(self.preset_pattern_num)
 
     def _notification_handler(self, _sender: int, data: bytearray) -> None:
-        """Handle notification responses."""
-        _LOGGER.debug("%s: Notification received: %s", self.name, data.hex())
+        """Handle notification responses.
 
-        if len(data) == 4 and data[0] == 0xCC:
-            on = data[1] == 0x23
-            self._state = replace(self._state, power=on)
+        Callbacks only fire when a status frame changes the state. A frame
+        identical to the previous one is skipped without decoding as long
+        as nothing else replaced the state in between.
+        """
+        debug = _LOGGER.isEnabledFor(logging.DEBUG)
+        if debug:
+            _LOGGER.debug("%s: Notification received: %s", self.name, data.hex())
+
+        size = len(data)
+        if size == POWER_FRAME_LENGTH and data[0] == POWER_FRAME_HEADER:
+            if (power := data[1] == POWER_ON) != self._state.power:
+                self._state = self._with_power(power)
+            return
+        if size < STATUS_FRAME_LENGTH:
             return
-        if len(data) < 11:
+        self._state_reported_at = now = self.loop.time()
+        if self._update_sent_at is not None:
+            self._metrics.observe(UPDATE_ROUND_TRIP, now - self._update_sent_at)
+            self._update_sent_at = None
+        fields = unpack_status_fields(data)
+        if fields == self._status_fields and self._state is self._status_state:
+            if self._confirm_sent:
+                self._check_confirmations(self._state)
             return
-        model_num = data[1]
-        on = data[2] == 0x23
-        preset_pattern = data[3]
-        mode = data[4]
-        speed = data[5]
-        r = data[6]
-        g = data[7]
-        b = data[8]
-        w = data[9]
-        version = data[10]
-        self._state = LEDBLEState(
-            on, (r, g, b), w, model_num, preset_pattern, mode, speed, version
+        state = status_frame_state(fields)
+        # Every field but power maps one to one onto the state, so when the
+        # state is still the one the last frame left and the power byte is
+        # the same, a different frame is a different state.
+        if self._state is self._status_state and fields[1] == self._status_fields[1]:
+            changed = True
+        else:
+            changed = state != self._state
+        if changed:
+            self._state = state
+        self._status_fields = fields
+        self._status_state = self._state
+
+        if debug:
+            _LOGGER.debug(
+                "%s: Notification received; RSSI: %s: %s %s",
+                self.name,
+                self.rssi,
+                data.hex(),
+                self._state,
+            )
+
+        if not self._resolve_protocol_event.is_set() or self._protocol_unverified:
+            self._set_protocol_resolved()
+            self._update_protocol(state.model_num, state.version_num)
+
+        if changed:
+            self._fire_callbacks()
+        if self._confirm_sent:
+            self._check_confirmations(self._state)
+
+    def _update_protocol(self, model_num: int, version_num: int) -> None:
+        """Select the protocol for the model and version the device reported."""
+        model_data = get_model(model_num)
+        cached = self._cached_device(
+            model_num, version_num, model_data.protocol_for_version_num(version_num)
+        )
+        if self._protocol_unverified:
+            self._protocol_unverified = False
+            if self._device_cache and self._device_cache.get(self._address) == cached:
+                return
+            _LOGGER.debug(
+                "%s: Unverified protocol replaced, device reports %s",
+                self.name,
+                cached,
+            )
+        self._model_data = model_data
+        self._set_protocol(cached.protocol)
+        if self._device_cache:
+            self._device_cache.set(self._address, cached)
+
+    def _cached_device(
+        self, model_num: int, version_num: int, protocol: str
+    ) -> CachedDevice:
+        """Return the cache entry describing the device as last seen."""
+        read_uuid, write_uuid = self._char_uuids or (None, None)
+        return CachedDevice(
+            model_num,
+            version_num,
+            protocol,
+            read_uuid,
+            write_uuid,
+            self._refresh_services,
         )
 
-        _LOGGER.debug(
-            "%s: Notification received; RSSI: %s: %s %s",
-            self.name,
-            self.rssi,
-            data.hex(),
-            self._state,
+    def _load_cached_protocol(self, cached: CachedDevice) -> None:
+        """Select the protocol remembered for the device without a handshake."""
+        try:
+            self._set_protocol(cached.protocol)
+        except ValueError:
+            _LOGGER.debug("%s: Ignoring cached entry %s", self.name, cached)
+            return
+        _LOGGER.debug("%s: Using cached protocol %s", self.name, cached)
+        self._model_data = get_model(cached.model_num)
+        self._state = replace(
+            self._state, model_num=cached.model_num, version_num=cached.version_num
         )
+        # Confirmed (or corrected) by the next full state notification.
+        self._protocol_unverified = True
+        self._set_protocol_resolved()
 
-        if not self._resolve_protocol_event.is_set():
-            self._resolve_protocol_event.set()
-            self._model_data = get_model(model_num)
-            self._set_protocol(self._model_data.protocol_for_version_num(version))
+    def _preselect_protocol(self) -> None:
+        """Select the protocol of the model the advertised name identifies.
 
-        self._fire_callbacks()
+        Only a model speaking the same protocol at every firmware version
+        is preselected; the next full state notification confirms it.
+        """
+        name = (
+            self._advertisement_data and self._advertisement_data.local_name
+        ) or self._ble_device.name
+        model_data = get_model_for_name(name)
+        if model_data is None or len(model_data.protocols) != 1:
+            return
+        try:
+            self._set_protocol(model_data.protocols[0].protocol)
+        except ValueError:
+            _LOGGER.debug("%s: Ignoring model %s", self.name, model_data)
+            return
+        _LOGGER.debug("%s: Using protocol of model %s", self.name, model_data)
+        self._model_data = model_data
+        self._state = replace(self._state, model_num=model_data.model_num)
+        self._protocol_unverified = True
+        self._set_protocol_resolved()
+
+    async def _verify_cached_protocol(self) -> None:
+        """Query the state so the cached protocol gets checked.
+
+        Cancelled when the connection is dropped before the query is sent.
+        """
+        if not (self._client and self._client.is_connected):
+            return
+        try:
+            await self._send_command_while_connected([STATE_COMMAND])
+        except (*BLEAK_EXCEPTIONS, CharacteristicMissingError) as ex:
+            _LOGGER.debug("%s: Failed to verify cached protocol: %s", self.name, ex)
+
+    @contextmanager
+    def _hold_connection(self) -> Iterator[None]:
+        """Keep the idle timer off until the block exits, then re-arm it."""
+        self._connection_holds += 1
+        if self._disconnect_timer:
+            self._disconnect_timer.cancel()
+            self._disconnect_timer = None
+        try:
+            yield
+        finally:
+            self._connection_holds -= 1
+            if (
+                not self._connection_holds
+                and self._client
+                and self._client.is_connected
+            ):
+                self._reset_disconnect_timer()
 
     def _reset_disconnect_timer(self) -> None:
         """Reset disconnect timer."""
         if self._disconnect_timer:
             self._disconnect_timer.cancel()
         self._expected_disconnect = False
+        if self._connection_holds:
+            self._disconnect_timer = None
+            return
+        self._idle_timeout = self._disconnect_policy.idle_timeout()
         self._disconnect_timer = self.loop.call_later(
-            DISCONNECT_DELAY, self._disconnect
+            self._idle_timeout, self._disconnect
         )
 
     def _disconnected(self, client: BleakClientWithServiceCache) -> None:
         """Disconnected callback."""
+        if self._connection_scheduler and client is self._client:
+            self._connection_scheduler.release(self._address)
         if self._expected_disconnect:
             _LOGGER.debug(
                 "%s: Disconnected from device; RSSI: %s", self.name, self.rssi
@@ -506,12 +1496,35 @@ class LEDBLE:
             self.rssi,
         )
 
+    def _evict_connection(self) -> bool:
+        """Disconnect early so another device can have the connection slot.
+
+        Returns whether the device is disconnecting.
+        """
+        if (
+            (
+                self._lazy_operation_lock is not None
+                and self._lazy_operation_lock.locked()
+            )
+            or self._connection_holds
+            or not self._client
+        ):
+            return False
+        _LOGGER.debug("%s: Releasing connection slot", self.name)
+        if self._disconnect_timer:
+            self._disconnect_timer.cancel()
+            self._disconnect_timer = None
+        self._create_background_task(self._execute_disconnect())
+        return True
+
     def _disconnect(self) -> None:
         """Disconnect from device."""
         self._disconnect_timer = None
         self._create_background_task(self._execute_timed_disconnect())
 
-    def _create_background_task(self, coro: Coroutine[Any, Any, None]) -> None:
+    def _create_background_task(
+        self, coro: Coroutine[Any, Any, None]
+    ) -> asyncio.Task[None]:
         """Schedule a coroutine and keep a strong reference until it finishes.
 
         asyncio only holds a weak reference to running tasks, so the task is
@@ -522,19 +1535,27 @@ class LEDBLE:
         task = asyncio.create_task(coro)
         self._background_tasks.add(task)
         task.add_done_callback(self._background_tasks.discard)
+        return task
 
     async def _execute_timed_disconnect(self) -> None:
         """Execute timed disconnection."""
         _LOGGER.debug(
             "%s: Disconnecting after timeout of %s",
             self.name,
-            DISCONNECT_DELAY,
+            self._idle_timeout,
+        )
+        stats = self._connection_stats
+        self._connection_stats = replace(
+            stats, idle_disconnects=stats.idle_disconnects + 1
         )
         await self._execute_disconnect()
 
     async def _execute_disconnect(self) -> None:
         """Execute disconnection."""
         async with self._connect_lock:
+            if (verify := self._verify_task) and verify is not asyncio.current_task():
+                verify.cancel()
+            self._verify_task = None
             read_char = self._read_char
             client = self._client
             self._expected_disconnect = True
@@ -550,24 +1571,51 @@ class LEDBLE:
                             "%s: Failed to stop notifications", self.name, exc_info=True
                         )
                 await client.disconnect()
+            if self._connection_scheduler:
+                self._connection_scheduler.release(self._address)
 
-    @retry_bluetooth_connection_error(DEFAULT_ATTEMPTS)
     async def _send_command_locked(self, commands: list[bytes]) -> None:
+        """Send command to device and read response, retrying on errors.
+
+        The retry policy decides how often and after what pause; each
+        retry reconnects first if the failed attempt dropped the connection.
+        """
+        self._command_attempts = 0
+        try:
+            while True:
+                self._command_attempts += 1
+                try:
+                    if self._command_attempts > 1 and not (
+                        self._client and self._client.is_connected
+                    ):
+                        await self._ensure_connected(retry=True)
+                    await self._send_command_attempt(commands)
+                    break
+                except RETRY_EXCEPTIONS as ex:
+                    backoff = self._retry_policy.backoff(self._command_attempts, ex)
+                    if backoff is None:
+                        raise
+                    _LOGGER.debug(
+                        "%s: Attempt %s failed, retrying in %.2fs: %s",
+                        self.name,
+                        self._command_attempts,
+                        backoff,
+                        ex,
+                    )
+                    await asyncio.sleep(backoff)
+        except Exception:
+            self._circuit_breaker.record_failure(self.loop.time())
+            raise
+        else:
+            self._circuit_breaker.record_success()
+        finally:
+            self._metrics.increment(COMMANDS)
+            self._metrics.observe(COMMAND_RETRIES, self._command_attempts - 1)
+
+    async def _send_command_attempt(self, commands: list[bytes]) -> None:
         """Send command to device and read response."""
         try:
             await self._execute_command_locked(commands)
-        except BleakDBusError as ex:
-            # Disconnect so we can reset state and try again
-            await asyncio.sleep(BLEAK_BACKOFF_TIME)
-            _LOGGER.debug(
-                "%s: RSSI: %s; Backing off %ss; Disconnecting due to error: %s",
-                self.name,
-                self.rssi,
-                BLEAK_BACKOFF_TIME,
-                ex,
-            )
-            await self._execute_disconnect()
-            raise
         except BleakError as ex:
             # Disconnect so we can reset state and try again
             _LOGGER.debug(
@@ -576,15 +1624,53 @@ class LEDBLE:
             await self._execute_disconnect()
             raise
 
-    async def _send_command(self, commands: list[bytes] | bytes) -> None:
+    async def _send_command(self, commands: list[bytes] | bytes | bytearray) -> None:
         """Send command to device and read response."""
         await self._ensure_connected()
         await self._resolve_protocol()
         if not isinstance(commands, list):
-            commands = [commands]
+            commands = [bytes(commands)]
+        # Anything that is not a levels change must keep its place in line,
+        # so later levels frames may no longer jump ahead by merging into
+        # the frame queued before this command.
+        self._pending_levels = None
         await self._send_command_while_connected(commands)
 
-    async def _send_command_while_connected(self, commands: list[bytes]) -> None:
+    async def _send_levels_command(self, commands: list[bytes]) -> bool:
+        """Send a levels change, coalescing it with a queued one if enabled.
+
+        Returns False if the frame was superseded by a newer levels change
+        before it could be written, in which case the caller must not apply
+        it to the state.
+        """
+        if not self._coalesce_levels:
+            await self._send_command(commands)
+            return True
+        await self._ensure_connected()
+        await self._resolve_protocol()
+        if pending := self._pending_levels:
+            _LOGGER.debug("%s: Coalescing levels change into queued frame", self.name)
+            pending.commands = commands
+            await pending.done.wait()
+            if pending.error:
+                raise pending.error
+            return pending.commands is commands
+        pending = _PendingLevels(commands)
+        self._pending_levels = pending
+        try:
+            await self._send_command_while_connected(commands, pending)
+        except BaseException as ex:
+            pending.error = ex
+            raise
+        finally:
+            if self._pending_levels is pending:
+                self._pending_levels = None
+            pending.done.set()
+        return pending.commands is commands
+
+    async def _send_command_while_connected(
+        self, commands: list[bytes], pending: _PendingLevels | None = None
+    ) -> None:
         """Send command to device and read response."""
         _LOGGER.debug(
             "%s: Sending commands %s",
@@ -597,7 +1683,15 @@ class LEDBLE:
                 self.name,
                 self.rssi,
             )
+        waiting = self.loop.time()
         async with self._operation_lock:
+            self._metrics.observe(LOCK_WAIT, self.loop.time() - waiting)
+            if pending is not None:
+                # Once the lock is held the frame is committed; pick up the
+                # newest levels and stop accepting replacements.
+                if self._pending_levels is pending:
+                    self._pending_levels = None
+                commands = pending.commands
             try:
                 await self._send_command_locked(commands)
                 return
@@ -631,35 +1725,112 @@ class LEDBLE:
             raise CharacteristicMissingError("Read characteristic missing")
         if not self._write_char:
             raise CharacteristicMissingError("Write characteristic missing")
-        for command in commands:
-            await self._client.write_gatt_char(self._write_char, command, False)
+        if self._write_window == 1 or len(commands) == 1:
+            for command in commands:
+                started = self.loop.time()
+                await self._client.write_gatt_char(self._write_char, command, False)
+                self._metrics.observe(WRITE_LATENCY, self.loop.time() - started)
+            return
+        await self._execute_pipelined_writes(self._client, self._write_char, commands)
+
+    async def _execute_pipelined_writes(
+        self,
+        client: BleakClientWithServiceCache,
+        write_char: BleakGATTCharacteristic,
+        commands: list[bytes],
+    ) -> None:
+        """Write commands with up to ``write_window`` writes in flight.
+
+        Writes are started in order so the stack queues them in order; the
+        first failure cancels the writes still outstanding and is raised.
+        """
+        in_flight: set[asyncio.Task[None]] = set()
+        try:
+            for command in commands:
+                if len(in_flight) >= self._write_window:
+                    done, in_flight = await asyncio.wait(
+                        in_flight, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    # Retrieve every exception, not just the one raised, so
+                    # none is logged as never retrieved.
+                    errors = [task.exception() for task in done]
+                    if error := next((exc for exc in errors if exc), None):
+                        raise error
+                task = self.loop.create_task(
+                    client.write_gatt_char(write_char, command, False)
+                )
+                task.add_done_callback(self._write_done_callback(self.loop.time()))
+                in_flight.add(task)
+            await asyncio.gather(*in_flight)
+        finally:
+            for task in in_flight:
+                if task.done():
+                    if not task.cancelled():
+                        task.exception()
+                else:
+                    task.cancel()
+
+    def _write_done_callback(
+        self, started: float
+    ) -> Callable[[asyncio.Task[None]], None]:
+        """Return a done callback recording the latency of a pipelined write."""
+
+        def _write_done(task: asyncio.Task[None]) -> None:
+            if not task.cancelled() and task.exception() is None:
+                self._metrics.observe(WRITE_LATENCY, self.loop.time() - started)
+
+        return _write_done
 
     def _resolve_characteristics(self, services: BleakGATTServiceCollection) -> bool:
-        """Resolve characteristics."""
+        """Resolve characteristics, trying the remembered pair first."""
         # Reset first so a partial resolve from a prior (now-disconnected)
         # attempt can't satisfy the read-and-write check with stale objects.
         self._read_char = None
         self._write_char = None
+        if (
+            self._char_uuids is None
+            and self._device_cache
+            and (cached := self._device_cache.get(self._address))
+            and cached.read_uuid
+            and cached.write_uuid
+        ):
+            self._char_uuids = (cached.read_uuid, cached.write_uuid)
+        if self._char_uuids:
+            read_uuid, write_uuid = self._char_uuids
+            read_char = services.get_characteristic(read_uuid)
+            write_char = services.get_characteristic(write_uuid)
+            if read_char and write_char:
+                record_characteristic_lookup(True)
+                self._read_char = read_char
+                self._write_char = write_char
+                return True
+        record_characteristic_lookup(False)
         for characteristic in POSSIBLE_READ_CHARACTERISTIC_UUIDS:
             if char := services.get_characteristic(characteristic):
                 self._read_char = char
+                read_uuid = characteristic
                 break
         for characteristic in POSSIBLE_WRITE_CHARACTERISTIC_UUIDS:
             if char := services.get_characteristic(characteristic):
                 self._write_char = char
+                write_uuid = characteristic
                 break
-        return bool(self._read_char and self._write_char)
+        if self._read_char and self._write_char:
+            self._char_uuids = (read_uuid, write_uuid)
+            return True
+        return False
 
     async def _resolve_protocol(self) -> None:
         """Resolve protocol."""
         if self._resolve_protocol_event.is_set():
             return
+        started = self.loop.time()
         await self._send_command_while_connected([STATE_COMMAND])
         async with asyncio_timeout(10):
             await self._resolve_protocol_event.wait()
+        self._metrics.observe(PROTOCOL_RESOLVE_TIME, self.loop.time() - started)
 
     def _set_protocol(self, protocol: str) -> None:
-        cls = PROTOCOL_NAME_TO_CLS.get(protocol)
-        if cls is None:
-            raise ValueError(f"Invalid protocol: {protocol}")
+        cls = protocol_cls(protocol)
         self._protocol = cls()
+        self._command_cache = get_command_cache(cls)
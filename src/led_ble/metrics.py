@@ -0,0 +1,188 @@
+"""Counters and histograms of what the devices spend their time on."""
+
+from __future__ import annotations
+
+import logging
+from bisect import bisect_left
+from collections.abc import Callable
+from dataclasses import dataclass
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds to establish a connection and resolve its characteristics.
+CONNECT_TIME = "connect_time"
+# Calls to establish_connection, including the retry after a services refresh.
+CONNECT_ATTEMPTS = "connect_attempts"
+# Seconds spent on the state query handshake that resolves the protocol.
+PROTOCOL_RESOLVE_TIME = "protocol_resolve_time"
+# Seconds a command waited for the operation lock.
+LOCK_WAIT = "lock_wait"
+# Seconds per GATT write.
+WRITE_LATENCY = "write_latency"
+# Seconds from the state query sent by update() to the status notification.
+UPDATE_ROUND_TRIP = "update_round_trip"
+# Calls to send a batch of commands while holding the operation lock.
+COMMANDS = "commands"
+# Retries needed per command batch.
+COMMAND_RETRIES = "command_retries"
+# Seconds from a confirmed write to the notification reporting its state.
+CONFIRM_LATENCY = "confirm_latency"
+# Confirmed writes the device did not report as applied.
+CONFIRM_FAILURES = "confirm_failures"
+
+# Upper bounds of the histogram buckets; a last bucket takes the rest.
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+RETRY_BUCKETS = (0, 1, 2, 3)
+_BUCKETS = {COMMAND_RETRIES: RETRY_BUCKETS}
+
+MetricsSink = Callable[[str | None, str, float], None]
+
+_SINKS: list[MetricsSink] = []
+
+
+@dataclass(frozen=True)
+class HistogramSnapshot:
+    bounds: tuple[float, ...]  # The upper bound of each bucket but the last
+    buckets: tuple[int, ...]  # The observations per bucket
+    count: int  # The number of observations
+    total: float  # The sum of the observations
+
+    @property
+    def mean(self) -> float:
+        """Return the mean observation."""
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Return the bucket bound below which a q fraction of observations fall.
+
+        Observations past the last bound report infinity.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, observations in zip(self.bounds, self.buckets):
+            seen += observations
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    counters: dict[str, int]  # Counter totals by metric name
+    histograms: dict[str, HistogramSnapshot]  # Histograms by metric name
+
+
+class _Histogram:
+    __slots__ = ("bounds", "buckets", "count", "total")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def snapshot(self) -> HistogramSnapshot:
+        return HistogramSnapshot(
+            self.bounds, tuple(self.buckets), self.count, self.total
+        )
+
+
+class Metrics:
+    """Counters and histograms, rolled up into a parent.
+
+    Every recorded value is also handed to the sinks added with
+    ``add_metrics_sink``, tagged with the source (a device address).
+    """
+
+    __slots__ = ("_counters", "_histograms", "_parent", "_source")
+
+    def __init__(self, source: str | None = None, parent: Metrics | None = None):
+        """Init the metrics."""
+        self._source = source
+        self._parent = parent
+        self._counters: dict[str, int] = {}
+        self._histograms: dict[str, _Histogram] = {}
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Add value to a counter."""
+        metrics: Metrics | None = self
+        while metrics is not None:
+            metrics._counters[name] = metrics._counters.get(name, 0) + value
+            metrics = metrics._parent
+        if _SINKS:
+            self._emit(name, value)
+
+    def observe(self, name: str, value: float) -> None:
+        """Add an observation to a histogram."""
+        metrics: Metrics | None = self
+        while metrics is not None:
+            if (histogram := metrics._histograms.get(name)) is None:
+                histogram = metrics._histograms[name] = _Histogram(
+                    _BUCKETS.get(name, LATENCY_BUCKETS)
+                )
+            histogram.observe(value)
+            metrics = metrics._parent
+        if _SINKS:
+            self._emit(name, value)
+
+    def _emit(self, name: str, value: float) -> None:
+        for sink in _SINKS:
+            try:
+                sink(self._source, name, value)
+            except Exception:
+                _LOGGER.exception("Error in metrics sink %s", sink)
+
+    def snapshot(self) -> MetricsSnapshot:
+        """Return the current values."""
+        return MetricsSnapshot(
+            dict(self._counters),
+            {name: hist.snapshot() for name, hist in self._histograms.items()},
+        )
+
+    def reset(self) -> None:
+        """Drop every value recorded so far."""
+        self._counters.clear()
+        self._histograms.clear()
+
+
+GLOBAL_METRICS = Metrics()
+
+
+def metrics_snapshot() -> MetricsSnapshot:
+    """Return the values recorded across all devices."""
+    return GLOBAL_METRICS.snapshot()
+
+
+def add_metrics_sink(sink: MetricsSink) -> Callable[[], None]:
+    """Hand every recorded value to sink(source, name, value).
+
+    Returns a function that removes the sink again.
+    """
+    _SINKS.append(sink)
+
+    def remove_sink() -> None:
+        _SINKS.remove(sink)
+
+    return remove_sink
@@ -1,33 +1,88 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+import os
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from functools import cache, lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
 
-from flux_led.const import COLOR_MODE_RGBW, COLOR_MODES_RGB_W
-from flux_led.models_db import MinVersionProtocol
-from flux_led.protocol import PROTOCOL_LEDENET_ORIGINAL_RGBW
+if TYPE_CHECKING:
+    from flux_led.base_device import PROTOCOL_TYPES
+
+# The flux_led protocol and color mode names the models refer to, spelled
+# out so the model table is built without importing flux_led.
+PROTOCOL_LEDENET_ORIGINAL_RGBW = "LEDENET_ORIGINAL_RGBW"
+COLOR_MODE_RGB = "RGB"
+COLOR_MODE_DIM = "DIM"
+COLOR_MODE_RGBW = "RGBW"
+COLOR_MODES_RGB_W = {COLOR_MODE_RGB, COLOR_MODE_DIM}
 
 DEFAULT_MODEL = 0xE3
 
 
+@dataclass
+class MinVersionProtocol:
+    min_version: int  # The lowest firmware version speaking the protocol
+    protocol: str  # The flux_led protocol name
+
+
 @dataclass(frozen=True)
 class LEDBLEModel:
     model_num: int  # The model number aka byte 1
     models: list[str]  # The model names from discovery
     description: str  # Description of the model ({type} {color_mode})
-    protocols: list[
-        MinVersionProtocol
-    ]  # The device protocols, must be ordered highest version to lowest version
+    protocols: list[MinVersionProtocol]  # The device protocols, in any order
     color_modes: set[
         str
     ]  # The color modes to use if there is no mode_to_color_mode_mapping
+    # The min versions in ascending order and the protocol of each.
+    _min_versions: tuple[int, ...] = field(init=False, repr=False, compare=False)
+    _protocol_names: tuple[str, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """Validate the protocols and sort them for lookup by version."""
+        if not self.protocols:
+            raise ValueError(f"Model 0x{self.model_num:02X} has no protocols")
+        for protocol in self.protocols:
+            if not isinstance(protocol.min_version, int) or protocol.min_version < 0:
+                raise ValueError(
+                    f"Model 0x{self.model_num:02X} has an invalid min_version "
+                    f"{protocol.min_version!r}"
+                )
+        ordered = sorted(self.protocols, key=lambda protocol: protocol.min_version)
+        min_versions = tuple(protocol.min_version for protocol in ordered)
+        if len(set(min_versions)) != len(min_versions):
+            raise ValueError(
+                f"Model 0x{self.model_num:02X} has several protocols for the same "
+                "min_version"
+            )
+        object.__setattr__(self, "_min_versions", min_versions)
+        object.__setattr__(
+            self, "_protocol_names", tuple(protocol.protocol for protocol in ordered)
+        )
 
     def protocol_for_version_num(self, version_num: int) -> str:
-        protocol = self.protocols[-1].protocol
-        for min_version_protocol in self.protocols:
-            if version_num >= min_version_protocol.min_version:
-                protocol = min_version_protocol.protocol
-                break
-        return protocol
+        """Return the protocol with the highest min_version the version meets.
+
+        Versions below every min_version get the lowest one's protocol.
+        """
+        index = bisect_right(self._min_versions, version_num) - 1
+        return self._protocol_names[max(index, 0)]
+
+
+@cache
+def protocol_cls(protocol: str) -> type[PROTOCOL_TYPES]:
+    """Return the flux_led class implementing the protocol."""
+    from flux_led.base_device import PROTOCOL_NAME_TO_CLS
+
+    if (cls := PROTOCOL_NAME_TO_CLS.get(protocol)) is None:
+        raise ValueError(f"Invalid protocol: {protocol}")
+    # flux_led types the mapping with the base class; every value is one of
+    # the concrete protocol classes.
+    return cast("type[PROTOCOL_TYPES]", cls)
 
 
 MODELS = [
@@ -81,25 +136,123 @@ MODELS = [
 
 MODEL_MAP: dict[int, LEDBLEModel] = {model.model_num: model for model in MODELS}
 
+# The advertised name up to its first separator, such as "Triones:" or
+# "Dream~"; the rest of the name differs from device to device.
+_NAME_PREFIX = re.compile(r"[^:~-]*[:~-]")
+
+# Advertised name prefix -> model, or None where models share the prefix.
+_NAME_PREFIX_MAP: dict[str, LEDBLEModel | None] = {}
+
+# Unknown models kept per model number and fallback protocol.
+UNKNOWN_MODEL_CACHE_SIZE = 256
+
+
+def name_prefix(name: str) -> str | None:
+    """Return the advertised name up to and including its first separator."""
+    if match := _NAME_PREFIX.match(name):
+        return match.group()
+    return None
+
+
+def _index_name_prefixes() -> None:
+    """Rebuild the index of models by advertised name prefix."""
+    _NAME_PREFIX_MAP.clear()
+    for model in MODELS:
+        for name in model.models:
+            if (prefix := name_prefix(name)) is None:
+                continue
+            # A prefix shared by different models does not identify either.
+            known = _NAME_PREFIX_MAP.get(prefix, model)
+            _NAME_PREFIX_MAP[prefix] = model if known is model else None
+
+
+_index_name_prefixes()
+
 
 def get_model(model_num: int, fallback_protocol: str | None = None) -> LEDBLEModel:
     """Return the LEDNETModel for the model_num."""
-    return MODEL_MAP.get(
-        model_num,
-        _unknown_ledble_model(
-            model_num, fallback_protocol or PROTOCOL_LEDENET_ORIGINAL_RGBW
-        ),
+    if (model := MODEL_MAP.get(model_num)) is not None:
+        return model
+    return _unknown_ledble_model(
+        model_num, fallback_protocol or PROTOCOL_LEDENET_ORIGINAL_RGBW
     )
 
 
+def get_model_for_name(name: str | None) -> LEDBLEModel | None:
+    """Return the model a device advertising the name is, if the name tells."""
+    if name and (prefix := name_prefix(name)):
+        return _NAME_PREFIX_MAP.get(prefix)
+    return None
+
+
 def is_known_model(model_num: int) -> bool:
     """Return true of the model is known."""
     return model_num in MODEL_MAP
 
 
+def register_model(model: LEDBLEModel) -> None:
+    """Add a model, replacing the one with the same model number."""
+    if (known := MODEL_MAP.get(model.model_num)) is not None:
+        MODELS[MODELS.index(known)] = model
+    else:
+        MODELS.append(model)
+    MODEL_MAP[model.model_num] = model
+    _index_name_prefixes()
+
+
+def load_models(path: str | os.PathLike[str]) -> list[LEDBLEModel]:
+    """Register the models defined in a JSON file and return them.
+
+    The file holds a list of objects with the fields of ``LEDBLEModel``.
+    ``model_num`` may be a string such as ``"0xA1"``, each protocol is an
+    object with ``min_version`` and ``protocol``, and ``color_modes``
+    defaults to RGB and white. Nothing is registered unless every model
+    in the file is valid.
+    """
+    try:
+        models = [
+            _model_from_definition(entry)
+            for entry in json.loads(Path(path).read_text())
+        ]
+    except (KeyError, TypeError, ValueError) as ex:
+        raise ValueError(f"Invalid model definitions in {path}: {ex!r}") from ex
+    for model in models:
+        for min_version_protocol in model.protocols:
+            try:
+                protocol_cls(min_version_protocol.protocol)
+            except ValueError as ex:
+                raise ValueError(
+                    f"Invalid model definitions in {path}: model "
+                    f"0x{model.model_num:02X}: {ex}"
+                ) from ex
+    for model in models:
+        register_model(model)
+    return models
+
+
+def _model_from_definition(entry: dict[str, Any]) -> LEDBLEModel:
+    """Return the model an entry of a model definitions file describes."""
+    model_num = entry["model_num"]
+    if isinstance(model_num, str):
+        model_num = int(model_num, 0)
+    if not isinstance(model_num, int) or not 0 <= model_num <= 0xFF:
+        raise ValueError(f"model_num must be a byte, got {entry['model_num']}")
+    return LEDBLEModel(
+        model_num=model_num,
+        models=list(entry.get("models", [])),
+        description=entry["description"],
+        protocols=[
+            MinVersionProtocol(protocol["min_version"], protocol["protocol"])
+            for protocol in entry["protocols"]
+        ],
+        color_modes=set(entry.get("color_modes", COLOR_MODES_RGB_W)),
+    )
+
+
 UNKNOWN_MODEL = "Unknown Model"
 
 
+@lru_cache(maxsize=UNKNOWN_MODEL_CACHE_SIZE)
 def _unknown_ledble_model(model_num: int, fallback_protocol: str) -> LEDBLEModel:
     """Create a LEDNETModel for an unknown model_num."""
     return LEDBLEModel(
@@ -3,7 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LEDBLEState:
     power: bool = False
     rgb: tuple[int, int, int] = (0, 0, 0)
@@ -13,3 +13,50 @@ class LEDBLEState:
     mode: int = 0
     speed: int = 0
     version_num: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class StreamStats:
+    frames_received: int  # Frames produced by the source
+    frames_sent: int  # Frames written to the device
+    duration: float  # Seconds the stream held the device
+
+    @property
+    def frames_dropped(self) -> int:
+        """Return the frames superseded before they could be written."""
+        return self.frames_received - self.frames_sent
+
+    @property
+    def fps(self) -> float:
+        """Return the achieved frames per second written to the device."""
+        return self.frames_sent / self.duration if self.duration else 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class ConnectionStats:
+    connects: int = 0  # Connections established
+    reconnects: int = 0  # Connections established after an earlier one ended
+    idle_disconnects: int = 0  # Connections closed by the idle timeout
+    warm_connects: int = 0  # Connections opened ahead of a command
+    warm_hits: int = 0  # Commands that found a warm connection waiting
+    cold_starts: int = 0  # Commands that had to connect first
+    warm_hit_time: float = 0.0  # Seconds warm hits waited for the connection
+    cold_start_time: float = 0.0  # Seconds cold starts waited for the connection
+
+    @property
+    def warm_hit_latency(self) -> float:
+        """Return the mean seconds a warm hit waited for the connection."""
+        return self.warm_hit_time / self.warm_hits if self.warm_hits else 0.0
+
+    @property
+    def cold_start_latency(self) -> float:
+        """Return the mean seconds a cold start waited for the connection."""
+        return self.cold_start_time / self.cold_starts if self.cold_starts else 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class PollStats:
+    polls: int = 0  # update() calls made
+    skipped: int = 0  # Polls skipped because the state was fresh
+    busy: int = 0  # Polls skipped because the previous one was still running
+    failures: int = 0  # update() calls that raised
@@ -0,0 +1,46 @@
+"""Decode the notifications sent by the devices."""
+
+from __future__ import annotations
+
+import struct
+
+from .models import LEDBLEState
+
+POWER_FRAME_HEADER = 0xCC
+POWER_FRAME_LENGTH = 4
+STATUS_FRAME_HEADER = 0x81
+STATUS_FRAME_LENGTH = 11
+# Power byte values, in both the power and the status frame.
+POWER_ON = 0x23
+POWER_OFF = 0x24
+
+# header, model, power, preset pattern, mode, speed, r, g, b, w, version
+_STATUS_FRAME = struct.Struct("x10B")
+# Read the fields of a status frame of at least STATUS_FRAME_LENGTH bytes.
+unpack_status_fields = _STATUS_FRAME.unpack_from
+
+
+def status_frame_state(fields: tuple[int, ...]) -> LEDBLEState:
+    """Return the state described by the raw fields of a status frame."""
+    (
+        model_num,
+        power,
+        preset_pattern,
+        mode,
+        speed,
+        r,
+        g,
+        b,
+        w,
+        version_num,
+    ) = fields
+    return LEDBLEState(
+        power == POWER_ON,
+        (r, g, b),
+        w,
+        model_num,
+        preset_pattern,
+        mode,
+        speed,
+        version_num,
+    )
@@ -0,0 +1,201 @@
+"""Poll the state of many LEDBLE devices, spread over an interval."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+from collections.abc import Iterable
+from dataclasses import dataclass, replace
+
+from .led_ble import LEDBLE
+from .models import PollStats
+from .scheduler import adapter_for_device
+from .util import asyncio_timeout
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds between polls of a device.
+DEFAULT_POLL_INTERVAL = 60.0
+# Fraction of the interval a poll may move early or late, so devices
+# spread out instead of lining up again.
+DEFAULT_POLL_JITTER = 0.1
+# Polls in flight at once per adapter.
+DEFAULT_MAX_POLLS_PER_ADAPTER = 2
+
+
+@dataclass
+class _Entry:
+    device: LEDBLE
+    due: float
+    task: asyncio.Task[None] | None = None
+    removed: bool = False
+
+
+class FleetPoller:
+    """Call ``update()`` on every device once per interval.
+
+    Polls are spread evenly over the interval with random jitter, at most
+    ``max_polls_per_adapter`` run at once on each adapter, and a device
+    that reported its state less than ``max_age`` seconds ago (by default
+    the interval) is skipped until its state grows stale, so devices that
+    notify or advertise their state are rarely polled.
+    """
+
+    def __init__(
+        self,
+        devices: Iterable[LEDBLE] = (),
+        interval: float = DEFAULT_POLL_INTERVAL,
+        jitter: float = DEFAULT_POLL_JITTER,
+        max_polls_per_adapter: int = DEFAULT_MAX_POLLS_PER_ADAPTER,
+        max_age: float | None = None,
+    ) -> None:
+        """Init the poller."""
+        if interval <= 0:
+            raise ValueError(f"interval must be positive, got {interval}")
+        if not 0 <= jitter < 1:
+            raise ValueError(f"jitter must be at least 0 and below 1, got {jitter}")
+        if max_polls_per_adapter < 1:
+            raise ValueError(
+                f"max_polls_per_adapter must be at least 1, got {max_polls_per_adapter}"
+            )
+        self._interval = interval
+        self._jitter = jitter
+        self._max_polls_per_adapter = max_polls_per_adapter
+        self._max_age = interval if max_age is None else max_age
+        self._entries: dict[str, _Entry] = {}
+        # (due, sequence, entry)
+        self._queue: list[tuple[float, int, _Entry]] = []
+        self._sequence = itertools.count()
+        self._adapters: dict[str, asyncio.Semaphore] = {}
+        self._wakeup = asyncio.Event()
+        self._runner: asyncio.Task[None] | None = None
+        self._stats = PollStats()
+        for device in devices:
+            self.add(device)
+
+    @property
+    def devices(self) -> list[LEDBLE]:
+        """Return the polled devices."""
+        return [entry.device for entry in self._entries.values()]
+
+    @property
+    def stats(self) -> PollStats:
+        """Return the poll counts so far."""
+        return self._stats
+
+    def add(self, device: LEDBLE) -> None:
+        """Poll a device, first at a random point within the interval.
+
+        Devices added before ``start`` are spread evenly instead.
+        """
+        self.remove(device)
+        entry = _Entry(device, 0.0)
+        self._entries[device.address] = entry
+        if self._runner is not None:
+            self._schedule(
+                entry, device.loop.time() + random.uniform(0, self._interval)
+            )
+
+    def remove(self, device: LEDBLE) -> None:
+        """Stop polling a device, cancelling its poll in flight."""
+        if entry := self._entries.pop(device.address, None):
+            entry.removed = True
+            if entry.task:
+                entry.task.cancel()
+
+    def start(self) -> None:
+        """Start polling, with the first polls spread over one interval."""
+        if self._runner is not None:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        step = self._interval / max(len(self._entries), 1)
+        for index, entry in enumerate(self._entries.values()):
+            self._schedule(entry, now + index * step)
+        self._runner = loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop polling and cancel the polls in flight."""
+        tasks = [entry.task for entry in self._entries.values() if entry.task]
+        if self._runner is not None:
+            tasks.append(self._runner)
+            self._runner = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queue.clear()
+
+    def _schedule(self, entry: _Entry, due: float) -> None:
+        entry.due = due
+        heapq.heappush(self._queue, (due, next(self._sequence), entry))
+        if self._queue[0][2] is entry:
+            self._wakeup.set()
+
+    def _next_due(self, after: float) -> float:
+        """Return when the poll one jittered interval after a time is due."""
+        jitter = self._interval * self._jitter
+        return after + self._interval + random.uniform(-jitter, jitter)
+
+    def _fresh(self, device: LEDBLE) -> float | None:
+        """Return the age of the state of a device if it is still fresh."""
+        age = device.state_age
+        if age is not None and age < self._max_age:
+            return age
+        return None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            while self._queue and self._queue[0][0] <= now:
+                _, _, entry = heapq.heappop(self._queue)
+                if not entry.removed:
+                    self._poll_due(entry, now)
+            self._wakeup.clear()
+            timeout = self._queue[0][0] - now if self._queue else None
+            try:
+                async with asyncio_timeout(timeout):
+                    await self._wakeup.wait()
+            except asyncio.TimeoutError:
+                pass
+
+    def _poll_due(self, entry: _Entry, now: float) -> None:
+        """Start the poll of a device that is due, unless it can be skipped."""
+        device = entry.device
+        if (age := self._fresh(device)) is not None:
+            # Check again an interval after the device reported its state.
+            self._stats = replace(self._stats, skipped=self._stats.skipped + 1)
+            self._schedule(entry, self._next_due(now - age))
+            return
+        if (due := self._next_due(entry.due)) <= now:
+            # The loop fell behind; do not catch up with a burst of polls.
+            due = self._next_due(now)
+        self._schedule(entry, due)
+        if entry.task is not None:
+            self._stats = replace(self._stats, busy=self._stats.busy + 1)
+            return
+        entry.task = asyncio.get_running_loop().create_task(self._poll(entry))
+
+    async def _poll(self, entry: _Entry) -> None:
+        device = entry.device
+        adapter = adapter_for_device(device.ble_device)
+        if (semaphore := self._adapters.get(adapter)) is None:
+            semaphore = self._adapters[adapter] = asyncio.Semaphore(
+                self._max_polls_per_adapter
+            )
+        try:
+            async with semaphore:
+                # The state may have arrived while waiting for the adapter.
+                if self._fresh(device) is not None:
+                    self._stats = replace(self._stats, skipped=self._stats.skipped + 1)
+                    return
+                self._stats = replace(self._stats, polls=self._stats.polls + 1)
+                await device.update()
+        except Exception as ex:
+            self._stats = replace(self._stats, failures=self._stats.failures + 1)
+            _LOGGER.debug("%s: Poll failed: %s", device.name, ex, exc_info=True)
+        finally:
+            entry.task = None
@@ -0,0 +1,167 @@
+"""Decide when a failed command is retried and when a device is given up on."""
+
+from __future__ import annotations
+
+import random
+from enum import Enum
+from typing import Protocol
+
+from bleak_retry_connector import calculate_backoff_time
+
+# Attempts per command, the first one included.
+DEFAULT_ATTEMPTS = 3
+# Seconds to wait before the first retry.
+DEFAULT_BASE_BACKOFF = 0.25
+# Each retry waits this many times longer than the one before.
+DEFAULT_BACKOFF_MULTIPLIER = 2.0
+# Retries never wait longer than this.
+DEFAULT_MAX_BACKOFF = 5.0
+# Fraction by which a backoff may randomly be shorter or longer, so
+# devices that failed together do not retry together.
+DEFAULT_BACKOFF_JITTER = 0.2
+
+# Consecutive failures that open the circuit.
+DEFAULT_FAILURE_THRESHOLD = 5
+# Seconds an open circuit fails fast before letting a probe through.
+DEFAULT_RESET_TIMEOUT = 30.0
+
+
+class RetryPolicy(Protocol):
+    """Chooses whether and when a failed command is tried again."""
+
+    def backoff(self, attempt: int, error: Exception) -> float | None:
+        """Return the seconds to wait before retrying, or None to give up.
+
+        ``attempt`` is the number of the attempt that failed, from 1.
+        """
+
+
+class ExponentialBackoffPolicy:
+    """Retry a few times, waiting exponentially longer each time.
+
+    The wait never drops below what ``bleak_retry_connector`` recommends for
+    the error, so adapters out of connection slots get their longer pause.
+    """
+
+    def __init__(
+        self,
+        attempts: int = DEFAULT_ATTEMPTS,
+        base: float = DEFAULT_BASE_BACKOFF,
+        multiplier: float = DEFAULT_BACKOFF_MULTIPLIER,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        jitter: float = DEFAULT_BACKOFF_JITTER,
+    ) -> None:
+        """Init the policy."""
+        if attempts < 1:
+            raise ValueError(f"attempts must be at least 1, got {attempts}")
+        if not 0 <= jitter < 1:
+            raise ValueError(f"jitter must be at least 0 and below 1, got {jitter}")
+        self._attempts = attempts
+        self._base = base
+        self._multiplier = multiplier
+        self._max_backoff = max_backoff
+        self._jitter = jitter
+
+    def backoff(self, attempt: int, error: Exception) -> float | None:
+        """Return the seconds to wait before retrying, or None to give up."""
+        if attempt >= self._attempts:
+            return None
+        delay = min(self._max_backoff, self._base * self._multiplier ** (attempt - 1))
+        if self._jitter:
+            delay *= random.uniform(1 - self._jitter, 1 + self._jitter)
+        return max(delay, calculate_backoff_time(error))
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"  # Commands go through
+    OPEN = "open"  # Commands fail fast
+    HALF_OPEN = "half_open"  # One probe may go through
+
+
+class CircuitBreaker:
+    """Stop connecting to a device that keeps failing.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    commands fail fast. Once ``reset_timeout`` has passed, or as soon as
+    the device advertises, the circuit is half-open: one command probes
+    the device and either closes the circuit or opens it again.
+    """
+
+    __slots__ = (
+        "_failure_threshold",
+        "_failures",
+        "_opened_at",
+        "_probe_at",
+        "_reset_timeout",
+        "_state",
+    )
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+    ) -> None:
+        """Init the circuit breaker."""
+        if failure_threshold < 1:
+            raise ValueError(
+                f"failure_threshold must be at least 1, got {failure_threshold}"
+            )
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_at: float | None = None
+
+    @property
+    def state(self) -> CircuitState:
+        """Return the state of the circuit."""
+        return self._state
+
+    @property
+    def failures(self) -> int:
+        """Return the consecutive failures so far."""
+        return self._failures
+
+    def allow(self, now: float) -> bool:
+        """Return if a command may try the device at ``now``.
+
+        While half-open only one probe is let through at a time; a probe
+        that never reports back is replaced after ``reset_timeout``.
+        """
+        if self._state is CircuitState.OPEN:
+            if now - self._opened_at < self._reset_timeout:
+                return False
+            self._state = CircuitState.HALF_OPEN
+            self._probe_at = None
+        if self._state is CircuitState.HALF_OPEN:
+            if (
+                self._probe_at is not None
+                and now - self._probe_at < self._reset_timeout
+            ):
+                return False
+            self._probe_at = now
+        return True
+
+    def record_success(self) -> None:
+        """Record that a command reached the device."""
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._probe_at = None
+
+    def record_failure(self, now: float) -> None:
+        """Record that a command failed at ``now``."""
+        self._failures += 1
+        if (
+            self._state is CircuitState.HALF_OPEN
+            or self._failures >= self._failure_threshold
+        ):
+            self._state = CircuitState.OPEN
+            self._opened_at = now
+            self._probe_at = None
+
+    def device_seen(self) -> None:
+        """Let the next command probe an open circuit; the device advertised."""
+        if self._state is CircuitState.OPEN:
+            self._state = CircuitState.HALF_OPEN
+            self._probe_at = None
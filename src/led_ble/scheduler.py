@@ -0,0 +1,246 @@
+"""Share Bluetooth adapter connection slots between devices."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+from bleak.backends.device import BLEDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+# Connection attempts allowed at once per adapter; BlueZ handles LE
+# connection setup largely one device at a time.
+DEFAULT_MAX_CONNECTING = 2
+# Live connections allowed at once per adapter.
+DEFAULT_MAX_CONNECTIONS = 5
+# Connections opened ahead of a command allowed at once across adapters.
+DEFAULT_MAX_WARM_CONNECTIONS = 2
+
+# A command is waiting on the connection.
+PRIORITY_COMMAND = 0
+# Nothing is waiting on the connection (pre-connects, housekeeping).
+PRIORITY_IDLE = 1
+
+DEFAULT_ADAPTER = "default"
+
+# Asks a device to disconnect; returns whether it is disconnecting.
+EvictCallback = Callable[[], bool]
+
+
+def adapter_for_device(ble_device: BLEDevice) -> str:
+    """Return the name of the adapter a device is reached through."""
+    details = ble_device.details
+    if isinstance(details, dict):
+        if source := details.get("source"):
+            return str(source)
+        if path := details.get("path"):
+            # /org/bluez/hci0/dev_AA_BB_CC_DD_EE_FF
+            parts = str(path).split("/")
+            if len(parts) > 3:
+                return parts[3]
+    return DEFAULT_ADAPTER
+
+
+class AdapterUsage(NamedTuple):
+    connecting: int
+    connections: int
+    waiting: int
+
+
+@dataclass
+class _Holder:
+    last_used: float
+    evict: EvictCallback | None
+    warm: bool = False  # Opened ahead of a command and not used yet
+    evicting: bool = False  # Disconnecting for a waiting command
+
+
+@dataclass
+class _AdapterSlots:
+    name: str
+    connecting: set[str] = field(default_factory=set)
+    connections: dict[str, _Holder] = field(default_factory=dict)
+    # (priority, sequence, address, future, evict)
+    waiters: list[tuple[int, int, str, asyncio.Future[None], EvictCallback | None]] = (
+        field(default_factory=list)
+    )
+
+
+class ConnectionScheduler:
+    """Limit connection attempts and live connections per adapter.
+
+    Devices call ``acquire`` before connecting, ``attempt_done`` once the
+    attempt finishes and ``release`` when the connection is gone. Waiters
+    are served in order, with devices that have a command waiting ahead of
+    idle ones. When a commanded device is blocked on a full adapter the
+    least recently used idle connection is asked to let go via the evict
+    callback it registered, unused warm connections first. Each blocked
+    command has at most one connection released for it.
+
+    Connections acquired at ``PRIORITY_IDLE`` are warm until ``touch``
+    records a command on them; ``warm_available`` caps how many may exist.
+    """
+
+    def __init__(
+        self,
+        max_connecting: int = DEFAULT_MAX_CONNECTING,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        max_warm_connections: int = DEFAULT_MAX_WARM_CONNECTIONS,
+    ) -> None:
+        """Init the scheduler."""
+        if max_connecting < 1 or max_connections < 1:
+            raise ValueError("max_connecting and max_connections must be at least 1")
+        if max_warm_connections < 0:
+            raise ValueError("max_warm_connections must not be negative")
+        self._max_connecting = max_connecting
+        self._max_connections = max_connections
+        self._max_warm_connections = max_warm_connections
+        self._adapters: dict[str, _AdapterSlots] = {}
+        self._holders: dict[str, _AdapterSlots] = {}
+        self._sequence = itertools.count()
+
+    def usage(self) -> dict[str, AdapterUsage]:
+        """Return slot usage by adapter."""
+        return {
+            name: AdapterUsage(
+                len(slots.connecting),
+                len(slots.connections),
+                sum(not waiter[3].done() for waiter in slots.waiters),
+            )
+            for name, slots in self._adapters.items()
+        }
+
+    def warm_available(self, ble_device: BLEDevice) -> bool:
+        """Return if a warm connection to the device may be opened now."""
+        slots = self._adapters.get(adapter_for_device(ble_device))
+        if slots and (
+            any(not waiter[3].done() for waiter in slots.waiters)
+            or len(slots.connecting) >= self._max_connecting
+            or len(slots.connections) >= self._max_connections
+        ):
+            return False
+        warm = sum(
+            holder.warm
+            for slots in self._adapters.values()
+            for holder in slots.connections.values()
+        )
+        return warm < self._max_warm_connections
+
+    async def acquire(
+        self,
+        ble_device: BLEDevice,
+        priority: int = PRIORITY_COMMAND,
+        evict: EvictCallback | None = None,
+    ) -> None:
+        """Wait for a connection attempt slot for the device."""
+        address = ble_device.address
+        adapter = adapter_for_device(ble_device)
+        if (holding := self._holders.get(address)) and holding.name != adapter:
+            # The device moved to another adapter; give the old slot back.
+            self.release(address)
+        if (slots := self._adapters.get(adapter)) is None:
+            slots = self._adapters[adapter] = _AdapterSlots(adapter)
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            slots.waiters, (priority, next(self._sequence), address, future, evict)
+        )
+        self._grant(slots)
+        if not future.done():
+            _LOGGER.debug("%s: Waiting for a connection slot on %s", address, adapter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted while being cancelled; hand the slot back.
+                self.attempt_done(address)
+                self.release(address)
+            raise
+
+    def attempt_done(self, address: str) -> None:
+        """Free the attempt slot of a device, connected or not."""
+        if slots := self._holders.get(address):
+            slots.connecting.discard(address)
+            self._grant(slots)
+
+    def release(self, address: str) -> None:
+        """Free the connection slot of a device."""
+        if slots := self._holders.pop(address, None):
+            slots.connecting.discard(address)
+            del slots.connections[address]
+            self._grant(slots)
+
+    def touch(self, address: str) -> None:
+        """Record that a device used its connection for a command."""
+        if slots := self._holders.get(address):
+            holder = slots.connections[address]
+            holder.last_used = time.monotonic()
+            holder.warm = False
+
+    def _grant(self, slots: _AdapterSlots) -> None:
+        """Hand free slots to waiters in priority order."""
+        waiters = slots.waiters
+        while waiters:
+            priority, _, address, future, evict = waiters[0]
+            if future.done():
+                heapq.heappop(waiters)
+                continue
+            if len(slots.connecting) >= self._max_connecting:
+                return
+            if (
+                address not in slots.connections
+                and len(slots.connections) >= self._max_connections
+            ):
+                if priority == PRIORITY_COMMAND:
+                    self._evict_idle(slots)
+                return
+            heapq.heappop(waiters)
+            slots.connecting.add(address)
+            if address in slots.connections:
+                slots.connections[address].evict = evict
+            else:
+                slots.connections[address] = _Holder(
+                    time.monotonic(), evict, priority != PRIORITY_COMMAND
+                )
+                self._holders[address] = slots
+            future.set_result(None)
+
+    def _evict_idle(self, slots: _AdapterSlots) -> None:
+        """Ask the least recently used connections to disconnect.
+
+        Connections already disconnecting count against the blocked
+        commands, so repeated grants do not ask for them again.
+        """
+        blocked = sum(
+            priority == PRIORITY_COMMAND
+            and not future.done()
+            and address not in slots.connections
+            for priority, _, address, future, _ in slots.waiters
+        )
+        evicting = sum(holder.evicting for holder in slots.connections.values())
+        candidates = sorted(
+            (not holder.warm, holder.last_used, address, holder)
+            for address, holder in slots.connections.items()
+            if holder.evict is not None
+            and not holder.evicting
+            and address not in slots.connecting
+        )
+        for *_, address, holder in candidates:
+            if evicting >= blocked:
+                return
+            assert holder.evict is not None  # nosec
+            if not holder.evict():
+                continue
+            _LOGGER.debug(
+                "%s: Releasing idle connection on %s for a waiting command",
+                address,
+                slots.name,
+            )
+            holder.evicting = True
+            evicting += 1
@@ -0,0 +1,133 @@
+"""Deliver state changes to registered callbacks."""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+from collections.abc import Awaitable, Callable, Coroutine, Iterable
+from dataclasses import fields as dataclass_fields
+from typing import Any
+
+from .models import LEDBLEState
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_FIELDS = frozenset(field.name for field in dataclass_fields(LEDBLEState))
+
+StateCallback = Callable[[LEDBLEState], "Awaitable[None] | None"]
+
+
+class Subscription:
+    """A callback registered for state changes.
+
+    With ``fields`` the callback only runs when one of those state fields
+    changed since the previous state it was offered. With ``interval`` it
+    runs at most once per interval: changes arriving sooner are held back
+    and the newest state is delivered when the interval is up. A callback
+    returning an awaitable runs as a task, one at a time; changes arriving
+    while it runs are delivered, newest only, once it finishes.
+    """
+
+    __slots__ = (
+        "_callback",
+        "_create_task",
+        "_direct",
+        "_fields",
+        "_interval",
+        "_loop",
+        "_next_at",
+        "_pending",
+        "_running",
+        "_seen",
+        "_timer",
+    )
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        callback: StateCallback,
+        create_task: Callable[[Coroutine[Any, Any, None]], object],
+        fields: Iterable[str] | None = None,
+        interval: float = 0.0,
+    ) -> None:
+        """Init the subscription."""
+        if fields is not None:
+            fields = frozenset(fields)
+            if unknown := fields - STATE_FIELDS:
+                raise ValueError(f"Unknown state fields: {', '.join(sorted(unknown))}")
+        if interval < 0:
+            raise ValueError(f"interval must not be negative, got {interval}")
+        self._loop = loop
+        self._callback = callback
+        self._create_task = create_task
+        self._fields: frozenset[str] | None = fields
+        self._interval = interval
+        # Plain subscriptions run the callback inline for every state.
+        self._direct = (
+            fields is None
+            and not interval
+            and not inspect.iscoroutinefunction(callback)
+        )
+        self._seen: LEDBLEState | None = None
+        self._pending: LEDBLEState | None = None
+        self._next_at = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+        self._running = False
+
+    def notify(self, state: LEDBLEState) -> None:
+        """Offer the current state to the subscriber."""
+        if self._direct:
+            self._run(state)
+            return
+        if self._fields is not None:
+            seen, self._seen = self._seen, state
+            if seen is not None and all(
+                getattr(seen, name) == getattr(state, name) for name in self._fields
+            ):
+                return
+        self._pending = state
+        self._schedule()
+
+    def cancel(self) -> None:
+        """Drop any held back state."""
+        self._pending = None
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def _schedule(self) -> None:
+        """Deliver the pending state now or when the interval is up."""
+        if self._timer or self._running or self._pending is None:
+            return
+        if (delay := self._next_at - self._loop.time()) > 0:
+            self._timer = self._loop.call_later(delay, self._deliver)
+        else:
+            self._deliver()
+
+    def _deliver(self) -> None:
+        """Deliver the pending state."""
+        self._timer = None
+        state, self._pending = self._pending, None
+        if state is None:
+            return
+        if self._interval:
+            self._next_at = self._loop.time() + self._interval
+        self._run(state)
+
+    def _run(self, state: LEDBLEState) -> None:
+        """Run the callback, as a task if it returns an awaitable."""
+        result = self._callback(state)
+        if inspect.isawaitable(result):
+            self._running = True
+            self._create_task(self._wait(result))
+
+    async def _wait(self, result: Awaitable[None]) -> None:
+        """Wait for an async callback, then deliver what arrived meanwhile."""
+        try:
+            await result
+        except Exception:
+            _LOGGER.exception("Error in state callback %s", self._callback)
+        finally:
+            self._running = False
+            self._schedule()
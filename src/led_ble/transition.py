@@ -0,0 +1,40 @@
+"""Frame generation for client-side transitions."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+# Upper bound on the frame rate of a transition; the effective rate is
+# whatever the link sustains below this, with late frames dropped.
+TRANSITION_FPS = 50
+
+
+def transition_steps(duration: float) -> int:
+    """Return the number of frames to precompute for a transition."""
+    return max(1, int(duration * TRANSITION_FPS))
+
+
+def interpolate_levels(
+    start: Sequence[int], end: Sequence[int], steps: int
+) -> list[tuple[int, tuple[int, ...]]]:
+    """Return ``(step, levels)`` pairs for a linear fade from start to end.
+
+    Step ``i`` holds the levels ``i / steps`` of the way to ``end``. Frames
+    that would repeat the previous levels are collapsed away so a slow fade
+    across a narrow range does not rewrite identical bytes. The final entry
+    is always the target.
+    """
+    target = tuple(end)
+    frames: list[tuple[int, tuple[int, ...]]] = []
+    previous = tuple(start)
+    for step in range(1, steps + 1):
+        levels = tuple(
+            round(begin + (finish - begin) * step / steps)
+            for begin, finish in zip(start, end)
+        )
+        if levels != previous:
+            frames.append((step, levels))
+            previous = levels
+    if not frames:
+        frames.append((1, target))
+    return frames
@@ -5,14 +5,16 @@ The library is async and constructs ``asyncio`` primitives in ``LEDBLE.__init__`
 drive a single explicit event loop per test: the ``loop`` fixture exposes it,
 ``make_led`` constructs an ``LEDBLE`` *inside* a running loop, and async methods
 are exercised with ``loop.run_until_complete(...)``.
+
+``LEDBLE`` keeps its attributes in slots, so tests that replace methods on an
+instance build a ``PatchableLEDBLE`` instead.
 """
 
 from __future__ import annotations
 
 import asyncio
-from collections.abc import Iterator
-from typing import cast
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
+from typing import Any, cast
 
 import pytest
 from bleak.backends.device import BLEDevice
@@ -21,6 +23,10 @@ from bleak.backends.scanner import AdvertisementData
 from led_ble.led_ble import LEDBLE
 
 
+class PatchableLEDBLE(LEDBLE):
+    """An ``LEDBLE`` with an instance ``__dict__``, so methods can be replaced."""
+
+
 class FakeBLEDevice:
     """Minimal stand-in for ``bleak.backends.device.BLEDevice``."""
 
@@ -29,14 +35,21 @@ class FakeBLEDevice:
     ) -> None:
         self.address = address
         self.name = name
+        self.details: object = None
 
 
 class FakeAdvertisement:
     """Minimal stand-in for ``AdvertisementData`` (only fields we read)."""
 
-    def __init__(self, rssi: int = -60, local_name: str | None = None) -> None:
+    def __init__(
+        self,
+        rssi: int = -60,
+        local_name: str | None = None,
+        manufacturer_data: dict[int, bytes] | None = None,
+    ) -> None:
         self.rssi = rssi
         self.local_name = local_name
+        self.manufacturer_data = manufacturer_data or {}
 
 
 class FakeServices:
@@ -63,18 +76,24 @@ def loop() -> Iterator[asyncio.AbstractEventLoop]:
 
 @pytest.fixture
 def make_led(loop: asyncio.AbstractEventLoop) -> Callable[..., LEDBLE]:
-    """Factory that builds an ``LEDBLE`` bound to the test's event loop."""
+    """Factory that builds an ``LEDBLE`` bound to the test's event loop.
+
+    Keyword arguments are passed on to the constructor.
+    """
 
     def _make(
         name: str | None = "LEDnet",
         address: str = "AA:BB:CC:DD:EE:FF",
         advertisement: FakeAdvertisement | None = None,
+        *,
+        cls: type[LEDBLE] = PatchableLEDBLE,
+        **kwargs: Any,
     ) -> LEDBLE:
         device = cast(BLEDevice, FakeBLEDevice(address, name))
         adv = cast("AdvertisementData | None", advertisement)
 
         async def _construct() -> LEDBLE:
-            return LEDBLE(device, adv)
+            return cls(device, adv, **kwargs)
 
         return loop.run_until_complete(_construct())
 
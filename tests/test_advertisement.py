@@ -0,0 +1,95 @@
+"""Tests for reading state from advertisement manufacturer data."""
+
+from __future__ import annotations
+
+from unittest.mock import Mock
+
+import pytest
+
+from led_ble import advertisement
+from led_ble.advertisement import (
+    decode_advertisement,
+    decode_embedded_status_frame,
+    register_advertisement_decoder,
+)
+from led_ble.models import LEDBLEState
+
+from .conftest import FakeAdvertisement, FakeBLEDevice
+
+FRAME = bytes([0x81, 0xE3, 0x23, 0x25, 0x61, 0x10, 10, 20, 30, 40, 5])
+STATE = LEDBLEState(True, (10, 20, 30), 40, 0xE3, 0x25, 0x61, 0x10, 5)
+
+
+def test_decode_embedded_status_frame():
+    assert decode_embedded_status_frame(FRAME) == STATE
+    assert decode_embedded_status_frame(b"\x01\x02" + FRAME + b"\x00") == STATE
+
+
+def test_decode_embedded_status_frame_skips_stray_headers():
+    # 0x81 followed by an invalid power byte, then the real frame.
+    assert decode_embedded_status_frame(b"\x81\xe3\x00" + FRAME) == STATE
+    # Unknown model.
+    assert decode_embedded_status_frame(b"\x81\x99" + FRAME[2:]) is None
+    # Truncated.
+    assert decode_embedded_status_frame(FRAME[:10]) is None
+    assert decode_embedded_status_frame(b"") is None
+
+
+def test_decode_advertisement_uses_registered_decoder(monkeypatch):
+    monkeypatch.setattr(advertisement, "_DECODERS", {})
+    custom = Mock(return_value=STATE)
+    register_advertisement_decoder(0x5A5A, custom)
+    assert decode_advertisement({0x5A5A: b"\x01"}) == STATE
+    custom.assert_called_once_with(b"\x01")
+
+
+def test_decode_advertisement_ignores_unregistered_ids(monkeypatch):
+    monkeypatch.setattr(advertisement, "_DECODERS", {})
+    assert decode_advertisement({0x0001: FRAME}) is None
+    register_advertisement_decoder(0x0001, decode_embedded_status_frame)
+    assert decode_advertisement({0x0001: FRAME}) == STATE
+    assert decode_advertisement({0x0001: b"\x00"}) is None
+
+
+@pytest.fixture
+def embedded_frames(monkeypatch):
+    """Decode embedded status frames advertised under 0x5A5A."""
+    monkeypatch.setattr(advertisement, "_DECODERS", {})
+    register_advertisement_decoder(0x5A5A, decode_embedded_status_frame)
+
+
+@pytest.mark.usefixtures("embedded_frames")
+def test_advertisement_updates_state_without_connecting(led):
+    received: list[LEDBLEState] = []
+    led.register_callback(received.append)
+    adv = FakeAdvertisement(manufacturer_data={0x5A5A: b"\x00" + FRAME})
+    led.set_ble_device_and_advertisement_data(FakeBLEDevice(), adv)
+    assert led.state == STATE
+    assert led.model_data.model_num == 0xE3
+    assert led._client is None
+    # Repeated advertisements do not fire callbacks again.
+    led.set_ble_device_and_advertisement_data(FakeBLEDevice(), adv)
+    assert received == [STATE]
+
+
+@pytest.mark.usefixtures("embedded_frames")
+def test_advertisement_ignored_while_connected(led):
+    led._client = Mock(is_connected=True)
+    adv = FakeAdvertisement(manufacturer_data={0x5A5A: FRAME})
+    led.set_ble_device_and_advertisement_data(FakeBLEDevice(), adv)
+    assert led.state == LEDBLEState()
+
+
+@pytest.mark.usefixtures("embedded_frames")
+def test_advertisement_without_state_is_ignored(led):
+    adv = FakeAdvertisement(manufacturer_data={0x5A5A: b"\x01\x02"})
+    led.set_ble_device_and_advertisement_data(FakeBLEDevice(), adv)
+    assert led.state == LEDBLEState()
+    assert led._model_data is None
+
+
+def test_unregistered_advertisement_is_ignored(led):
+    adv = FakeAdvertisement(manufacturer_data={0x5A5A: FRAME})
+    led.set_ble_device_and_advertisement_data(FakeBLEDevice(), adv)
+    assert led.state == LEDBLEState()
+    assert led.state_age is None
@@ -0,0 +1,46 @@
+"""Smoke test of the benchmark suite with failure injection."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import led_ble
+
+SRC = Path(led_ble.__file__).parent.parent
+BENCHMARKS = Path(__file__).parent.parent / "benchmarks"
+
+
+def test_suite_finishes_with_failures_injected() -> None:
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(SRC), str(BENCHMARKS), *sys.path]),
+    }
+    result = subprocess.run(
+        [
+            sys.executable,
+            str(BENCHMARKS / "bench_suite.py"),
+            *("--repeat", "1", "--commands", "20", "--devices", "4"),
+            *("--rounds", "3", "--notifications", "100"),
+            *("--connect-latency", "0.001", "--write-latency", "0.001"),
+            *("--notify-delay", "0.001", "--connect-failure-rate", "0.2"),
+            *("--write-failure-rate", "0.3"),
+        ],
+        capture_output=True,
+        check=True,
+        env=env,
+        text=True,
+        timeout=60,
+    )
+    results = json.loads(result.stdout)["results"]
+    assert set(results) == {
+        "commands_per_second",
+        "group_fanout_seconds",
+        "cold_start_seconds",
+        "notifications_per_second",
+    }
+    # The injected failures show up as errors rather than hanging the run.
+    assert sum(entry["errors"] for entry in results.values()) > 0
@@ -0,0 +1,76 @@
+"""Tests for the integer brightness math against the colorsys round trips."""
+
+from __future__ import annotations
+
+import colorsys
+import itertools
+
+import pytest
+
+from led_ble.color import rgb_brightness, rgb_unscaled, scale_rgb
+
+# Every 51st channel value (0, 51, ..., 255) plus awkward neighbours; the
+# full cube is checked by benchmarks/bench_color.py.
+CHANNELS = sorted({*range(0, 256, 51), 1, 2, 100, 127, 128, 200, 254})
+CUBE = list(itertools.product(CHANNELS, repeat=3))
+
+
+def _colorsys_brightness(r: int, g: int, b: int) -> int:
+    _, _, v = colorsys.rgb_to_hsv(r / 255, g / 255, b / 255)
+    return int(v * 255)
+
+
+def _colorsys_unscaled(r: int, g: int, b: int) -> tuple[int, int, int]:
+    hsv = colorsys.rgb_to_hsv(r / 255.0, g / 255.0, b / 255.0)
+    r_p, g_p, b_p = colorsys.hsv_to_rgb(hsv[0], hsv[1], 1)
+    return round(r_p * 255), round(g_p * 255), round(b_p * 255)
+
+
+def _colorsys_scale(rgb: tuple[int, int, int], level: int) -> tuple[int, int, int]:
+    hsv = colorsys.rgb_to_hsv(*rgb)
+    r, g, b = colorsys.hsv_to_rgb(hsv[0], hsv[1], level)
+    return int(r), int(g), int(b)
+
+
+def test_brightness_matches_colorsys():
+    for rgb in CUBE:
+        assert rgb_brightness(*rgb) == _colorsys_brightness(*rgb), rgb
+
+
+def test_unscaled_matches_colorsys():
+    for rgb in CUBE:
+        assert rgb_unscaled(*rgb) == _colorsys_unscaled(*rgb), rgb
+
+
+@pytest.mark.parametrize("level", [0, 1, 64, 128, 200, 255])
+def test_scale_matches_colorsys(level):
+    for rgb in CUBE:
+        assert scale_rgb(rgb, level) == _colorsys_scale(rgb, level), rgb
+
+
+@pytest.mark.parametrize(
+    "rgb",
+    [
+        (0, 1, 6),  # exact .5 tie that floats round up
+        (0, 3, 30),  # exact .5 tie that floats round down
+        (200, 100, 37),
+    ],
+)
+def test_unscaled_rounding_ties_match_colorsys(rgb):
+    assert rgb_unscaled(*rgb) == _colorsys_unscaled(*rgb)
+
+
+@pytest.mark.parametrize(
+    ("rgb", "level"),
+    [
+        ((255, 255, 0), 128),  # tied maximum channels
+        ((200, 100, 37), 128),  # whole-number middle channel
+        ((255, 0, 0), 128),
+    ],
+)
+def test_scale_whole_number_results_match_colorsys(rgb, level):
+    assert scale_rgb(rgb, level) == _colorsys_scale(rgb, level)
+
+
+def test_scale_accepts_non_int_level():
+    assert scale_rgb((255, 0, 0), 127.5) == _colorsys_scale((255, 0, 0), 127.5)  # type: ignore[arg-type]
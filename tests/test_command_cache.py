@@ -0,0 +1,157 @@
+"""Tests for the shared encoded-command caches."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from unittest.mock import AsyncMock
+
+import pytest
+from flux_led.const import LevelWriteMode
+from flux_led.protocol import (
+    PROTOCOL_LEDENET_25BYTE,
+    PROTOCOL_LEDENET_ADDRESSABLE_A3,
+    PROTOCOL_LEDENET_CCT_WRAPPED,
+    PROTOCOL_LEDENET_ORIGINAL,
+    PROTOCOL_LEDENET_ORIGINAL_RGBW,
+)
+
+from led_ble import command_cache_info
+from led_ble.command_cache import (
+    CommandCache,
+    CommandCacheInfo,
+    clear_command_caches,
+    get_command_cache,
+)
+from led_ble.model_db import protocol_cls
+
+RGBW_CLS = protocol_cls(PROTOCOL_LEDENET_ORIGINAL_RGBW)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_caches() -> Iterator[None]:
+    clear_command_caches()
+    yield
+    clear_command_caches()
+
+
+def _levels(cache: CommandCache, red: int) -> list[bytes]:
+    return cache.construct_levels_change(
+        True, red, 0, 0, None, None, LevelWriteMode.COLORS
+    )
+
+
+def test_levels_change_matches_protocol_encoding():
+    cache = CommandCache(RGBW_CLS())
+    expected = RGBW_CLS().construct_levels_change(
+        True, 1, 2, 3, 4, None, LevelWriteMode.ALL
+    )
+    result = cache.construct_levels_change(True, 1, 2, 3, 4, None, LevelWriteMode.ALL)
+    assert result == [bytes(command) for command in expected]
+    assert all(type(command) is bytes for command in result)
+
+
+def test_levels_change_counts_hits_and_misses():
+    cache = CommandCache(RGBW_CLS())
+    _levels(cache, 10)
+    _levels(cache, 10)
+    _levels(cache, 20)
+    assert cache.cache_info() == CommandCacheInfo(1, 2, 1026, 2)
+
+
+def test_cached_result_is_not_shared_mutable_state():
+    cache = CommandCache(RGBW_CLS())
+    first = _levels(cache, 10)
+    first.clear()
+    assert _levels(cache, 10) != []
+
+
+def test_cache_is_bounded():
+    cache = CommandCache(RGBW_CLS(), maxsize=2)
+    for red in range(5):
+        _levels(cache, red)
+    assert cache.cache_info().currsize == 2
+    # The least recently used entries were evicted.
+    _levels(cache, 0)
+    assert cache.cache_info().misses == 6
+
+
+def test_preset_pattern_is_cached():
+    cache = CommandCache(RGBW_CLS())
+    first = cache.construct_preset_pattern(0x25, 50, 100)
+    assert first == bytes(RGBW_CLS().construct_preset_pattern(0x25, 50, 100))
+    assert cache.construct_preset_pattern(0x25, 50, 100) is first
+    assert cache.cache_info().hits == 1
+
+
+def test_state_change_is_cached():
+    cache = CommandCache(RGBW_CLS())
+    assert cache.construct_state_change(True) == bytes(
+        RGBW_CLS().construct_state_change(True)
+    )
+    cache.construct_state_change(True)
+    cache.construct_state_change(False)
+    assert cache.cache_info().hits == 1
+    assert cache.cache_info().misses == 2
+
+
+def test_cache_clear_resets_statistics():
+    cache = CommandCache(RGBW_CLS())
+    _levels(cache, 10)
+    cache.cache_clear()
+    assert cache.cache_info() == CommandCacheInfo(0, 0, 1026, 0)
+
+
+def test_get_command_cache_is_shared_per_protocol_class():
+    assert get_command_cache(RGBW_CLS) is get_command_cache(RGBW_CLS)
+    assert get_command_cache(RGBW_CLS) is not get_command_cache(
+        protocol_cls(PROTOCOL_LEDENET_ORIGINAL)
+    )
+
+
+@pytest.mark.parametrize(
+    "protocol",
+    [
+        PROTOCOL_LEDENET_25BYTE,
+        PROTOCOL_LEDENET_ADDRESSABLE_A3,
+        PROTOCOL_LEDENET_CCT_WRAPPED,
+    ],
+)
+def test_counter_based_protocols_are_not_cached(protocol):
+    assert get_command_cache(protocol_cls(protocol)) is None
+    assert command_cache_info() == {}
+
+
+def test_command_cache_info_keyed_by_protocol_name():
+    cache = get_command_cache(RGBW_CLS)
+    assert cache is not None
+    _levels(cache, 10)
+    info = command_cache_info()
+    assert list(info) == [PROTOCOL_LEDENET_ORIGINAL_RGBW]
+    assert info[PROTOCOL_LEDENET_ORIGINAL_RGBW].misses == 1
+
+
+def test_devices_share_encoded_commands(loop, make_led):
+    leds = [make_led(address=f"AA:BB:CC:DD:EE:0{i}") for i in range(3)]
+    for led in leds:
+        led._set_protocol(PROTOCOL_LEDENET_ORIGINAL_RGBW)
+        led._send_command = AsyncMock()
+        loop.run_until_complete(led.set_rgb((1, 2, 3)))
+    info = command_cache_info()[PROTOCOL_LEDENET_ORIGINAL_RGBW]
+    assert info.misses == 1
+    assert info.hits == 2
+    sent = [led._send_command.await_args.args[0] for led in leds]
+    assert sent[0] == sent[1] == sent[2]
+
+
+def test_devices_with_counter_based_protocol_encode_their_own_commands(loop, make_led):
+    leds = [make_led(address=f"AA:BB:CC:DD:EE:0{i}") for i in range(2)]
+    sent = []
+    for led in leds:
+        led._set_protocol(PROTOCOL_LEDENET_25BYTE)
+        led._send_command = AsyncMock()
+        for _ in range(2):
+            loop.run_until_complete(led.set_rgb((1, 2, 3)))
+            sent.append(led._send_command.await_args.args[0])
+    # Each device numbers its own messages.
+    assert sent[0] == sent[2]
+    assert sent[0] != sent[1]
@@ -0,0 +1,131 @@
+"""Tests for confirmed writes."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from unittest.mock import AsyncMock
+
+import pytest
+from bleak.exc import BleakError
+
+from led_ble.const import STATE_COMMAND
+from led_ble.emulator import ControllerEmulator, EmulatedController
+from led_ble.exceptions import ConfirmationError
+from led_ble.led_ble import LEDBLE
+from led_ble.metrics import CONFIRM_FAILURES, CONFIRM_LATENCY
+
+
+def _emulated(
+    make_led: Callable[..., LEDBLE],
+) -> tuple[ControllerEmulator, EmulatedController, LEDBLE, list[bytes]]:
+    """Return a device connected to an emulated controller that logs queries."""
+    emulator = ControllerEmulator()
+    device = emulator.add("AA:BB:CC:DD:EE:FF")
+    controller = emulator.controllers[device.address]
+    queries: list[bytes] = []
+    handle_write = controller.handle_write
+
+    def _handle_write(data: bytes) -> bytes | None:
+        if data == STATE_COMMAND:
+            queries.append(data)
+        return handle_write(data)
+
+    controller.handle_write = _handle_write
+
+    led = make_led(device.name, device.address)
+    return emulator, controller, led, queries
+
+
+def test_confirmed_writes_share_one_query(loop, make_led):
+    emulator, controller, led, queries = _emulated(make_led)
+
+    async def run() -> None:
+        with emulator.patch():
+            await led.update()
+            await asyncio.sleep(0)
+            queries.clear()
+            await asyncio.gather(
+                led.set_rgb((1, 2, 3), confirm=True),
+                led.turn_off(confirm=True),
+            )
+            await led.stop()
+
+    loop.run_until_complete(run())
+    assert len(queries) == 1
+    assert (controller.rgb, controller.power) == ((1, 2, 3), False)
+    assert led.metrics.histograms[CONFIRM_LATENCY].count == 2
+
+
+def test_confirmed_white_rgbw_and_effect(loop, make_led):
+    emulator, controller, led, _ = _emulated(make_led)
+
+    async def run() -> None:
+        with emulator.patch():
+            await led.update()
+            await led.set_rgbw((10, 20, 30, 40), 255, confirm=True)
+            await led.set_brightness(128, confirm=True)
+            await led.async_set_preset_pattern(0x26, 50, confirm=True)
+            await led.stop()
+
+    loop.run_until_complete(run())
+    assert controller.preset_pattern == 0x26
+    assert led.metrics.histograms[CONFIRM_LATENCY].count == 3
+
+
+def test_mismatch_is_queried_again_then_raises(loop, make_led):
+    emulator, controller, led, queries = _emulated(make_led)
+    handle_write = controller.handle_write
+
+    def _ignore_power(data: bytes) -> bytes | None:
+        return None if data[0] == 0xCC else handle_write(data)
+
+    controller.handle_write = _ignore_power
+
+    async def run() -> None:
+        with emulator.patch():
+            await led.update()
+            await asyncio.sleep(0)
+            queries.clear()
+            with pytest.raises(ConfirmationError, match="instead of"):
+                await led.turn_off(confirm=True)
+            await led.stop()
+
+    loop.run_until_complete(run())
+    assert len(queries) == 2
+    assert led.metrics.counters[CONFIRM_FAILURES] == 1
+
+
+def test_missing_notification_times_out(loop, monkeypatch, make_led):
+    monkeypatch.setattr("led_ble.led_ble.CONFIRM_TIMEOUT", 0.05)
+    emulator, controller, led, _ = _emulated(make_led)
+
+    async def run() -> None:
+        with emulator.patch():
+            await led.update()
+            controller.handle_write = lambda data: None
+            with pytest.raises(ConfirmationError, match="within"):
+                await led.turn_off(confirm=True)
+            await asyncio.sleep(0.1)
+            await led.stop()
+
+    loop.run_until_complete(run())
+    assert not led._confirm_querying
+    assert led.metrics.counters[CONFIRM_FAILURES] == 1
+
+
+def test_failed_query_fails_the_waiters(loop, make_led):
+    emulator, _, led, _ = _emulated(make_led)
+
+    async def run() -> None:
+        with emulator.patch():
+            await led.update()
+            await led.turn_off()
+            led._send_command = AsyncMock(side_effect=BleakError("boom"))
+            with pytest.raises(BleakError, match="boom"):
+                await led._confirm_state(power=False)
+            await led.stop()
+
+    loop.run_until_complete(run())
+    assert not led._confirm_pending
+    assert not led._confirm_sent
@@ -0,0 +1,343 @@
+"""Tests for the per-address device cache."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import cast
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from bleak.backends.service import BleakGATTServiceCollection
+
+from led_ble.const import (
+    POSSIBLE_READ_CHARACTERISTIC_UUIDS,
+    POSSIBLE_WRITE_CHARACTERISTIC_UUIDS,
+    STATE_COMMAND,
+)
+from led_ble.device_cache import (
+    CachedDevice,
+    CharacteristicCacheInfo,
+    JsonDeviceCache,
+    MemoryDeviceCache,
+    characteristic_cache_info,
+    clear_characteristic_cache_info,
+)
+
+from .conftest import FakeServices
+
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+CACHED = CachedDevice(0xE3, 5, "LEDENET_ORIGINAL_RGBW")
+
+
+@pytest.fixture(autouse=True)
+def _clear_stats():
+    clear_characteristic_cache_info()
+    yield
+    clear_characteristic_cache_info()
+
+
+def _state_packet(model_num: int, version: int) -> bytearray:
+    return bytearray([0x81, model_num, 0x23, 0x01, 0x02, 0x03, 10, 20, 30, 40, version])
+
+
+def test_memory_cache_is_case_insensitive():
+    cache = MemoryDeviceCache()
+    assert cache.get(ADDRESS) is None
+    cache.set(ADDRESS.lower(), CACHED)
+    assert cache.get(ADDRESS) == CACHED
+
+
+def test_json_cache_round_trip(tmp_path):
+    path = tmp_path / "devices.json"
+    JsonDeviceCache(path).set(ADDRESS, CACHED)
+    assert json.loads(path.read_text()) == {
+        ADDRESS: {
+            "model_num": 0xE3,
+            "version_num": 5,
+            "protocol": "LEDENET_ORIGINAL_RGBW",
+            "read_uuid": None,
+            "write_uuid": None,
+            "refresh_services": False,
+        }
+    }
+    assert JsonDeviceCache(path).get(ADDRESS) == CACHED
+
+
+def test_json_cache_skips_unchanged_writes(tmp_path):
+    path = tmp_path / "devices.json"
+    cache = JsonDeviceCache(path)
+    cache.set(ADDRESS, CACHED)
+    path.unlink()
+    cache.set(ADDRESS, CACHED)
+    assert not path.exists()
+
+
+def test_json_cache_ignores_corrupt_file(tmp_path, caplog):
+    path = tmp_path / "devices.json"
+    path.write_text("{not json")
+    cache = JsonDeviceCache(path)
+    assert cache.get(ADDRESS) is None
+    assert "Ignoring unreadable device cache" in caplog.text
+    cache.set(ADDRESS, CACHED)
+    assert JsonDeviceCache(path).get(ADDRESS) == CACHED
+
+
+def test_json_cache_missing_directory_logs(tmp_path, caplog):
+    cache = JsonDeviceCache(tmp_path / "missing" / "devices.json")
+    cache.set(ADDRESS, CACHED)
+    assert cache.get(ADDRESS) == CACHED
+    assert "Failed to save device cache" in caplog.text
+
+
+def test_json_cache_saves_changes_together_in_executor(loop, tmp_path, monkeypatch):
+    path = tmp_path / "devices.json"
+    cache = JsonDeviceCache(path, save_delay=0.01)
+    write = Mock(wraps=cache._write)
+    monkeypatch.setattr(cache, "_write", write)
+    other = CachedDevice(0x54, 1, "LEDENET")
+
+    async def run() -> None:
+        cache.set(ADDRESS, CACHED)
+        cache.set("11:22:33:44:55:66", other)
+        assert not path.exists()
+        await asyncio.sleep(0.05)
+        await cache.async_save()
+
+    loop.run_until_complete(run())
+    write.assert_called_once()
+    saved = JsonDeviceCache(path)
+    assert saved.get(ADDRESS) == CACHED
+    assert saved.get("11:22:33:44:55:66") == other
+
+
+def test_json_cache_async_save_writes_pending_changes(loop, tmp_path):
+    path = tmp_path / "devices.json"
+    cache = JsonDeviceCache(path, save_delay=60)
+
+    async def run() -> None:
+        cache.set(ADDRESS, CACHED)
+        await cache.async_save()
+
+    loop.run_until_complete(run())
+    assert JsonDeviceCache(path).get(ADDRESS) == CACHED
+    assert cache._save_timer is None
+
+
+def test_first_notification_stores_protocol(make_led):
+    cache = MemoryDeviceCache()
+    led = make_led(device_cache=cache)
+    led._notification_handler(0, _state_packet(0xE3, 5))
+    assert cache.get(ADDRESS) == CACHED
+
+
+def test_cached_protocol_skips_handshake(make_led):
+    cache = MemoryDeviceCache()
+    cache.set(ADDRESS, CACHED)
+    led = make_led(device_cache=cache)
+    assert led._protocol is not None
+    assert led._protocol.name == "LEDENET_ORIGINAL_RGBW"
+    assert led._resolve_protocol_event.is_set()
+    assert led.model_data.model_num == 0xE3
+    assert led.model_num == 0xE3
+    assert led.version_num == 5
+
+
+def test_cached_protocol_confirmed_by_notification(make_led):
+    cache = MemoryDeviceCache()
+    cache.set(ADDRESS, CACHED)
+    led = make_led(device_cache=cache)
+    protocol = led._protocol
+    led._notification_handler(0, _state_packet(0xE3, 5))
+    assert led._protocol is protocol
+    assert not led._protocol_unverified
+
+
+def test_stale_cached_protocol_is_replaced(make_led):
+    cache = MemoryDeviceCache()
+    cache.set(ADDRESS, CachedDevice(0x54, 1, "LEDENET"))
+    led = make_led(device_cache=cache)
+    assert led._protocol is not None
+    assert led._protocol.name == "LEDENET"
+    led._notification_handler(0, _state_packet(0xE3, 5))
+    assert led._protocol.name == "LEDENET_ORIGINAL_RGBW"
+    assert led.model_data.model_num == 0xE3
+    assert cache.get(ADDRESS) == CACHED
+    # Only the first notification after loading is checked.
+    led._notification_handler(0, _state_packet(0x54, 1))
+    assert led.model_data.model_num == 0xE3
+
+
+def test_unknown_cached_protocol_is_ignored(make_led):
+    cache = MemoryDeviceCache()
+    cache.set(ADDRESS, CachedDevice(0xE3, 5, "NOT_A_PROTOCOL"))
+    led = make_led(device_cache=cache)
+    assert led._protocol is None
+    assert not led._resolve_protocol_event.is_set()
+
+
+def test_ensure_connected_verifies_cached_protocol(loop, monkeypatch, make_led):
+    cache = MemoryDeviceCache()
+    cache.set(ADDRESS, CACHED)
+    led = make_led(device_cache=cache)
+    client = Mock()
+    client.is_connected = True
+    client.start_notify = AsyncMock()
+    client.write_gatt_char = AsyncMock()
+    monkeypatch.setattr(
+        "led_ble.led_ble.establish_connection", AsyncMock(return_value=client)
+    )
+    led._resolve_characteristics = Mock(return_value=True)
+    led._resolve_protocol = AsyncMock()
+    led._write_char = Mock()
+    led._read_char = Mock()
+
+    async def run() -> None:
+        await led._ensure_connected()
+        for task in list(led._background_tasks):
+            await task
+
+    loop.run_until_complete(run())
+    led._resolve_protocol.assert_not_awaited()
+    client.write_gatt_char.assert_awaited_once_with(
+        led._write_char, STATE_COMMAND, False
+    )
+
+
+def test_cached_protocol_check_is_dropped_on_disconnect(loop, monkeypatch, make_led):
+    cache = MemoryDeviceCache()
+    cache.set(ADDRESS, CACHED)
+    led = make_led(device_cache=cache)
+    client = Mock()
+    client.is_connected = True
+    client.start_notify = AsyncMock()
+    client.stop_notify = AsyncMock()
+    client.disconnect = AsyncMock()
+    client.write_gatt_char = AsyncMock()
+    monkeypatch.setattr(
+        "led_ble.led_ble.establish_connection", AsyncMock(return_value=client)
+    )
+    led._resolve_characteristics = Mock(return_value=True)
+
+    async def run() -> None:
+        await led._ensure_connected()
+        verify = led._verify_task
+        assert verify is not None
+        await led._execute_disconnect()
+        assert led._verify_task is None
+        await asyncio.sleep(0)
+        assert verify.cancelled()
+        # A check that starts after the client is gone does nothing.
+        await led._verify_cached_protocol()
+
+    loop.run_until_complete(run())
+    client.write_gatt_char.assert_not_awaited()
+
+
+def test_json_cache_loads_entries_without_characteristics(tmp_path):
+    path = tmp_path / "devices.json"
+    path.write_text(
+        json.dumps(
+            {ADDRESS: {"model_num": 0xE3, "version_num": 5, "protocol": "LEDENET"}}
+        )
+    )
+    assert JsonDeviceCache(path).get(ADDRESS) == CachedDevice(0xE3, 5, "LEDENET")
+
+
+def test_resolve_characteristics_tries_remembered_pair_first(make_led):
+    read_uuid = POSSIBLE_READ_CHARACTERISTIC_UUIDS[3]
+    write_uuid = POSSIBLE_WRITE_CHARACTERISTIC_UUIDS[3]
+    cache = MemoryDeviceCache()
+    cache.set(ADDRESS, CachedDevice(0xE3, 5, "LEDENET", read_uuid, write_uuid))
+    led = make_led(device_cache=cache)
+    read_char, write_char = object(), object()
+    services = Mock()
+    services.get_characteristic = Mock(
+        side_effect={read_uuid: read_char, write_uuid: write_char}.get
+    )
+    assert led._resolve_characteristics(services) is True
+    assert led._read_char is read_char
+    assert led._write_char is write_char
+    assert services.get_characteristic.call_count == 2
+    assert characteristic_cache_info() == CharacteristicCacheInfo(1, 0, 0)
+
+
+def test_resolve_characteristics_scans_when_remembered_pair_missing(make_led):
+    cache = MemoryDeviceCache()
+    cache.set(
+        ADDRESS,
+        CachedDevice(
+            0xE3,
+            5,
+            "LEDENET",
+            POSSIBLE_READ_CHARACTERISTIC_UUIDS[3],
+            POSSIBLE_WRITE_CHARACTERISTIC_UUIDS[3],
+        ),
+    )
+    led = make_led(device_cache=cache)
+    read_uuid = POSSIBLE_READ_CHARACTERISTIC_UUIDS[1]
+    write_uuid = POSSIBLE_WRITE_CHARACTERISTIC_UUIDS[1]
+    services = FakeServices({read_uuid: object(), write_uuid: object()})
+    assert (
+        led._resolve_characteristics(cast(BleakGATTServiceCollection, services)) is True
+    )
+    assert led._char_uuids == (read_uuid, write_uuid)
+    assert characteristic_cache_info() == CharacteristicCacheInfo(0, 1, 0)
+
+
+def _connect_client(services: FakeServices) -> Mock:
+    client = Mock()
+    client.is_connected = True
+    client.services = services
+    client.start_notify = AsyncMock()
+    client.clear_cache = AsyncMock()
+    client.disconnect = AsyncMock()
+    return client
+
+
+def test_connection_remembers_characteristics(loop, monkeypatch, make_led):
+    cache = MemoryDeviceCache()
+    led = make_led(device_cache=cache)
+    read_uuid = POSSIBLE_READ_CHARACTERISTIC_UUIDS[2]
+    write_uuid = POSSIBLE_WRITE_CHARACTERISTIC_UUIDS[2]
+    client = _connect_client(FakeServices({read_uuid: object(), write_uuid: object()}))
+    monkeypatch.setattr(
+        "led_ble.led_ble.establish_connection", AsyncMock(return_value=client)
+    )
+    loop.run_until_complete(led._establish_connection())
+    led._notification_handler(0, _state_packet(0xE3, 5))
+    entry = cache.get(ADDRESS)
+    assert entry is not None
+    assert (entry.read_uuid, entry.write_uuid) == (read_uuid, write_uuid)
+    assert entry.refresh_services is False
+
+
+def test_services_refresh_is_remembered(loop, monkeypatch, make_led):
+    cache = MemoryDeviceCache()
+    cache.set(ADDRESS, CACHED)
+    led = make_led(device_cache=cache)
+    read_uuid = POSSIBLE_READ_CHARACTERISTIC_UUIDS[0]
+    write_uuid = POSSIBLE_WRITE_CHARACTERISTIC_UUIDS[0]
+    stale = _connect_client(FakeServices())
+    fresh = _connect_client(FakeServices({read_uuid: object(), write_uuid: object()}))
+    connect = AsyncMock(side_effect=[stale, fresh])
+    monkeypatch.setattr("led_ble.led_ble.establish_connection", connect)
+    assert loop.run_until_complete(led._establish_connection()) is fresh
+    stale.clear_cache.assert_awaited_once()
+    assert [call.kwargs["use_services_cache"] for call in connect.call_args_list] == [
+        True,
+        False,
+    ]
+    assert cache.get(ADDRESS) == CachedDevice(
+        0xE3, 5, "LEDENET_ORIGINAL_RGBW", read_uuid, write_uuid, True
+    )
+    assert characteristic_cache_info() == CharacteristicCacheInfo(0, 2, 1)
+
+    # A new instance skips the cached services straight away.
+    led = make_led(device_cache=cache)
+    connect = AsyncMock(return_value=fresh)
+    monkeypatch.setattr("led_ble.led_ble.establish_connection", connect)
+    loop.run_until_complete(led._establish_connection())
+    connect.assert_awaited_once()
+    assert connect.call_args.kwargs["use_services_cache"] is False
+    assert characteristic_cache_info() == CharacteristicCacheInfo(1, 2, 1)
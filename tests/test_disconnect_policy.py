@@ -0,0 +1,136 @@
+"""Tests for the idle-disconnect policies."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from led_ble.disconnect_policy import (
+    DISCONNECT_DELAY,
+    AdaptiveDisconnectPolicy,
+    DisconnectPolicy,
+    FixedDisconnectPolicy,
+)
+from led_ble.led_ble import LEDBLE
+from led_ble.models import ConnectionStats
+
+
+def test_fixed_policy():
+    policy = FixedDisconnectPolicy(30)
+    policy.record_use(0)
+    policy.record_use(1000)
+    assert policy.idle_timeout() == 30
+    assert FixedDisconnectPolicy().idle_timeout() == DISCONNECT_DELAY
+
+
+def test_adaptive_policy_rejects_invalid_bounds():
+    with pytest.raises(ValueError, match="min_idle"):
+        AdaptiveDisconnectPolicy(min_idle=0)
+    with pytest.raises(ValueError, match="min_idle"):
+        AdaptiveDisconnectPolicy(min_idle=50, max_idle=20)
+    with pytest.raises(ValueError, match="smoothing"):
+        AdaptiveDisconnectPolicy(smoothing=0)
+
+
+def test_adaptive_policy_defaults_to_max_idle():
+    policy = AdaptiveDisconnectPolicy(min_idle=10, max_idle=120)
+    assert policy.idle_timeout() == 120
+    policy.record_use(0)
+    assert policy.gap is None
+    assert policy.idle_timeout() == 120
+
+
+def test_adaptive_policy_keeps_hot_devices_connected():
+    policy = AdaptiveDisconnectPolicy(min_idle=10, max_idle=120, multiplier=3)
+    for now in range(0, 100, 8):
+        policy.record_use(now)
+    assert policy.gap == pytest.approx(8)
+    assert policy.idle_timeout() == pytest.approx(24)
+
+
+def test_adaptive_policy_clamps_to_bounds():
+    policy = AdaptiveDisconnectPolicy(
+        min_idle=10, max_idle=120, multiplier=3, smoothing=1
+    )
+    policy.record_use(0)
+    policy.record_use(2)
+    assert policy.idle_timeout() == 10
+    policy.record_use(100)
+    assert policy.idle_timeout() == 120
+
+
+def test_adaptive_policy_releases_cold_devices_quickly():
+    policy = AdaptiveDisconnectPolicy(min_idle=10, max_idle=120)
+    policy.record_use(0)
+    policy.record_use(86400)
+    assert policy.idle_timeout() == 10
+
+
+def test_adaptive_policy_ignores_bursts():
+    policy = AdaptiveDisconnectPolicy(smoothing=1)
+    policy.record_use(0)
+    policy.record_use(30)
+    for frame in range(50):
+        policy.record_use(30 + frame * 0.02)
+    assert policy.gap == 30
+
+
+def _connected_led(
+    make_led: Callable[..., LEDBLE],
+    monkeypatch: pytest.MonkeyPatch,
+    policy: DisconnectPolicy,
+) -> tuple[LEDBLE, Mock]:
+    led = make_led(disconnect_policy=policy)
+    client = Mock()
+    client.is_connected = True
+    client.start_notify = AsyncMock()
+    client.stop_notify = AsyncMock()
+    client.disconnect = AsyncMock()
+    monkeypatch.setattr(
+        "led_ble.led_ble.establish_connection", AsyncMock(return_value=client)
+    )
+    led._resolve_characteristics = Mock(return_value=True)
+    led._protocol = Mock()
+    return led, client
+
+
+def test_led_uses_policy_idle_timeout(loop, monkeypatch, make_led):
+    policy = FixedDisconnectPolicy(5)
+    led, _ = _connected_led(make_led, monkeypatch, policy)
+    loop.run_until_complete(led._ensure_connected())
+    timer = led._disconnect_timer
+    assert timer is not None
+    try:
+        assert timer.when() - loop.time() == pytest.approx(5, abs=1)
+    finally:
+        timer.cancel()
+
+
+def test_led_records_only_commanded_uses(loop, monkeypatch, make_led):
+    policy = Mock(wraps=FixedDisconnectPolicy())
+    led, _ = _connected_led(make_led, monkeypatch, policy)
+    loop.run_until_complete(led._ensure_connected(priority=1))
+    policy.record_use.assert_not_called()
+    loop.run_until_complete(led._ensure_connected())
+    policy.record_use.assert_called_once()
+    assert led._disconnect_timer is not None
+    led._disconnect_timer.cancel()
+
+
+def test_led_connection_stats(loop, monkeypatch, make_led):
+    led, client = _connected_led(make_led, monkeypatch, FixedDisconnectPolicy())
+    assert led.connection_stats == ConnectionStats()
+
+    async def run() -> None:
+        await led._ensure_connected()
+        await led._ensure_connected()
+        await led._execute_timed_disconnect()
+        client.is_connected = True
+        await led._ensure_connected()
+        await led._execute_disconnect()
+
+    loop.run_until_complete(run())
+    stats = led.connection_stats
+    assert (stats.connects, stats.reconnects, stats.idle_disconnects) == (2, 1, 1)
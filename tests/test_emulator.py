@@ -0,0 +1,154 @@
+"""Tests for the emulated controllers."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from bleak.backends.device import BLEDevice
+from bleak.exc import BleakError
+
+from led_ble.emulator import (
+    DREAM_STATIC_PATTERN,
+    STATIC_PATTERN,
+    ControllerEmulator,
+    EmulatedController,
+    EmulatedGATTClient,
+)
+from led_ble.led_ble import LEDBLE
+from led_ble.model_db import MODELS
+
+
+def _run(loop, emulator, coro_factory):
+    async def run():
+        with emulator.patch():
+            return await coro_factory()
+
+    return loop.run_until_complete(run())
+
+
+def test_unknown_model_is_rejected():
+    with pytest.raises(ValueError, match="Unknown model"):
+        EmulatedController("AA:BB:CC:DD:EE:FF", model_num=0x99)
+
+
+def test_status_frame_and_unknown_commands():
+    controller = EmulatedController("AA:BB:CC:DD:EE:FF", 0x04, version_num=2)
+    assert controller.name == "Triones"
+    assert controller.handle_write(b"\x00\x01") is None
+    assert controller.handle_write(b"") is None
+    assert controller.handle_write(b"\xef\x01\x77") == bytes(
+        [0x81, 0x04, 0x23, STATIC_PATTERN, 0x61, 0x10, 255, 255, 255, 0, 2]
+    )
+    assert controller.commands == 3
+
+
+def test_led_resolves_state_and_applies_commands(loop):
+    emulator = ControllerEmulator()
+    device = emulator.add("AA:BB:CC:DD:EE:FF", 0x54)
+    controller = emulator.controllers[device.address]
+
+    async def run() -> LEDBLE:
+        led = LEDBLE(device)
+        await led.update()
+        assert led.state == controller.state
+        await led.set_rgb((10, 20, 30))
+        await led.turn_off()
+        await led.update()
+        await asyncio.sleep(0)
+        return led
+
+    led = _run(loop, emulator, run)
+    assert controller.rgb == (10, 20, 30)
+    assert not controller.power
+    assert led.state == controller.state
+    assert led.model_num == 0x54
+    loop.run_until_complete(led.stop())
+    assert controller.client is None
+
+
+def test_levels_and_presets(loop):
+    emulator = ControllerEmulator()
+    device = emulator.add("AA:BB:CC:DD:EE:FF")
+    controller = emulator.controllers[device.address]
+
+    async def run() -> LEDBLE:
+        led = LEDBLE(device)
+        await led.update()
+        await led.async_set_preset_pattern(0x26, 50)
+        assert controller.preset_pattern == 0x26
+        await led.set_rgbw((1, 2, 3, 4))
+        assert (controller.rgb, controller.w) == ((1, 2, 3), 4)
+        await led.set_white(200)
+        assert (controller.rgb, controller.w) == ((0, 0, 0), 200)
+        await led.turn_on()
+        await led.stop()
+        return led
+
+    _run(loop, emulator, run)
+    assert controller.power
+    assert controller.preset_pattern == STATIC_PATTERN
+
+
+def test_dream_controller(loop):
+    emulator = ControllerEmulator()
+    device = emulator.add("AA:BB:CC:DD:EE:FF", 0x10)
+    controller = emulator.controllers[device.address]
+    assert controller.preset_pattern == DREAM_STATIC_PATTERN
+
+    async def run() -> LEDBLE:
+        led = LEDBLE(device)
+        await led.update()
+        await led.async_set_preset_pattern(5, 50)
+        await led.update()
+        await asyncio.sleep(0)
+        await led.stop()
+        return led
+
+    led = _run(loop, emulator, run)
+    assert (controller.preset_pattern, controller.mode) == (0, 5)
+    assert led.effect == "Effect 6"
+
+
+def test_fleet(loop):
+    emulator = ControllerEmulator()
+    devices = emulator.add_fleet(300)
+    assert len({device.address for device in devices}) == 300
+
+    async def run() -> list[LEDBLE]:
+        leds = [LEDBLE(device) for device in devices]
+        await asyncio.gather(*(led.update() for led in leds))
+        await asyncio.gather(*(led.set_rgb((1, 2, 3)) for led in leds))
+        await asyncio.gather(*(led.stop() for led in leds))
+        return leds
+
+    leds = _run(loop, emulator, run)
+    assert emulator.connects == 300
+    assert {led.model_num for led in leds} == {model.model_num for model in MODELS}
+    assert all(
+        controller.rgb == (1, 2, 3) for controller in emulator.controllers.values()
+    )
+
+
+def test_unknown_address_and_reconnect(loop):
+    emulator = ControllerEmulator()
+    device = emulator.add("AA:BB:CC:DD:EE:FF")
+    disconnected: list[EmulatedGATTClient] = []
+
+    async def run() -> None:
+        with pytest.raises(BleakError, match="No emulated controller"):
+            await emulator.establish_connection(
+                object, BLEDevice("11:22:33:44:55:66", None, None), "x"
+            )
+        first = await emulator.establish_connection(
+            object, device, "x", disconnected.append
+        )
+        second = await emulator.establish_connection(object, device, "x")
+        assert not first.is_connected
+        assert disconnected == [first]
+        assert emulator.controllers[device.address].client is second
+        await first.disconnect()
+        with pytest.raises(BleakError, match="Not connected"):
+            await first.write_gatt_char(None, b"\xef\x01\x77", False)
+
+    loop.run_until_complete(run())
@@ -0,0 +1,106 @@
+"""Tests for fanning commands out across a group of devices."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from unittest.mock import AsyncMock
+
+import pytest
+from bleak.exc import BleakError
+
+from led_ble import GroupResult, LEDBLEGroup
+from led_ble.command_cache import clear_command_caches, command_cache_info
+from led_ble.led_ble import LEDBLE
+
+
+def _leds(make_led: Callable[..., LEDBLE], count: int) -> list[LEDBLE]:
+    leds = [make_led(address=f"AA:BB:CC:DD:EE:{i:02X}") for i in range(count)]
+    for led in leds:
+        led._set_protocol("LEDENET_ORIGINAL_RGBW")
+        led._send_command = AsyncMock()
+    return leds
+
+
+def test_group_rejects_invalid_concurrency(make_led):
+    with pytest.raises(ValueError, match="max_concurrency"):
+        LEDBLEGroup(_leds(make_led, 1), max_concurrency=0)
+
+
+def test_group_set_rgb_applies_to_every_device(loop, make_led):
+    leds = _leds(make_led, 3)
+    group = LEDBLEGroup(leds)
+    result = loop.run_until_complete(group.set_rgb((1, 2, 3)))
+    assert result.ok
+    assert result.succeeded == [led.address for led in leds]
+    assert all(led.rgb == (1, 2, 3) for led in leds)
+
+
+def test_group_encodes_each_protocol_command_once(loop, make_led):
+    clear_command_caches()
+    leds = _leds(make_led, 5)
+    loop.run_until_complete(LEDBLEGroup(leds).set_rgb((9, 8, 7)))
+    info = command_cache_info()["LEDENET_ORIGINAL_RGBW"]
+    assert (info.misses, info.hits) == (1, 4)
+
+
+def test_group_collects_failures_without_aborting(loop, make_led):
+    leds = _leds(make_led, 3)
+    leds[1]._send_command = AsyncMock(side_effect=BleakError("out of range"))
+    result = loop.run_until_complete(LEDBLEGroup(leds).turn_on())
+    assert not result.ok
+    assert result.succeeded == [leds[0].address, leds[2].address]
+    assert list(result.failed) == [leds[1].address]
+    assert isinstance(result.failed[leds[1].address], BleakError)
+    assert leds[0].on and leds[2].on and not leds[1].on
+
+
+def test_group_bounds_concurrency(loop, make_led):
+    leds = _leds(make_led, 6)
+    in_flight = 0
+    peak = 0
+
+    async def _send(_commands):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+
+    for led in leds:
+        led._send_command = _send
+    loop.run_until_complete(LEDBLEGroup(leds, max_concurrency=2).turn_off())
+    assert peak == 2
+
+
+@pytest.mark.parametrize(
+    ("method", "args"),
+    [
+        ("update", ()),
+        ("turn_on", ()),
+        ("turn_off", ()),
+        ("set_brightness", (128,)),
+        ("set_rgbw", ((1, 2, 3, 4), None)),
+        ("set_white", (50,)),
+        ("async_set_preset_pattern", (37, 50, 100)),
+        ("async_set_effect", ("Red Gradual Change", 50, 100)),
+        ("stop", ()),
+    ],
+)
+def test_group_methods_dispatch_to_devices(loop, make_led, method, args):
+    leds = _leds(make_led, 2)
+    for led in leds:
+        setattr(led, method, AsyncMock())
+    result = loop.run_until_complete(getattr(LEDBLEGroup(leds), method)(*args))
+    assert result.ok
+    for led in leds:
+        getattr(led, method).assert_awaited_once_with(*args)
+
+
+def test_group_result_properties():
+    error = BleakError("boom")
+    result = GroupResult({"a": None, "b": error})
+    assert result.succeeded == ["a"]
+    assert result.failed == {"b": error}
+    assert result.ok is False
+    assert GroupResult({}).ok is True
@@ -1,5 +1,75 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
 import led_ble
 
+SRC = Path(led_ble.__file__).parent.parent
+
+
+def _import_times(statement: str) -> dict[str, int]:
+    """Run statement in a fresh interpreter and return the -X importtime report.
+
+    Maps each imported module to its cumulative import time in microseconds.
+    """
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(SRC), *sys.path])}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        check=True,
+        env=env,
+        text=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        if cumulative.strip().isdigit():
+            times[module.strip()] = int(cumulative)
+    return times
+
 
 def test_add():
     assert led_ble
+
+
+def test_import_defers_flux_led(
+    record_property: Callable[[str, object], None],
+) -> None:
+    times = _import_times("import led_ble")
+    # Tracked per run in the junit report, to watch the import time over time.
+    record_property("led_ble_import_us", times["led_ble"])
+    assert not [module for module in times if module.startswith("flux_led")]
+
+
+def test_resolving_a_protocol_imports_flux_led() -> None:
+    times = _import_times(
+        "import asyncio\n"
+        "from led_ble import LEDBLE\n"
+        "from led_ble.emulator import ControllerEmulator\n"
+        "async def main():\n"
+        "    emulator = ControllerEmulator()\n"
+        "    led = LEDBLE(emulator.add('AA:BB:CC:DD:EE:FF'))\n"
+        "    with emulator.patch():\n"
+        "        await led.update()\n"
+        "    await led.stop()\n"
+        "asyncio.run(main())"
+    )
+    assert "flux_led.base_device" in times
+
+
+def test_dream_effects_are_built_on_first_access() -> None:
+    from led_ble import led_ble as module
+
+    assert module.DREAM_EFFECT_LIST[0] == "Effect 1"
+    assert module.DREAM_EFFECTS["Effect 255"] == 254
+    assert module.DREAM_EFFECT_LIST is module.DREAM_EFFECT_LIST
+    with pytest.raises(AttributeError):
+        module.NOT_AN_ATTRIBUTE  # noqa: B018
@@ -7,10 +7,14 @@ amount of connection bookkeeping that does not require a real bleak backend.
 
 from __future__ import annotations
 
+import asyncio
+import gc
+from collections.abc import AsyncIterator, Awaitable, Callable
 from dataclasses import replace
 from unittest.mock import AsyncMock, Mock
 
 import pytest
+from bleak.exc import BleakError
 from flux_led.const import LevelWriteMode
 from flux_led.pattern import EFFECT_ID_NAME, EFFECT_LIST, PresetPattern
 
@@ -19,8 +23,10 @@ from led_ble.const import (
     POSSIBLE_READ_CHARACTERISTIC_UUIDS,
     POSSIBLE_WRITE_CHARACTERISTIC_UUIDS,
 )
+from led_ble.disconnect_policy import FixedDisconnectPolicy
+from led_ble.emulator import ControllerEmulator
 from led_ble.exceptions import CharacteristicMissingError
-from led_ble.led_ble import DREAM_EFFECT_LIST, DREAM_EFFECTS
+from led_ble.led_ble import DREAM_EFFECT_LIST, DREAM_EFFECTS, LEDBLE
 
 from .conftest import FakeAdvertisement, FakeBLEDevice, FakeServices
 
@@ -86,6 +92,29 @@ def test_state_property_defaults(led):
     assert led.w == 0
 
 
+def test_idle_device_allocates_no_dict_or_primitives(make_led):
+    led = make_led(cls=LEDBLE)
+    assert not hasattr(led, "__dict__")
+    # Checking whether the device is busy does not create its locks.
+    led._evict_connection()
+    assert led._lazy_operation_lock is None
+    assert led._lazy_connect_lock is None
+    assert led._lazy_resolve_protocol_event is None
+    assert led._lazy_background_tasks is None
+    assert led._operation_lock is led._operation_lock
+    assert led._resolve_protocol_event is led._resolve_protocol_event
+
+
+def test_setters_keep_the_rest_of_the_state(loop, led):
+    led._state = LEDBLEState(True, (1, 2, 3), 4, KNOWN_MODEL, 0x25, 5, 6, 7)
+    led._protocol = _protocol_mock()
+    led._send_command = AsyncMock()
+    loop.run_until_complete(led.set_white(9))
+    assert led.state == LEDBLEState(True, (0, 0, 0), 9, KNOWN_MODEL, 0x25, 5, 6, 7)
+    loop.run_until_complete(led.turn_off())
+    assert led.state == LEDBLEState(False, (0, 0, 0), 9, KNOWN_MODEL, 0x25, 5, 6, 7)
+
+
 def test_color_and_meta_properties_reflect_state(led):
     led._state = LEDBLEState(
         power=True,
@@ -233,6 +262,50 @@ def test_notification_resolves_protocol_once(led):
     assert led.model_data.model_num == KNOWN_MODEL
 
 
+def test_advertised_name_preselects_protocol(make_led):
+    led = make_led(name="Triones:0123456789", preselect_by_name=True)
+    assert led._resolve_protocol_event.is_set()
+    # Nothing waited, so no event was allocated for this device.
+    other = make_led(
+        name="Triones:9876543210",
+        address="11:22:33:44:55:66",
+        preselect_by_name=True,
+    )
+    assert led._resolve_protocol_event is other._resolve_protocol_event
+    assert led._protocol is not None
+    assert led._protocol_unverified
+    assert led.model_num == 0x04
+    # The next full state notification verifies (here: corrects) the model.
+    packet = bytearray([0x81, KNOWN_MODEL, 0x23, 0x01, 0x02, 0x03, 10, 20, 30, 40, 5])
+    led._notification_handler(0, packet)
+    assert not led._protocol_unverified
+    assert led.model_data.model_num == KNOWN_MODEL
+
+
+def test_unrecognized_name_waits_for_the_device(make_led):
+    led = make_led(preselect_by_name=True)
+    assert led._protocol is None
+    assert led._lazy_resolve_protocol_event is None
+
+
+def test_name_preselection_is_opt_in(make_led):
+    led = make_led(name="Triones:0123456789")
+    assert led._protocol is None
+    led.set_ble_device_and_advertisement_data(
+        FakeBLEDevice(), FakeAdvertisement(local_name="Dream~1A2B")
+    )
+    assert led._protocol is None
+
+
+def test_advertised_local_name_preselects_protocol(make_led):
+    led = make_led(preselect_by_name=True)
+    led.set_ble_device_and_advertisement_data(
+        FakeBLEDevice(), FakeAdvertisement(local_name="Dream~1A2B")
+    )
+    assert led._protocol is not None
+    assert led.dream
+
+
 def test_notification_fires_callbacks(led):
     received: list[LEDBLEState] = []
     led.register_callback(received.append)
@@ -242,6 +315,33 @@ def test_notification_fires_callbacks(led):
     assert received[0].rgb == (10, 20, 30)
 
 
+def test_notification_skips_callbacks_for_repeated_state(led):
+    received: list[LEDBLEState] = []
+    led.register_callback(received.append)
+    packet = bytearray([0x81, KNOWN_MODEL, 0x23, 0x01, 0x02, 0x03, 10, 20, 30, 40, 5])
+    led._notification_handler(0, packet)
+    led._notification_handler(0, bytearray(packet))
+    # Trailing bytes past the status frame do not count as a change.
+    led._notification_handler(0, packet + b"\x00")
+    assert len(received) == 1
+    packet[6] = 11
+    led._notification_handler(0, packet)
+    assert len(received) == 2
+    assert received[1].rgb == (11, 20, 30)
+
+
+def test_notification_repeated_frame_restores_changed_state(led):
+    received: list[LEDBLEState] = []
+    led.register_callback(received.append)
+    packet = bytearray([0x81, KNOWN_MODEL, 0x23, 0x01, 0x02, 0x03, 10, 20, 30, 40, 5])
+    led._notification_handler(0, packet)
+    # A command replaced the state since; the same frame must win it back.
+    led._state = replace(led._state, rgb=(1, 2, 3))
+    led._notification_handler(0, packet)
+    assert led.rgb == (10, 20, 30)
+    assert len(received) == 2
+
+
 # ---------------------------------------------------------------------------
 # Callbacks
 # ---------------------------------------------------------------------------
@@ -430,7 +530,7 @@ def test_set_brightness_uses_white_path(loop, led):
     led._state = replace(led._state, w=100)
     led.set_white = AsyncMock()
     loop.run_until_complete(led.set_brightness(150))
-    led.set_white.assert_awaited_once_with(150)
+    led.set_white.assert_awaited_once_with(150, confirm=False)
 
 
 def test_set_brightness_uses_rgb_path(loop, led):
@@ -468,7 +568,7 @@ def test_async_set_effect_dispatches_pattern(loop, led):
     name = EFFECT_LIST[0]
     loop.run_until_complete(led.async_set_effect(name, 50, 100))
     led.async_set_preset_pattern.assert_awaited_once_with(
-        PresetPattern.str_to_val(name), 50, 100
+        PresetPattern.str_to_val(name), 50, 100, confirm=False
     )
 
 
@@ -516,3 +616,302 @@ def test_execute_command_locked_writes_each_command(loop, led):
     led._write_char = Mock()
     loop.run_until_complete(led._execute_command_locked([b"\x01", b"\x02"]))
     assert client.write_gatt_char.await_count == 2
+
+
+def test_write_window_must_be_positive(make_led):
+    with pytest.raises(ValueError, match="write_window"):
+        make_led(write_window=0)
+
+
+def _pipelined_led(make_led: Callable[..., LEDBLE], window: int) -> LEDBLE:
+    led = make_led(write_window=window)
+    led._read_char = Mock()
+    led._write_char = Mock()
+    return led
+
+
+def test_execute_command_locked_pipelines_within_window(loop, make_led):
+    led = _pipelined_led(make_led, 2)
+    in_flight = 0
+    peak = 0
+    written: list[bytes] = []
+
+    async def _write(_char, command, _response):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        written.append(command)
+        await asyncio.sleep(0)
+        in_flight -= 1
+
+    led._client = Mock()
+    led._client.write_gatt_char = _write
+    commands = [bytes([i]) for i in range(6)]
+    loop.run_until_complete(led._execute_command_locked(commands))
+    assert written == commands
+    assert peak == 2
+    assert in_flight == 0
+
+
+def test_execute_command_locked_pipeline_raises_first_failure(loop, make_led):
+    led = _pipelined_led(make_led, 3)
+    started: list[bytes] = []
+
+    async def _write(_char, command, _response):
+        started.append(command)
+        if command == b"\x01":
+            raise BleakError("boom")
+        await asyncio.sleep(1)
+
+    led._client = Mock()
+    led._client.write_gatt_char = _write
+    with pytest.raises(BleakError, match="boom"):
+        loop.run_until_complete(
+            led._execute_command_locked([bytes([i]) for i in range(5)])
+        )
+    # The failure stops the batch before the rest is handed off.
+    assert b"\x04" not in started
+
+
+def test_execute_command_locked_pipeline_retrieves_every_failure(loop, make_led):
+    led = _pipelined_led(make_led, 2)
+    unretrieved: list[dict[str, object]] = []
+    loop.set_exception_handler(lambda _loop, context: unretrieved.append(context))
+
+    async def _write(_char, command, _response):
+        raise BleakError(f"boom {command[0]}")
+
+    async def _execute() -> None:
+        try:
+            await led._execute_command_locked([bytes([i]) for i in range(4)])
+        except BleakError:
+            pass
+
+    led._client = Mock()
+    led._client.write_gatt_char = _write
+    loop.run_until_complete(_execute())
+    # Collect the finished tasks so any unretrieved exception is reported.
+    gc.collect()
+    assert unretrieved == []
+
+
+# ---------------------------------------------------------------------------
+# Transitions
+# ---------------------------------------------------------------------------
+
+
+def _transition_led(led: LEDBLE) -> list[bytes]:
+    led._ensure_connected = AsyncMock()
+    led._resolve_protocol = AsyncMock()
+    led._set_protocol("LEDENET_ORIGINAL_RGBW")
+    written: list[bytes] = []
+
+    async def _send(commands):
+        written.append(bytes(commands[0]))
+
+    led._send_command_while_connected = AsyncMock(side_effect=_send)
+    return written
+
+
+def test_async_transition_rgb_fades_to_target(loop, led):
+    written = _transition_led(led)
+    states: list[LEDBLEState] = []
+    led.register_callback(states.append)
+    loop.run_until_complete(led.async_transition((255, 0, 0), duration=0.1))
+    reds = [frame[1] for frame in written]
+    assert reds == sorted(reds)
+    assert reds[-1] == 255
+    assert all(frame[5] == LevelWriteMode.COLORS.value for frame in written)
+    assert led.rgb == (255, 0, 0)
+    assert led.w == 0
+    # Callbacks fire once for the whole transition.
+    assert len(states) == 1
+
+
+def test_async_transition_applies_brightness_scaling(loop, led):
+    written = _transition_led(led)
+    loop.run_until_complete(led.async_transition((255, 0, 0), 128, duration=0.05))
+    assert led.rgb == led._calculate_brightness((255, 0, 0), 128)
+    assert written[-1][1] == led.rgb[0]
+
+
+def test_async_transition_rgbw(loop, led):
+    written = _transition_led(led)
+    loop.run_until_complete(led.async_transition(rgbw=(0, 0, 0, 200), duration=0.05))
+    assert written[-1][4] == 200
+    assert written[-1][5] == LevelWriteMode.ALL.value
+    assert led.w == 200
+
+
+def test_async_transition_brightness_only_fades_white(loop, led):
+    led._state = replace(led._state, w=10)
+    written = _transition_led(led)
+    loop.run_until_complete(led.async_transition(brightness=100, duration=0.05))
+    assert written[-1][4] == 100
+    assert written[-1][5] == LevelWriteMode.WHITES.value
+    assert led.w == 100
+
+
+def test_async_transition_brightness_only_uses_effect_path(loop, led):
+    led._state = replace(led._state, preset_pattern=next(iter(EFFECT_ID_NAME)))
+    led.set_brightness = AsyncMock()
+    loop.run_until_complete(led.async_transition(brightness=100))
+    led.set_brightness.assert_awaited_once_with(100)
+
+
+def test_async_transition_drops_late_frames(loop, led):
+    _transition_led(led)
+    written: list[bytes] = []
+
+    async def _slow_send(commands):
+        written.append(bytes(commands[0]))
+        await asyncio.sleep(0.03)
+
+    led._send_command_while_connected = _slow_send
+    loop.run_until_complete(led.async_transition((255, 0, 0), duration=0.2))
+    # 10 frames were scheduled but a 30ms link can only take a few of them.
+    assert len(written) < 10
+    assert written[-1][1] == 255
+
+
+def test_async_transition_records_last_written_frame_on_failure(loop, led):
+    _transition_led(led)
+    calls = 0
+
+    async def _failing_send(commands):
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            raise BleakError("boom")
+
+    led._send_command_while_connected = _failing_send
+    with pytest.raises(BleakError):
+        loop.run_until_complete(led.async_transition((250, 0, 0), duration=0.1))
+    assert 0 < led.rgb[0] < 250
+
+
+def _run_emulated(
+    loop: asyncio.AbstractEventLoop,
+    operation: Callable[[LEDBLE], Awaitable[object]],
+) -> LEDBLE:
+    """Run operation on an emulated device that disconnects after 0.2s idle."""
+    emulator = ControllerEmulator()
+    ble_device = emulator.add("AA:BB:CC:DD:EE:FF")
+
+    async def _run() -> LEDBLE:
+        led = LEDBLE(ble_device, disconnect_policy=FixedDisconnectPolicy(0.2))
+        with emulator.patch():
+            await led.update()
+            await operation(led)
+            # The idle timer is armed again once the operation ends.
+            assert led._disconnect_timer is not None
+            assert led.connection_stats.idle_disconnects == 0
+            await led.stop()
+        return led
+
+    return loop.run_until_complete(_run())
+
+
+def test_async_transition_outlasts_idle_timeout(loop):
+    led = _run_emulated(
+        loop, lambda led: led.async_transition((255, 0, 0), duration=0.5)
+    )
+    assert led.rgb == (255, 0, 0)
+
+
+def test_async_transition_validates_arguments(loop, led):
+    with pytest.raises(ValueError, match="Only one"):
+        loop.run_until_complete(
+            led.async_transition((1, 2, 3), rgbw=(1, 2, 3, 4), duration=0.1)
+        )
+    with pytest.raises(ValueError, match="must be set"):
+        loop.run_until_complete(led.async_transition())
+    with pytest.raises(ValueError, match="300 is outside"):
+        loop.run_until_complete(led.async_transition((1, 2, 300)))
+
+
+# ---------------------------------------------------------------------------
+# Frame streaming
+# ---------------------------------------------------------------------------
+
+
+async def _frames(count: int, delay: float = 0) -> AsyncIterator[tuple[int, int, int]]:
+    for i in range(count):
+        yield (i, 0, 0)
+        await asyncio.sleep(delay)
+
+
+def test_stream_frames_sends_every_frame_on_fast_link(loop, led):
+    led._ensure_connected = AsyncMock()
+    led._resolve_protocol = AsyncMock()
+    led._set_protocol("LEDENET_ORIGINAL_RGBW")
+    led._send_command_locked = AsyncMock()
+    states: list[LEDBLEState] = []
+    led.register_callback(states.append)
+
+    stats = loop.run_until_complete(led.stream_frames(_frames(5, 0.001)))
+
+    assert stats.frames_received == 5
+    assert stats.frames_sent == 5
+    assert stats.frames_dropped == 0
+    assert stats.fps > 0
+    assert led._send_command_locked.await_count == 5
+    assert led.rgb == (4, 0, 0)
+    assert len(states) == 1
+
+
+def test_stream_frames_sends_newest_frame_on_slow_link(loop, led):
+    led._ensure_connected = AsyncMock()
+    led._resolve_protocol = AsyncMock()
+    led._set_protocol("LEDENET_ORIGINAL_RGBW")
+    written: list[int] = []
+
+    async def _slow_write(commands):
+        written.append(commands[0][1])
+        await asyncio.sleep(0.02)
+
+    led._send_command_locked = _slow_write
+
+    stats = loop.run_until_complete(led.stream_frames(_frames(20, 0.002)))
+
+    assert stats.frames_received == 20
+    assert stats.frames_sent == len(written) < 20
+    assert stats.frames_dropped == 20 - len(written)
+    # The final frame always makes it out.
+    assert written[-1] == 19
+    assert written == sorted(written)
+
+
+def test_stream_frames_holds_operation_lock(loop, led):
+    led._ensure_connected = AsyncMock()
+    led._resolve_protocol = AsyncMock()
+    led._set_protocol("LEDENET_ORIGINAL_RGBW")
+    locked: list[bool] = []
+
+    async def _write(_commands):
+        locked.append(led._operation_lock.locked())
+
+    led._send_command_locked = _write
+    loop.run_until_complete(led.stream_frames(_frames(3)))
+    assert locked == [True, True, True]
+    assert not led._operation_lock.locked()
+
+
+def test_stream_frames_outlasts_idle_timeout(loop):
+    led = _run_emulated(loop, lambda led: led.stream_frames(_frames(10, 0.05)))
+    assert led.rgb == (9, 0, 0)
+
+
+def test_stream_frames_propagates_source_errors(loop, led):
+    led._ensure_connected = AsyncMock()
+    led._resolve_protocol = AsyncMock()
+    led._set_protocol("LEDENET_ORIGINAL_RGBW")
+    led._send_command_locked = AsyncMock()
+
+    async def _broken() -> AsyncIterator[tuple[int, int, int]]:
+        yield (1, 2, 3)
+        raise RuntimeError("analyzer died")
+
+    with pytest.raises(RuntimeError, match="analyzer died"):
+        loop.run_until_complete(led.stream_frames(_broken()))
+    assert led.rgb == (1, 2, 3)
@@ -7,12 +7,14 @@ bleak client and the lower-level locked sender, without a real BLE backend.
 from __future__ import annotations
 
 import asyncio
+from collections.abc import Callable
 from unittest.mock import AsyncMock, Mock
 
 import pytest
 from bleak.exc import BleakDBusError, BleakError
 from bleak_retry_connector import BleakNotFoundError
 
+from led_ble import LEDBLEState
 from led_ble.const import STATE_COMMAND
 from led_ble.exceptions import CharacteristicMissingError
 from led_ble.led_ble import LEDBLE
@@ -306,8 +308,9 @@ def test_send_command_while_connected_reraises_bleak_exceptions(loop, led):
 # _send_command_locked error recovery
 #
 # The locked sender must disconnect (to reset state for a later retry) and
-# re-raise on a BLE error. The retry decorator wraps this method, so we
-# neutralise asyncio.sleep to keep the backoff/retry delays out of the test.
+# re-raise on a BLE error. It retries per its retry policy, reconnecting
+# first, so we stub the reconnect and neutralise asyncio.sleep to keep the
+# backoff/retry delays out of the test.
 # ---------------------------------------------------------------------------
 
 
@@ -319,6 +322,7 @@ def test_send_command_locked_disconnects_on_dbus_error(
         side_effect=BleakDBusError("org.bluez.Error.Failed", [])
     )
     led._execute_disconnect = AsyncMock()
+    led._ensure_connected = AsyncMock()
 
     with pytest.raises(BleakDBusError):
         loop.run_until_complete(led._send_command_locked([b"\x01"]))
@@ -333,6 +337,7 @@ def test_send_command_locked_disconnects_on_bleak_error(
     monkeypatch.setattr(asyncio, "sleep", AsyncMock())
     led._execute_command_locked = AsyncMock(side_effect=BleakError("boom"))
     led._execute_disconnect = AsyncMock()
+    led._ensure_connected = AsyncMock()
 
     with pytest.raises(BleakError):
         loop.run_until_complete(led._send_command_locked([b"\x01"]))
@@ -439,3 +444,120 @@ def test_execute_disconnect_without_read_char_skips_stop_notify(
     client.stop_notify.assert_not_awaited()
     client.disconnect.assert_awaited_once()
     assert led._client is None
+
+
+# ---------------------------------------------------------------------------
+# Levels coalescing
+# ---------------------------------------------------------------------------
+
+
+def _make_coalescing_led(make_led: Callable[..., LEDBLE]) -> LEDBLE:
+    led = make_led(coalesce_levels=True)
+    led._ensure_connected = AsyncMock()
+    led._resolve_protocol = AsyncMock()
+    led._set_protocol("LEDENET_ORIGINAL_RGBW")
+    return led
+
+
+def test_coalescing_disabled_sends_every_frame(
+    loop: asyncio.AbstractEventLoop, led: LEDBLE
+) -> None:
+    led._send_command = AsyncMock()
+    led._set_protocol("LEDENET_ORIGINAL_RGBW")
+
+    async def run() -> None:
+        await asyncio.gather(*(led.set_rgb((i, 0, 0)) for i in range(5)))
+
+    loop.run_until_complete(run())
+    assert led._send_command.await_count == 5
+
+
+def test_coalescing_keeps_only_latest_queued_levels(
+    loop: asyncio.AbstractEventLoop, make_led: Callable[..., LEDBLE]
+) -> None:
+    led = _make_coalescing_led(make_led)
+    written: list[list[bytes]] = []
+    release = asyncio.Event()
+
+    async def _locked(commands: list[bytes]) -> None:
+        written.append(commands)
+        await release.wait()
+
+    led._send_command_locked = _locked
+    states: list[LEDBLEState] = []
+    led.register_callback(states.append)
+
+    async def run() -> None:
+        tasks = [asyncio.ensure_future(led.set_rgb((i, 0, 0))) for i in range(1, 6)]
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+
+    loop.run_until_complete(run())
+    # The first frame went straight out; 2..4 were replaced by 5.
+    assert [bytes(c[0])[1] for c in written] == [1, 5]
+    assert led.rgb == (5, 0, 0)
+    assert [s.rgb for s in states] == [(1, 0, 0), (5, 0, 0)]
+
+
+def test_coalescing_preserves_order_around_power_commands(
+    loop: asyncio.AbstractEventLoop, make_led: Callable[..., LEDBLE]
+) -> None:
+    led = _make_coalescing_led(make_led)
+    written: list[bytes] = []
+    release = asyncio.Event()
+
+    async def _locked(commands: list[bytes]) -> None:
+        written.append(bytes(commands[0]))
+        await release.wait()
+
+    led._send_command_locked = _locked
+
+    async def run() -> None:
+        tasks = [
+            asyncio.ensure_future(led.set_rgb((1, 0, 0))),
+            asyncio.ensure_future(led.set_rgb((2, 0, 0))),
+            asyncio.ensure_future(led.turn_off()),
+            asyncio.ensure_future(led.set_rgb((3, 0, 0))),
+        ]
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+
+    loop.run_until_complete(run())
+    assert written[0][1] == 1
+    assert written[1][1] == 2
+    assert written[2][0] == 0xCC
+    assert written[3][1] == 3
+
+
+def test_coalescing_propagates_errors_to_superseded_callers(
+    loop: asyncio.AbstractEventLoop, make_led: Callable[..., LEDBLE]
+) -> None:
+    led = _make_coalescing_led(make_led)
+    release = asyncio.Event()
+    calls = 0
+
+    async def _locked(commands: list[bytes]) -> None:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        if calls > 1:
+            raise BleakError("boom")
+
+    led._send_command_locked = _locked
+
+    async def run() -> list[BaseException | None]:
+        tasks = [asyncio.ensure_future(led.set_rgb((i, 0, 0))) for i in range(1, 4)]
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = loop.run_until_complete(run())
+    assert results[0] is None
+    assert isinstance(results[1], BleakError)
+    assert isinstance(results[2], BleakError)
+    assert led._pending_levels is None
@@ -0,0 +1,146 @@
+"""Tests for the metrics counters, histograms and sinks."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from bleak.exc import BleakError
+
+from led_ble.metrics import (
+    COMMAND_RETRIES,
+    COMMANDS,
+    CONNECT_ATTEMPTS,
+    CONNECT_TIME,
+    GLOBAL_METRICS,
+    LATENCY_BUCKETS,
+    LOCK_WAIT,
+    UPDATE_ROUND_TRIP,
+    WRITE_LATENCY,
+    HistogramSnapshot,
+    Metrics,
+    add_metrics_sink,
+    metrics_snapshot,
+)
+
+from .conftest import FakeServices
+
+
+@pytest.fixture(autouse=True)
+def _reset_global_metrics():
+    GLOBAL_METRICS.reset()
+    yield
+    GLOBAL_METRICS.reset()
+
+
+def test_counters_roll_up_into_parent():
+    parent = Metrics()
+    first = Metrics("A", parent)
+    second = Metrics("B", parent)
+    first.increment("writes")
+    second.increment("writes", 2)
+    assert first.snapshot().counters == {"writes": 1}
+    assert parent.snapshot().counters == {"writes": 3}
+
+
+def test_histogram_buckets_and_quantiles():
+    metrics = Metrics()
+    for value in (0.0005, 0.003, 0.003, 0.2, 100):
+        metrics.observe("latency", value)
+    histogram = metrics.snapshot().histograms["latency"]
+    assert histogram.count == 5
+    assert histogram.total == pytest.approx(100.2065)
+    assert histogram.bounds == LATENCY_BUCKETS
+    assert sum(histogram.buckets) == 5
+    assert histogram.buckets[0] == 1
+    assert histogram.buckets[-1] == 1
+    assert histogram.quantile(0.5) == 0.005
+    assert histogram.quantile(0.8) == 0.25
+    assert histogram.quantile(1.0) == float("inf")
+    assert HistogramSnapshot((1.0,), (0, 0), 0, 0.0).quantile(0.5) == 0.0
+
+
+def test_reset():
+    metrics = Metrics()
+    metrics.increment("a")
+    metrics.observe("b", 1)
+    metrics.reset()
+    snapshot = metrics.snapshot()
+    assert snapshot.counters == {}
+    assert snapshot.histograms == {}
+
+
+def test_sink_receives_values_and_errors_are_logged(caplog):
+    received: list[tuple[str | None, str, float]] = []
+    remove = add_metrics_sink(lambda *args: received.append(args))
+    remove_broken = add_metrics_sink(Mock(side_effect=RuntimeError("boom")))
+    try:
+        Metrics("A", GLOBAL_METRICS).increment("writes")
+        Metrics("A").observe("latency", 0.5)
+    finally:
+        remove()
+        remove_broken()
+    assert received == [("A", "writes", 1), ("A", "latency", 0.5)]
+    assert "Error in metrics sink" in caplog.text
+    Metrics("A").increment("writes")
+    assert len(received) == 2
+
+
+def test_led_records_writes_lock_wait_and_retries(loop, led):
+    led._read_char = Mock()
+    led._write_char = Mock()
+    led._client = Mock()
+    led._client.write_gatt_char = AsyncMock(side_effect=[BleakError("boom"), None])
+    led._execute_disconnect = AsyncMock()
+    loop.run_until_complete(led._send_command_while_connected([b"\x01"]))
+    snapshot = led.metrics
+    assert snapshot.counters[COMMANDS] == 1
+    assert snapshot.histograms[COMMAND_RETRIES].total == 1
+    assert snapshot.histograms[LOCK_WAIT].count == 1
+    assert snapshot.histograms[WRITE_LATENCY].count == 1
+    assert metrics_snapshot().counters[COMMANDS] == 1
+
+
+def test_led_records_pipelined_write_latency(loop, led):
+    led._write_window = 3
+    led._read_char = Mock()
+    led._write_char = Mock()
+    led._client = Mock()
+    led._client.write_gatt_char = AsyncMock()
+    loop.run_until_complete(led._execute_command_locked([b"\x01", b"\x02", b"\x03"]))
+    assert led.metrics.histograms[WRITE_LATENCY].count == 3
+
+
+def test_led_records_connect_attempts_and_time(loop, led, monkeypatch):
+    client = Mock()
+    client.services = FakeServices()
+    client.clear_cache = AsyncMock()
+    client.disconnect = AsyncMock()
+    monkeypatch.setattr(
+        "led_ble.led_ble.establish_connection", AsyncMock(return_value=client)
+    )
+    led._resolve_characteristics = Mock(side_effect=[False, True])
+    loop.run_until_complete(led._establish_connection())
+    snapshot = led.metrics
+    assert snapshot.counters[CONNECT_ATTEMPTS] == 2
+    assert snapshot.histograms[CONNECT_TIME].count == 1
+
+
+def test_led_records_update_round_trip(loop, led):
+    led._ensure_connected = AsyncMock()
+    led._resolve_protocol = AsyncMock()
+    led._set_protocol("LEDENET_ORIGINAL_RGBW")
+    led._send_command = AsyncMock()
+    packet = bytearray([0x81, 0xE3, 0x23, 0x01, 0x02, 0x03, 10, 20, 30, 40, 5])
+
+    async def run() -> None:
+        await led.update()
+        await asyncio.sleep(0.01)
+        led._notification_handler(0, packet)
+        led._notification_handler(0, packet)
+
+    loop.run_until_complete(run())
+    histogram = led.metrics.histograms[UPDATE_ROUND_TRIP]
+    assert histogram.count == 1
+    assert histogram.total >= 0.01
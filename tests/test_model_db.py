@@ -2,21 +2,63 @@
 
 from __future__ import annotations
 
-from flux_led.models_db import MinVersionProtocol
-from flux_led.protocol import PROTOCOL_LEDENET_ORIGINAL_RGBW
+import json
+from collections.abc import Iterator
+
+import pytest
+from flux_led import const as flux_const
+from flux_led import protocol as flux_protocol
 
 from led_ble.model_db import (
+    COLOR_MODE_RGBW,
+    COLOR_MODES_RGB_W,
     DEFAULT_MODEL,
     MODEL_MAP,
     MODELS,
+    PROTOCOL_LEDENET_ORIGINAL_RGBW,
     UNKNOWN_MODEL,
     LEDBLEModel,
+    MinVersionProtocol,
     get_model,
     get_model_description,
+    get_model_for_name,
     is_known_model,
+    load_models,
+    name_prefix,
+    protocol_cls,
+    register_model,
 )
 
 
+@pytest.fixture
+def restore_models() -> Iterator[None]:
+    """Undo the models a test registers."""
+    models = list(MODELS)
+    yield
+    MODELS[:] = []
+    MODEL_MAP.clear()
+    for model in models:
+        register_model(model)
+
+
+def _model(model_num: int, *names: str) -> LEDBLEModel:
+    return LEDBLEModel(
+        model_num=model_num,
+        models=list(names),
+        description="Test",
+        protocols=[MinVersionProtocol(0, PROTOCOL_LEDENET_ORIGINAL_RGBW)],
+        color_modes=COLOR_MODES_RGB_W,
+    )
+
+
+def test_names_match_flux_led():
+    assert (
+        PROTOCOL_LEDENET_ORIGINAL_RGBW == flux_protocol.PROTOCOL_LEDENET_ORIGINAL_RGBW
+    )
+    assert COLOR_MODE_RGBW == flux_const.COLOR_MODE_RGBW
+    assert COLOR_MODES_RGB_W == flux_const.COLOR_MODES_RGB_W
+
+
 def test_known_models_are_indexed_by_number():
     for model in MODELS:
         assert MODEL_MAP[model.model_num] is model
@@ -93,3 +135,157 @@ def test_protocol_for_version_num_below_all_minimums_uses_default() -> None:
         color_modes=set(),
     )
     assert model.protocol_for_version_num(1) == "PROTO_LOW"
+
+
+def test_unknown_models_are_cached():
+    assert get_model(0xAB) is get_model(0xAB)
+    assert get_model(0xAB) is not get_model(0xAB, fallback_protocol="LEDENET_ORIGINAL")
+
+
+def test_name_prefix():
+    assert name_prefix("Triones:C10511000166") == "Triones:"
+    assert name_prefix("Dream~MAC") == "Dream~"
+    assert name_prefix("LEDBLE-DE1254F9") == "LEDBLE-"
+    assert name_prefix("LEDnet") is None
+
+
+def test_get_model_for_name_matches_advertised_prefixes():
+    assert get_model_for_name("Triones:0123456789") is MODEL_MAP[0x04]
+    assert get_model_for_name("Dream~1A2B") is MODEL_MAP[0x10]
+    assert get_model_for_name("LEDBlue-00000000") is MODEL_MAP[0x15]
+    assert get_model_for_name("LEDBLE-00000000") is MODEL_MAP[0x54]
+    assert get_model_for_name("QHM-1234") is MODEL_MAP[0xE3]
+    assert get_model_for_name("Dream-1234") is None
+    assert get_model_for_name("LEDnet") is None
+    assert get_model_for_name(None) is None
+
+
+def test_register_model_replaces_and_indexes(restore_models):
+    register_model(_model(0xA1, "Acme-0001"))
+    assert is_known_model(0xA1)
+    assert get_model_for_name("Acme-FFFF") is MODEL_MAP[0xA1]
+    replacement = _model(0xA1, "Other:0001")
+    register_model(replacement)
+    assert [model for model in MODELS if model.model_num == 0xA1] == [replacement]
+    assert get_model_for_name("Acme-FFFF") is None
+    assert get_model_for_name("Other:FFFF") is replacement
+
+
+def test_shared_name_prefix_identifies_no_model(restore_models):
+    register_model(_model(0xA1, "QHM-0001"))
+    assert get_model_for_name("QHM-095F") is None
+    assert get_model(0xE3).models == ["QHM-095F"]
+
+
+def test_load_models(tmp_path, restore_models):
+    path = tmp_path / "models.json"
+    path.write_text(
+        json.dumps(
+            [
+                {
+                    "model_num": "0xA1",
+                    "models": ["Acme-0001"],
+                    "description": "Controller RGB",
+                    "protocols": [
+                        {"min_version": 2, "protocol": "LEDENET_ORIGINAL_RGBW"},
+                        {"min_version": 0, "protocol": "LEDENET_ORIGINAL"},
+                    ],
+                    "color_modes": ["RGB"],
+                },
+                {
+                    "model_num": 0xA2,
+                    "description": "Bulb",
+                    "protocols": [{"min_version": 0, "protocol": "LEDENET_ORIGINAL"}],
+                },
+            ]
+        )
+    )
+    first, second = load_models(path)
+    assert get_model(0xA1) is first
+    assert first.protocol_for_version_num(1) == "LEDENET_ORIGINAL"
+    assert first.color_modes == {"RGB"}
+    assert get_model_for_name("Acme-1234") is first
+    assert get_model(0xA2) is second
+    assert second.models == []
+    assert second.color_modes == COLOR_MODES_RGB_W
+
+
+@pytest.mark.parametrize(
+    "entry",
+    [
+        {"model_num": 0x1FF, "description": "x", "protocols": []},
+        {"model_num": 0xA1, "description": "x", "protocols": []},
+        {"model_num": 0xA1, "protocols": [[0, "LEDENET_ORIGINAL"]]},
+        {
+            "model_num": 0xA1,
+            "description": "x",
+            "protocols": [{"min_version": 0, "protocol": "NOT_A_PROTOCOL"}],
+        },
+    ],
+)
+def test_load_models_rejects_invalid_files(tmp_path, restore_models, entry):
+    path = tmp_path / "models.json"
+    valid = {
+        "model_num": 0xA2,
+        "description": "x",
+        "protocols": [{"min_version": 0, "protocol": "LEDENET_ORIGINAL"}],
+    }
+    path.write_text(json.dumps([valid, entry]))
+    with pytest.raises(ValueError, match="Invalid model definitions"):
+        load_models(path)
+    assert not is_known_model(0xA2)
+
+
+def test_protocol_for_version_num_with_unsorted_protocols():
+    model = LEDBLEModel(
+        model_num=0x99,
+        models=["test"],
+        description="test",
+        protocols=[
+            MinVersionProtocol(2, "PROTO_MID"),
+            MinVersionProtocol(0, "PROTO_LOW"),
+            MinVersionProtocol(9, "PROTO_HIGH"),
+        ],
+        color_modes=set(),
+    )
+    assert model.protocol_for_version_num(0) == "PROTO_LOW"
+    assert model.protocol_for_version_num(1) == "PROTO_LOW"
+    assert model.protocol_for_version_num(2) == "PROTO_MID"
+    assert model.protocol_for_version_num(8) == "PROTO_MID"
+    assert model.protocol_for_version_num(9) == "PROTO_HIGH"
+    assert model.protocol_for_version_num(255) == "PROTO_HIGH"
+    # The definition keeps its order; only the lookup is sorted.
+    assert [protocol.min_version for protocol in model.protocols] == [2, 0, 9]
+
+
+@pytest.mark.parametrize(
+    "protocols",
+    [
+        [],
+        [MinVersionProtocol(1, "PROTO_A"), MinVersionProtocol(1, "PROTO_B")],
+        [MinVersionProtocol(-1, "PROTO_A")],
+        # A version read from JSON as a string.
+        [MinVersionProtocol(0, "PROTO_A"), MinVersionProtocol("1", "PROTO_B")],  # type: ignore[arg-type]
+    ],
+)
+def test_model_rejects_invalid_protocols(protocols):
+    with pytest.raises(ValueError, match="0x99"):
+        LEDBLEModel(
+            model_num=0x99,
+            models=[],
+            description="test",
+            protocols=protocols,
+            color_modes=set(),
+        )
+
+
+def test_protocol_cls_is_memoized():
+    from flux_led.base_device import PROTOCOL_NAME_TO_CLS
+
+    cls = protocol_cls(PROTOCOL_LEDENET_ORIGINAL_RGBW)
+    assert cls is PROTOCOL_NAME_TO_CLS[PROTOCOL_LEDENET_ORIGINAL_RGBW]
+    hits = protocol_cls.cache_info().hits
+    assert protocol_cls(PROTOCOL_LEDENET_ORIGINAL_RGBW) is cls
+    assert protocol_cls.cache_info().hits == hits + 1
+    with pytest.raises(ValueError, match="Invalid protocol"):
+        protocol_cls("NOT_A_PROTOCOL")
@@ -6,7 +6,7 @@ from dataclasses import FrozenInstanceError, replace
 
 import pytest
 
-from led_ble import LEDBLEState
+from led_ble import LEDBLEState, StreamStats
 
 
 def test_defaults():
@@ -43,3 +43,13 @@ def test_replace_returns_new_instance():
     assert updated.power is True
     assert state.power is False
     assert updated is not state
+
+
+def test_stream_stats_derived_values():
+    stats = StreamStats(frames_received=30, frames_sent=20, duration=2.0)
+    assert stats.frames_dropped == 10
+    assert stats.fps == 10.0
+
+
+def test_stream_stats_zero_duration():
+    assert StreamStats(0, 0, 0.0).fps == 0.0
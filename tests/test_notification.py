@@ -0,0 +1,49 @@
+"""Tests for decoding the notifications sent by the devices."""
+
+from __future__ import annotations
+
+from led_ble.led_ble import LEDBLE
+from led_ble.models import LEDBLEState
+
+STATUS_FRAME = bytearray([0x81, 0xE3, 0x24, 0x25, 0x61, 0x10, 1, 2, 3, 4, 9, 0xFF])
+
+
+def test_power_frame_sets_power(led: LEDBLE) -> None:
+    led._notification_handler(0, bytearray([0xCC, 0x23, 0x00, 0x00]))
+    assert led.on is True
+    led._notification_handler(0, bytearray([0xCC, 0x24, 0x00, 0x00]))
+    assert led.on is False
+
+
+def test_malformed_power_frames_are_ignored(led: LEDBLE) -> None:
+    led._notification_handler(0, bytearray([0xCC, 0x23, 0x00]))
+    led._notification_handler(0, bytearray([0x81, 0x23, 0x00, 0x00]))
+    assert led.state == LEDBLEState()
+
+
+def test_status_frame_sets_state(led: LEDBLE) -> None:
+    led._notification_handler(0, STATUS_FRAME)
+    assert led.state == LEDBLEState(
+        power=False,
+        rgb=(1, 2, 3),
+        w=4,
+        model_num=0xE3,
+        preset_pattern=0x25,
+        mode=0x61,
+        speed=0x10,
+        version_num=9,
+    )
+    assert led.state_age is not None
+
+
+def test_short_status_frame_is_ignored(led: LEDBLE) -> None:
+    led._notification_handler(0, STATUS_FRAME[:10])
+    assert led.state == LEDBLEState()
+    assert led.state_age is None
+
+
+def test_power_byte_of_status_frame(led: LEDBLE) -> None:
+    frame = STATUS_FRAME.copy()
+    frame[2] = 0x23
+    led._notification_handler(0, frame)
+    assert led.on is True
@@ -0,0 +1,167 @@
+"""Tests for the fleet poller."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, cast
+
+import pytest
+from bleak.exc import BleakError
+
+from led_ble.led_ble import LEDBLE
+from led_ble.models import PollStats
+from led_ble.poller import FleetPoller
+
+from .conftest import FakeBLEDevice
+
+
+class FakeDevice:
+    """A device recording when update() was called."""
+
+    def __init__(
+        self,
+        address: str,
+        adapter: str = "hci0",
+        duration: float = 0.0,
+        error: Exception | None = None,
+    ) -> None:
+        self.address = address
+        self.name = address
+        self.loop = asyncio.get_running_loop()
+        self.ble_device = FakeBLEDevice(address)
+        self.ble_device.details = {"source": adapter}
+        self.state_age: float | None = None
+        self.duration = duration
+        self.error = error
+        self.polled: list[float] = []
+        self.running = 0
+        self.max_running = 0
+
+    async def update(self) -> None:
+        self.polled.append(self.loop.time())
+        self.running += 1
+        try:
+            await asyncio.sleep(self.duration)
+            if self.error:
+                raise self.error
+        finally:
+            self.running -= 1
+
+
+def _poller(devices: list[FakeDevice], **kwargs: Any) -> FleetPoller:
+    return FleetPoller(cast(list[LEDBLE], devices), **kwargs)
+
+
+def test_rejects_invalid_settings():
+    with pytest.raises(ValueError, match="interval"):
+        FleetPoller(interval=0)
+    with pytest.raises(ValueError, match="jitter"):
+        FleetPoller(jitter=1)
+    with pytest.raises(ValueError, match="max_polls_per_adapter"):
+        FleetPoller(max_polls_per_adapter=0)
+
+
+def test_spreads_polls_over_the_interval(loop):
+    async def run() -> list[FakeDevice]:
+        devices = [FakeDevice(f"A{index}") for index in range(4)]
+        poller = _poller(devices, interval=0.2, jitter=0)
+        started = loop.time()
+        poller.start()
+        poller.start()
+        await asyncio.sleep(0.3)
+        await poller.stop()
+        for device in devices:
+            device.polled = [at - started for at in device.polled]
+        return devices
+
+    devices = loop.run_until_complete(run())
+    firsts = [device.polled[0] for device in devices]
+    assert firsts == sorted(firsts)
+    assert firsts[1] - firsts[0] == pytest.approx(0.05, abs=0.02)
+    assert firsts[3] == pytest.approx(0.15, abs=0.02)
+    assert devices[0].polled[1] == pytest.approx(0.2, abs=0.02)
+
+
+def test_skips_devices_with_fresh_state(loop):
+    async def run() -> tuple[FleetPoller, FakeDevice, FakeDevice]:
+        fresh = FakeDevice("A")
+        fresh.state_age = 0.0
+        stale = FakeDevice("B")
+        stale.state_age = 10.0
+        poller = _poller([fresh, stale], interval=0.1, jitter=0)
+        poller.start()
+        await asyncio.sleep(0.28)
+        await poller.stop()
+        return poller, fresh, stale
+
+    poller, fresh, stale = loop.run_until_complete(run())
+    assert fresh.polled == []
+    assert len(stale.polled) == 3
+    assert poller.stats.skipped >= 2
+    assert poller.stats.polls == 3
+
+
+def test_limits_polls_per_adapter(loop):
+    async def run() -> list[FakeDevice]:
+        devices = [FakeDevice(f"A{index}", "hci0", duration=0.1) for index in range(3)]
+        other = FakeDevice("B", "hci1", duration=0.1)
+        poller = _poller([*devices, other], interval=0.1, max_polls_per_adapter=1)
+        poller.start()
+        peak = {"hci0": 0, "hci1": 0}
+        for _ in range(30):
+            await asyncio.sleep(0.01)
+            peak["hci0"] = max(peak["hci0"], sum(d.running for d in devices))
+            peak["hci1"] = max(peak["hci1"], other.running)
+        await poller.stop()
+        assert peak == {"hci0": 1, "hci1": 1}
+        return devices
+
+    loop.run_until_complete(run())
+
+
+def test_counts_failures_and_busy_devices(loop):
+    async def run() -> FleetPoller:
+        failing = FakeDevice("A", error=BleakError("boom"))
+        slow = FakeDevice("B", duration=0.15)
+        poller = _poller([failing, slow], interval=0.1, jitter=0)
+        poller.start()
+        await asyncio.sleep(0.17)
+        await poller.stop()
+        return poller
+
+    poller = loop.run_until_complete(run())
+    assert poller.stats.failures == 2
+    assert poller.stats.busy == 1
+
+
+def test_add_and_remove(loop):
+    async def run() -> tuple[FleetPoller, FakeDevice, FakeDevice]:
+        first = FakeDevice("A", duration=1)
+        poller = _poller([first], interval=0.05)
+        poller.start()
+        await asyncio.sleep(0.01)
+        poller.remove(cast(LEDBLE, first))
+        added = FakeDevice("B")
+        poller.add(cast(LEDBLE, added))
+        await asyncio.sleep(0.15)
+        assert poller.devices == [added]
+        await poller.stop()
+        return poller, first, added
+
+    poller, first, added = loop.run_until_complete(run())
+    assert len(first.polled) == 1
+    assert first.running == 0
+    assert added.polled
+    assert poller.stats == PollStats(polls=len(added.polled) + 1)
+
+
+def test_led_state_age(loop, led):
+    before = led.state_age
+    assert before is None
+    led._notification_handler(
+        0, bytearray([0x81, 0xE3, 0x23, 0x25, 0x61, 0x10, 1, 2, 3, 4, 5])
+    )
+    age = led.state_age
+    assert age is not None
+    assert 0 <= age < 1
+    assert led.ble_device.address == led.address
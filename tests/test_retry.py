@@ -0,0 +1,178 @@
+"""Tests for the retry policy and circuit breaker."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from bleak.exc import BleakError
+from bleak_retry_connector import BleakNotFoundError, calculate_backoff_time
+
+from led_ble.emulator import ControllerEmulator
+from led_ble.exceptions import CircuitOpenError
+from led_ble.led_ble import LEDBLE
+from led_ble.metrics import COMMAND_RETRIES
+from led_ble.retry import CircuitBreaker, CircuitState, ExponentialBackoffPolicy
+
+from .conftest import FakeAdvertisement
+
+
+def test_backoff_policy_rejects_invalid_settings():
+    with pytest.raises(ValueError, match="attempts"):
+        ExponentialBackoffPolicy(attempts=0)
+    with pytest.raises(ValueError, match="jitter"):
+        ExponentialBackoffPolicy(jitter=1)
+
+
+def test_backoff_policy_grows_exponentially_and_gives_up():
+    policy = ExponentialBackoffPolicy(attempts=4, base=0.5, max_backoff=1.5, jitter=0)
+    error = BleakError("boom")
+    assert [policy.backoff(attempt, error) for attempt in (1, 2, 3, 4)] == [
+        0.5,
+        1.0,
+        1.5,
+        None,
+    ]
+
+
+def test_backoff_policy_jitter_and_floor():
+    policy = ExponentialBackoffPolicy(base=1.0, jitter=0.5)
+    delays = {policy.backoff(1, BleakError("boom")) for _ in range(50)}
+    assert all(delay is not None and 0.5 <= delay <= 1.5 for delay in delays)
+    assert len(delays) > 1
+    slots = BleakNotFoundError("gone")
+    quick = ExponentialBackoffPolicy(base=0.01, jitter=0)
+    assert quick.backoff(1, slots) == calculate_backoff_time(slots)
+
+
+def _state(breaker: CircuitBreaker) -> CircuitState:
+    # Read through a call so the state is not narrowed from one check to the next.
+    return breaker.state
+
+
+def test_circuit_breaker_opens_and_probes():
+    with pytest.raises(ValueError, match="failure_threshold"):
+        CircuitBreaker(failure_threshold=0)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record_failure(0)
+    assert _state(breaker) is CircuitState.CLOSED
+    assert breaker.allow(1)
+    breaker.record_failure(1)
+    assert _state(breaker) is CircuitState.OPEN
+    assert not breaker.allow(5)
+    assert breaker.allow(11)
+    assert _state(breaker) is CircuitState.HALF_OPEN
+    assert not breaker.allow(12)
+    breaker.record_failure(12)
+    assert _state(breaker) is CircuitState.OPEN
+    assert not breaker.allow(13)
+    breaker.device_seen()
+    assert breaker.allow(13)
+    # A probe that never reports back is replaced after the reset timeout.
+    assert breaker.allow(23)
+    breaker.record_success()
+    assert _state(breaker) is CircuitState.CLOSED
+    assert breaker.failures == 0
+    breaker.device_seen()
+    assert _state(breaker) is CircuitState.CLOSED
+
+
+class _NoBackoff:
+    def __init__(self, attempts: int) -> None:
+        self.attempts = attempts
+
+    def backoff(self, attempt: int, error: Exception) -> float | None:
+        return 0 if attempt < self.attempts else None
+
+
+def test_retry_reconnects_after_a_failed_write(loop):
+    emulator = ControllerEmulator()
+    device = emulator.add("AA:BB:CC:DD:EE:FF")
+
+    async def run() -> LEDBLE:
+        led = LEDBLE(device, retry_policy=_NoBackoff(3))
+        with emulator.patch():
+            await led.update()
+            assert led._client is not None
+            led._client.write_gatt_char = AsyncMock(side_effect=BleakError("boom"))
+            await led.set_rgb((1, 2, 3))
+            await led.stop()
+        return led
+
+    led = loop.run_until_complete(run())
+    assert emulator.connects == 2
+    assert emulator.controllers[device.address].rgb == (1, 2, 3)
+    assert led.metrics.histograms[COMMAND_RETRIES].total == 1
+    assert led.circuit_breaker.state is CircuitState.CLOSED
+
+
+def test_retry_policy_gives_up(loop, led):
+    led._retry_policy = _NoBackoff(2)
+    led._execute_command_locked = AsyncMock(side_effect=BleakError("boom"))
+    led._execute_disconnect = AsyncMock()
+    led._ensure_connected = AsyncMock()
+    with pytest.raises(BleakError, match="boom"):
+        loop.run_until_complete(led._send_command_locked([b"\x01"]))
+    assert led._execute_command_locked.await_count == 2
+    assert led.circuit_breaker.failures == 1
+
+
+def test_circuit_breaker_fails_fast_until_the_device_advertises(loop):
+    emulator = ControllerEmulator()
+    device = emulator.add("AA:BB:CC:DD:EE:FF")
+    controller = emulator.controllers.pop(device.address)
+    connect = AsyncMock(wraps=emulator.establish_connection)
+    emulator.establish_connection = connect
+
+    async def run() -> LEDBLE:
+        led = LEDBLE(device, circuit_breaker=CircuitBreaker(failure_threshold=2))
+        with emulator.patch():
+            for _ in range(2):
+                with pytest.raises(BleakError, match="No emulated controller"):
+                    await led.update()
+            with pytest.raises(CircuitOpenError):
+                await led.update()
+            assert connect.await_count == 2
+            emulator.controllers[device.address] = controller
+            led.set_ble_device_and_advertisement_data(
+                device,
+                FakeAdvertisement(),  # type: ignore[arg-type]
+            )
+            await led.update()
+            await asyncio.sleep(0)
+            await led.stop()
+        return led
+
+    led = loop.run_until_complete(run())
+    assert led.circuit_breaker.state is CircuitState.CLOSED
+    assert led.state == controller.state
+
+
+def test_failed_probe_reopens_the_circuit(loop):
+    emulator = ControllerEmulator()
+    device = emulator.add("AA:BB:CC:DD:EE:FF")
+    controller = emulator.controllers[device.address]
+    breaker = CircuitBreaker(failure_threshold=1)
+
+    def _fail(data: bytes) -> bytes | None:
+        # The write fails and so does the reconnect for the retry.
+        emulator.controllers.pop(device.address, None)
+        raise BleakError("boom")
+
+    async def run() -> None:
+        led = LEDBLE(device, retry_policy=_NoBackoff(2), circuit_breaker=breaker)
+        with emulator.patch():
+            await led.update()
+            await led.stop()
+            breaker.record_failure(led.loop.time())
+            breaker.device_seen()
+            controller.handle_write = _fail
+            # The probe connects, and its retry reconnects without asking
+            # the circuit breaker again.
+            with pytest.raises(BleakError, match="No emulated controller"):
+                await led.set_rgb((1, 2, 3))
+            await led.stop()
+
+    loop.run_until_complete(run())
+    assert breaker.state is CircuitState.OPEN
@@ -0,0 +1,452 @@
+"""Tests for the adapter-aware connection slot scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import cast
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData
+from bleak.exc import BleakError
+
+from led_ble.led_ble import LEDBLE
+from led_ble.scheduler import (
+    DEFAULT_ADAPTER,
+    PRIORITY_COMMAND,
+    PRIORITY_IDLE,
+    AdapterUsage,
+    ConnectionScheduler,
+    adapter_for_device,
+)
+
+from .conftest import FakeAdvertisement, FakeBLEDevice
+
+
+def _device(address: str, details: object = None) -> BLEDevice:
+    device = FakeBLEDevice(address)
+    device.details = details
+    return cast(BLEDevice, device)
+
+
+def test_adapter_for_device():
+    assert adapter_for_device(_device("A", {"source": "hci1"})) == "hci1"
+    assert (
+        adapter_for_device(_device("A", {"path": "/org/bluez/hci2/dev_AA_BB"}))
+        == "hci2"
+    )
+    assert adapter_for_device(_device("A", None)) == DEFAULT_ADAPTER
+    assert adapter_for_device(_device("A", {"path": "bad"})) == DEFAULT_ADAPTER
+
+
+def test_rejects_invalid_limits():
+    with pytest.raises(ValueError, match="at least 1"):
+        ConnectionScheduler(max_connecting=0)
+    with pytest.raises(ValueError, match="at least 1"):
+        ConnectionScheduler(max_connections=0)
+
+
+def test_limits_concurrent_attempts(loop):
+    scheduler = ConnectionScheduler(max_connecting=1, max_connections=5)
+
+    async def run() -> None:
+        await scheduler.acquire(_device("A"))
+        second = asyncio.ensure_future(scheduler.acquire(_device("B")))
+        await asyncio.sleep(0)
+        assert not second.done()
+        assert scheduler.usage()[DEFAULT_ADAPTER] == AdapterUsage(1, 1, 1)
+        scheduler.attempt_done("A")
+        await second
+        assert scheduler.usage()[DEFAULT_ADAPTER] == AdapterUsage(1, 2, 0)
+
+    loop.run_until_complete(run())
+
+
+def test_limits_live_connections_and_release_frees_slot(loop):
+    scheduler = ConnectionScheduler(max_connecting=2, max_connections=1)
+
+    async def run() -> None:
+        await scheduler.acquire(_device("A"), PRIORITY_IDLE)
+        scheduler.attempt_done("A")
+        second = asyncio.ensure_future(scheduler.acquire(_device("B"), PRIORITY_IDLE))
+        await asyncio.sleep(0)
+        assert not second.done()
+        scheduler.release("A")
+        await second
+
+    loop.run_until_complete(run())
+
+
+def test_reconnect_reuses_held_connection_slot(loop):
+    scheduler = ConnectionScheduler(max_connecting=2, max_connections=1)
+
+    async def run() -> None:
+        await scheduler.acquire(_device("A"))
+        scheduler.attempt_done("A")
+        # A reconnect by the holder only needs an attempt slot.
+        await asyncio.wait_for(scheduler.acquire(_device("A")), 1)
+
+    loop.run_until_complete(run())
+
+
+def test_devices_on_different_adapters_do_not_compete(loop):
+    scheduler = ConnectionScheduler(max_connecting=1, max_connections=1)
+
+    async def run() -> None:
+        await scheduler.acquire(_device("A", {"source": "hci0"}))
+        await asyncio.wait_for(scheduler.acquire(_device("B", {"source": "hci1"})), 1)
+
+    loop.run_until_complete(run())
+    assert set(scheduler.usage()) == {"hci0", "hci1"}
+
+
+def test_commands_are_served_before_idle_waiters(loop):
+    scheduler = ConnectionScheduler(max_connecting=1, max_connections=5)
+    order: list[str] = []
+
+    async def waiter(address: str, priority: int) -> None:
+        await scheduler.acquire(_device(address), priority)
+        order.append(address)
+
+    async def run() -> None:
+        await scheduler.acquire(_device("A"))
+        tasks = [
+            asyncio.ensure_future(waiter("idle1", PRIORITY_IDLE)),
+            asyncio.ensure_future(waiter("cmd1", PRIORITY_COMMAND)),
+            asyncio.ensure_future(waiter("idle2", PRIORITY_IDLE)),
+            asyncio.ensure_future(waiter("cmd2", PRIORITY_COMMAND)),
+        ]
+        await asyncio.sleep(0)
+        for previous in ("A", "cmd1", "cmd2", "idle1"):
+            scheduler.attempt_done(previous)
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+    loop.run_until_complete(run())
+    assert order == ["cmd1", "cmd2", "idle1", "idle2"]
+
+
+def test_blocked_command_evicts_least_recently_used_connection(loop):
+    scheduler = ConnectionScheduler(max_connecting=2, max_connections=2)
+    evict_a, evict_b = Mock(), Mock()
+
+    async def run() -> None:
+        await scheduler.acquire(_device("A"), evict=evict_a)
+        await scheduler.acquire(_device("B"), evict=evict_b)
+        scheduler.attempt_done("A")
+        scheduler.attempt_done("B")
+        scheduler.touch("A")
+        waiting = asyncio.ensure_future(scheduler.acquire(_device("C")))
+        await asyncio.sleep(0)
+        evict_b.assert_called_once()
+        evict_a.assert_not_called()
+        scheduler.release("B")
+        await waiting
+
+    loop.run_until_complete(run())
+
+
+def test_blocked_idle_waiter_does_not_evict(loop):
+    scheduler = ConnectionScheduler(max_connecting=2, max_connections=1)
+    evict = Mock()
+
+    async def run() -> None:
+        await scheduler.acquire(_device("A"), evict=evict)
+        scheduler.attempt_done("A")
+        waiting = asyncio.ensure_future(scheduler.acquire(_device("B"), PRIORITY_IDLE))
+        await asyncio.sleep(0)
+        waiting.cancel()
+
+    loop.run_until_complete(run())
+    evict.assert_not_called()
+
+
+def test_cancelled_waiter_is_skipped(loop):
+    scheduler = ConnectionScheduler(max_connecting=1, max_connections=5)
+
+    async def run() -> None:
+        await scheduler.acquire(_device("A"))
+        cancelled = asyncio.ensure_future(scheduler.acquire(_device("B")))
+        waiting = asyncio.ensure_future(scheduler.acquire(_device("C")))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        scheduler.attempt_done("A")
+        await waiting
+
+    loop.run_until_complete(run())
+    assert scheduler.usage()[DEFAULT_ADAPTER].connections == 2
+
+
+def test_device_moving_adapters_releases_old_slot(loop):
+    scheduler = ConnectionScheduler(max_connecting=1, max_connections=1)
+
+    async def run() -> None:
+        await scheduler.acquire(_device("A", {"source": "hci0"}))
+        scheduler.attempt_done("A")
+        await scheduler.acquire(_device("A", {"source": "hci1"}))
+
+    loop.run_until_complete(run())
+    assert scheduler.usage()["hci0"] == AdapterUsage(0, 0, 0)
+    assert scheduler.usage()["hci1"] == AdapterUsage(1, 1, 0)
+
+
+def test_rejects_negative_warm_limit():
+    with pytest.raises(ValueError, match="max_warm_connections"):
+        ConnectionScheduler(max_warm_connections=-1)
+
+
+def test_warm_available_caps_warm_connections(loop):
+    scheduler = ConnectionScheduler(max_warm_connections=1)
+    assert scheduler.warm_available(_device("A"))
+
+    async def run() -> None:
+        await scheduler.acquire(_device("A"), PRIORITY_IDLE)
+        scheduler.attempt_done("A")
+
+    loop.run_until_complete(run())
+    assert not scheduler.warm_available(_device("B"))
+    # A command on the warm connection makes it an ordinary one.
+    scheduler.touch("A")
+    assert scheduler.warm_available(_device("B"))
+
+
+def test_warm_available_needs_free_slots(loop):
+    scheduler = ConnectionScheduler(max_connecting=1, max_connections=1)
+
+    async def run() -> None:
+        await scheduler.acquire(_device("A"))
+        assert not scheduler.warm_available(_device("B"))
+        scheduler.attempt_done("A")
+        assert not scheduler.warm_available(_device("B"))
+        # Other adapters are unaffected.
+        assert scheduler.warm_available(_device("C", {"source": "hci1"}))
+
+    loop.run_until_complete(run())
+
+
+def test_blocked_commands_evict_one_connection_each(loop):
+    scheduler = ConnectionScheduler(max_connecting=4, max_connections=2)
+    evict_a, evict_b = Mock(return_value=True), Mock(return_value=True)
+
+    async def run() -> None:
+        await scheduler.acquire(_device("A"), evict=evict_a)
+        await scheduler.acquire(_device("B"), evict=evict_b)
+        scheduler.attempt_done("A")
+        scheduler.attempt_done("B")
+        scheduler.touch("A")
+        first = asyncio.ensure_future(scheduler.acquire(_device("C")))
+        await asyncio.sleep(0)
+        evict_b.assert_called_once()
+        evict_a.assert_not_called()
+        # Later grants do not ask the device already disconnecting again.
+        scheduler.attempt_done("A")
+        evict_b.assert_called_once()
+        evict_a.assert_not_called()
+        second = asyncio.ensure_future(scheduler.acquire(_device("D")))
+        await asyncio.sleep(0)
+        evict_b.assert_called_once()
+        evict_a.assert_called_once()
+        scheduler.release("B")
+        scheduler.release("A")
+        await asyncio.gather(first, second)
+
+    loop.run_until_complete(run())
+
+
+def test_blocked_command_skips_connection_that_declines(loop):
+    scheduler = ConnectionScheduler(max_connecting=2, max_connections=2)
+    evict_a, evict_b = Mock(return_value=True), Mock(return_value=False)
+
+    async def run() -> None:
+        await scheduler.acquire(_device("A"), evict=evict_a)
+        await scheduler.acquire(_device("B"), evict=evict_b)
+        scheduler.attempt_done("A")
+        scheduler.attempt_done("B")
+        scheduler.touch("A")
+        waiting = asyncio.ensure_future(scheduler.acquire(_device("C")))
+        await asyncio.sleep(0)
+        evict_b.assert_called_once()
+        evict_a.assert_called_once()
+        scheduler.release("A")
+        await waiting
+
+    loop.run_until_complete(run())
+
+
+def test_blocked_command_evicts_warm_connection_first(loop):
+    scheduler = ConnectionScheduler(max_connecting=2, max_connections=2)
+    evict_a, evict_b = Mock(), Mock()
+
+    async def run() -> None:
+        await scheduler.acquire(_device("A"), evict=evict_a)
+        await scheduler.acquire(_device("B"), PRIORITY_IDLE, evict=evict_b)
+        scheduler.attempt_done("A")
+        scheduler.attempt_done("B")
+        waiting = asyncio.ensure_future(scheduler.acquire(_device("C")))
+        await asyncio.sleep(0)
+        evict_b.assert_called_once()
+        evict_a.assert_not_called()
+        waiting.cancel()
+
+    loop.run_until_complete(run())
+
+
+# ---------------------------------------------------------------------------
+# LEDBLE integration
+# ---------------------------------------------------------------------------
+
+
+def test_ensure_connected_holds_slot_until_disconnect(loop, monkeypatch, make_led):
+    scheduler = ConnectionScheduler(max_connecting=1, max_connections=1)
+    led = make_led(connection_scheduler=scheduler)
+    client = Mock()
+    client.is_connected = True
+    client.start_notify = AsyncMock()
+    client.stop_notify = AsyncMock()
+    client.disconnect = AsyncMock()
+    monkeypatch.setattr(
+        "led_ble.led_ble.establish_connection", AsyncMock(return_value=client)
+    )
+    led._resolve_characteristics = Mock(return_value=True)
+    led._protocol = Mock()
+
+    loop.run_until_complete(led._ensure_connected())
+    assert scheduler.usage()[DEFAULT_ADAPTER] == AdapterUsage(0, 1, 0)
+    loop.run_until_complete(led._execute_disconnect())
+    assert scheduler.usage()[DEFAULT_ADAPTER] == AdapterUsage(0, 0, 0)
+
+
+def test_ensure_connected_failure_releases_slot(loop, monkeypatch, make_led):
+    scheduler = ConnectionScheduler()
+    led = make_led(connection_scheduler=scheduler)
+    monkeypatch.setattr(
+        "led_ble.led_ble.establish_connection",
+        AsyncMock(side_effect=asyncio.TimeoutError),
+    )
+    with pytest.raises(asyncio.TimeoutError):
+        loop.run_until_complete(led._ensure_connected())
+    assert scheduler.usage()[DEFAULT_ADAPTER] == AdapterUsage(0, 0, 0)
+
+
+def test_unexpected_disconnect_releases_slot(loop, make_led):
+    scheduler = ConnectionScheduler()
+    led = make_led(connection_scheduler=scheduler)
+    client = Mock()
+
+    async def run() -> None:
+        await scheduler.acquire(led._ble_device)
+        scheduler.attempt_done(led.address)
+
+    loop.run_until_complete(run())
+    led._client = client
+    # A stale client from an earlier attempt must not release the slot.
+    led._disconnected(Mock())
+    assert scheduler.usage()[DEFAULT_ADAPTER].connections == 1
+    led._disconnected(client)
+    assert scheduler.usage()[DEFAULT_ADAPTER].connections == 0
+
+
+def test_evict_connection_skips_busy_device(loop, make_led):
+    led = make_led(connection_scheduler=ConnectionScheduler())
+    led._client = Mock()
+    led._execute_disconnect = AsyncMock()
+
+    async def run() -> None:
+        async with led._operation_lock:
+            assert led._evict_connection() is False
+        assert led._evict_connection() is True
+        await asyncio.sleep(0)
+
+    loop.run_until_complete(run())
+    led._execute_disconnect.assert_awaited_once()
+
+
+def test_evict_connection_is_not_an_idle_disconnect(loop, make_led):
+    led = make_led(connection_scheduler=ConnectionScheduler())
+    client = Mock(is_connected=True, disconnect=AsyncMock())
+    led._client = client
+    led._disconnect_timer = timer = Mock()
+
+    async def run() -> None:
+        assert led._evict_connection() is True
+        await asyncio.gather(*led._background_tasks)
+
+    loop.run_until_complete(run())
+    timer.cancel.assert_called_once()
+    assert led._disconnect_timer is None
+    client.disconnect.assert_awaited_once()
+    assert led._client is None
+    assert led.connection_stats.idle_disconnects == 0
+
+
+def _warm_led(make_led, monkeypatch, scheduler):
+    led = make_led(connection_scheduler=scheduler, warm=True)
+    client = Mock()
+    client.is_connected = True
+    client.start_notify = AsyncMock()
+    client.stop_notify = AsyncMock()
+    client.disconnect = AsyncMock()
+    connect = AsyncMock(return_value=client)
+    monkeypatch.setattr("led_ble.led_ble.establish_connection", connect)
+    led._resolve_characteristics = Mock(return_value=True)
+    led._protocol = Mock()
+    return led, connect
+
+
+def _advertise(loop: asyncio.AbstractEventLoop, led: LEDBLE) -> None:
+    async def run() -> None:
+        led.set_ble_device_and_advertisement_data(
+            led._ble_device, cast(AdvertisementData, FakeAdvertisement())
+        )
+        for task in list(led._background_tasks):
+            await task
+
+    loop.run_until_complete(run())
+
+
+def test_warm_mode_requires_scheduler(make_led):
+    with pytest.raises(ValueError, match="connection_scheduler"):
+        make_led(warm=True)
+
+
+def test_warm_mode_connects_on_advertisement(loop, monkeypatch, make_led):
+    scheduler = ConnectionScheduler(max_warm_connections=1)
+    led, connect = _warm_led(make_led, monkeypatch, scheduler)
+    _advertise(loop, led)
+    connect.assert_awaited_once()
+    assert led.connection_stats.warm_connects == 1
+    assert not scheduler.warm_available(_device("B"))
+    # Already connected; a second advertisement does nothing.
+    _advertise(loop, led)
+    connect.assert_awaited_once()
+
+    loop.run_until_complete(led._ensure_connected())
+    loop.run_until_complete(led._ensure_connected())
+    stats = led.connection_stats
+    assert (stats.warm_hits, stats.cold_starts) == (1, 0)
+    assert stats.warm_hit_latency < 0.1
+    assert scheduler.warm_available(_device("B"))
+    led._disconnect_timer.cancel()
+
+
+def test_warm_mode_respects_cap(loop, monkeypatch, make_led):
+    scheduler = ConnectionScheduler(max_warm_connections=0)
+    led, connect = _warm_led(make_led, monkeypatch, scheduler)
+    _advertise(loop, led)
+    connect.assert_not_awaited()
+
+    loop.run_until_complete(led._ensure_connected())
+    stats = led.connection_stats
+    assert (stats.warm_hits, stats.cold_starts) == (0, 1)
+    led._disconnect_timer.cancel()
+
+
+def test_warm_mode_backs_off_after_failure(loop, monkeypatch, make_led):
+    led, connect = _warm_led(make_led, monkeypatch, ConnectionScheduler())
+    connect.side_effect = BleakError("out of range")
+    _advertise(loop, led)
+    _advertise(loop, led)
+    connect.assert_awaited_once()
+    assert led.connection_stats.warm_connects == 0
@@ -0,0 +1,116 @@
+"""Tests for filtered, throttled and async state subscriptions."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import replace
+
+import pytest
+
+from led_ble.models import LEDBLEState
+
+STATE = LEDBLEState(power=True, rgb=(1, 2, 3))
+
+
+def test_plain_callback_runs_for_every_state(led):
+    received: list[LEDBLEState] = []
+    led.register_callback(received.append)
+    led._fire_callbacks()
+    led._fire_callbacks()
+    assert len(received) == 2
+
+
+def test_rejects_unknown_fields_and_negative_interval(led):
+    with pytest.raises(ValueError, match="Unknown state fields: colour"):
+        led.register_callback(print, fields=["power", "colour"])
+    with pytest.raises(ValueError, match="interval"):
+        led.register_callback(print, interval=-1)
+
+
+def test_field_subscription_skips_other_changes(led):
+    received: list[LEDBLEState] = []
+    led.register_callback(received.append, fields=["power"])
+    led._state = STATE
+    led._fire_callbacks()
+    led._state = replace(STATE, rgb=(9, 9, 9), w=5)
+    led._fire_callbacks()
+    assert received == [STATE]
+    led._state = replace(led._state, power=False)
+    led._fire_callbacks()
+    assert len(received) == 2
+    assert received[1].power is False
+
+
+def test_interval_delivers_newest_state_once(loop, led):
+    received: list[LEDBLEState] = []
+    led.register_callback(received.append, interval=0.05)
+
+    async def run() -> None:
+        for red in range(5):
+            led._state = replace(STATE, rgb=(red, 0, 0))
+            led._fire_callbacks()
+        # The first state goes out at once, the rest are held back.
+        assert [state.rgb for state in received] == [(0, 0, 0)]
+        await asyncio.sleep(0.1)
+
+    loop.run_until_complete(run())
+    assert [state.rgb for state in received] == [(0, 0, 0), (4, 0, 0)]
+
+
+def test_async_callback_runs_one_at_a_time(loop, led):
+    received: list[tuple[int, int, int]] = []
+    release = asyncio.Event()
+
+    async def callback(state: LEDBLEState) -> None:
+        received.append(state.rgb)
+        await release.wait()
+
+    led.register_callback(callback)
+
+    async def run() -> None:
+        for red in range(3):
+            led._state = replace(STATE, rgb=(red, 0, 0))
+            led._fire_callbacks()
+            await asyncio.sleep(0)
+        assert received == [(0, 0, 0)]
+        release.set()
+        await asyncio.sleep(0.01)
+
+    loop.run_until_complete(run())
+    assert received == [(0, 0, 0), (2, 0, 0)]
+
+
+def test_async_callback_error_is_logged(loop, led, caplog):
+    calls = 0
+
+    async def callback(state: LEDBLEState) -> None:
+        nonlocal calls
+        calls += 1
+        raise RuntimeError("boom")
+
+    led.register_callback(callback)
+
+    async def run() -> None:
+        led._fire_callbacks()
+        await asyncio.sleep(0)
+        led._fire_callbacks()
+        await asyncio.sleep(0)
+
+    loop.run_until_complete(run())
+    assert calls == 2
+    assert "Error in state callback" in caplog.text
+
+
+def test_unregister_drops_held_back_state(loop, led):
+    received: list[LEDBLEState] = []
+    unregister = led.register_callback(received.append, interval=0.05)
+
+    async def run() -> None:
+        led._fire_callbacks()
+        led._state = STATE
+        led._fire_callbacks()
+        unregister()
+        await asyncio.sleep(0.1)
+
+    loop.run_until_complete(run())
+    assert received == [LEDBLEState()]
@@ -0,0 +1,41 @@
+"""Tests for transition frame generation (pure, hardware-free logic)."""
+
+from __future__ import annotations
+
+from led_ble.transition import TRANSITION_FPS, interpolate_levels, transition_steps
+
+
+def test_transition_steps_scales_with_duration():
+    assert transition_steps(1.0) == TRANSITION_FPS
+    assert transition_steps(2.0) == 2 * TRANSITION_FPS
+
+
+def test_transition_steps_at_least_one():
+    assert transition_steps(0) == 1
+    assert transition_steps(0.001) == 1
+
+
+def test_interpolate_levels_ends_on_target():
+    frames = interpolate_levels((0, 0, 0, 0), (255, 128, 0, 0), 10)
+    assert frames[-1] == (10, (255, 128, 0, 0))
+    assert frames[0] == (1, (26, 13, 0, 0))
+
+
+def test_interpolate_levels_is_monotonic():
+    frames = interpolate_levels((255, 0, 0, 0), (0, 0, 255, 0), 50)
+    reds = [levels[0] for _, levels in frames]
+    blues = [levels[2] for _, levels in frames]
+    assert reds == sorted(reds, reverse=True)
+    assert blues == sorted(blues)
+
+
+def test_interpolate_levels_collapses_repeated_frames():
+    # A 2-step range over 50 frames only needs two distinct writes.
+    frames = interpolate_levels((0, 0, 0, 10), (0, 0, 0, 12), 50)
+    assert [levels for _, levels in frames] == [(0, 0, 0, 11), (0, 0, 0, 12)]
+    # Each write keeps the step at which its levels are first reached.
+    assert [step for step, _ in frames] == [13, 38]
+
+
+def test_interpolate_levels_no_change_writes_target_once():
+    assert interpolate_levels((1, 2, 3, 4), (1, 2, 3, 4), 50) == [(1, (1, 2, 3, 4))]